@@ -8,5 +8,50 @@ DB_CONFIG = {
     "user": os.getenv("DB_USER", "root"),
     "password": os.getenv("DB_PASSWORD", ""),
     "database": os.getenv("DB_NAME", "consignado"),
-    "port": int(os.getenv("DB_PORT", 3306))
+    "port": int(os.getenv("DB_PORT", 3306)),
+    "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+    "max_overflow": int(os.getenv("DB_POOL_MAX_OVERFLOW", 5)),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+    "pool_max_waiters": int(os.getenv("DB_POOL_MAX_WAITERS", 32)),
+    "pool_reset_session": os.getenv("DB_POOL_RESET_SESSION", "1").strip().lower() not in {"0", "false", "no", "off"},
 }
+
+AUTH_CONTEXT_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CONTEXT_CACHE_TTL_SECONDS", 30))
+AUTH_CONTEXT_CACHE_MAX_USERS = int(os.getenv("AUTH_CONTEXT_CACHE_MAX_USERS", 5000))
+
+MAINTENANCE_CACHE_TTL_SECONDS = float(os.getenv("MAINTENANCE_CACHE_TTL_SECONDS", 10))
+
+CLIENT_SEARCH_INDEX_ENABLED = os.getenv("CLIENT_SEARCH_INDEX_ENABLED", "0").strip().lower() in {"1", "true", "yes", "on"}
+CLIENT_SEARCH_INDEX_RECONCILE_SECONDS = float(os.getenv("CLIENT_SEARCH_INDEX_RECONCILE_SECONDS", 60))
+
+NOTIFICATIONS_STREAM_MAX_PER_WORKER = int(os.getenv("NOTIFICATIONS_STREAM_MAX_PER_WORKER", 4))
+NOTIFICATIONS_STREAM_HEARTBEAT_SECONDS = float(os.getenv("NOTIFICATIONS_STREAM_HEARTBEAT_SECONDS", 15))
+NOTIFICATIONS_STREAM_RECHECK_SECONDS = float(os.getenv("NOTIFICATIONS_STREAM_RECHECK_SECONDS", 10))
+NOTIFICATIONS_STREAM_MAX_SECONDS = float(os.getenv("NOTIFICATIONS_STREAM_MAX_SECONDS", 300))
+NOTIFICATIONS_SIGNAL_POLL_SECONDS = float(os.getenv("NOTIFICATIONS_SIGNAL_POLL_SECONDS", 1))
+
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", 90))
+NOTIFICATION_ARCHIVE_BATCH_SIZE = int(os.getenv("NOTIFICATION_ARCHIVE_BATCH_SIZE", 500))
+NOTIFICATION_ARCHIVE_PAUSE_SECONDS = float(os.getenv("NOTIFICATION_ARCHIVE_PAUSE_SECONDS", 0.2))
+NOTIFICATION_ARCHIVE_MAX_SECONDS = float(os.getenv("NOTIFICATION_ARCHIVE_MAX_SECONDS", 300))
+
+NOTIFICATION_OUTBOX_ENABLED = os.getenv("NOTIFICATION_OUTBOX_ENABLED", "1").strip().lower() in {"1", "true", "yes", "on"}
+NOTIFICATION_OUTBOX_BATCH_SIZE = int(os.getenv("NOTIFICATION_OUTBOX_BATCH_SIZE", 20))
+NOTIFICATION_OUTBOX_POLL_SECONDS = float(os.getenv("NOTIFICATION_OUTBOX_POLL_SECONDS", 1))
+NOTIFICATION_OUTBOX_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_OUTBOX_MAX_ATTEMPTS", 8))
+NOTIFICATION_OUTBOX_RETENTION_HOURS = int(os.getenv("NOTIFICATION_OUTBOX_RETENTION_HOURS", 24))
+
+RECIPIENT_DIRECTORY_CHECK_SECONDS = float(os.getenv("RECIPIENT_DIRECTORY_CHECK_SECONDS", 10))
+
+DOCUMENT_STORAGE_BACKEND = os.getenv("DOCUMENT_STORAGE_BACKEND", "local").strip().lower()
+DOCUMENT_STORAGE_ROOT = os.getenv("DOCUMENT_STORAGE_ROOT", "").strip()
+DOCUMENT_BLOB_MIGRATION_BATCH_SIZE = int(os.getenv("DOCUMENT_BLOB_MIGRATION_BATCH_SIZE", 50))
+DOCUMENT_BLOB_GC_GRACE_SECONDS = int(os.getenv("DOCUMENT_BLOB_GC_GRACE_SECONDS", 3600))
+DOCUMENT_ACCEL_REDIRECT_PREFIX = os.getenv("DOCUMENT_ACCEL_REDIRECT_PREFIX", "").strip()
+
+DOCUMENT_UPLOAD_MAX_FILE_MB = float(os.getenv("DOCUMENT_UPLOAD_MAX_FILE_MB", 5))
+DOCUMENT_UPLOAD_MAX_REQUEST_MB = float(os.getenv("DOCUMENT_UPLOAD_MAX_REQUEST_MB", 25))
+
+DOCUMENT_MIGRATION_THREADS = int(os.getenv("DOCUMENT_MIGRATION_THREADS", 4))
+DOCUMENT_MIGRATION_COMMIT_EVERY = int(os.getenv("DOCUMENT_MIGRATION_COMMIT_EVERY", 100))
+DOCUMENT_MIGRATION_STALE_SECONDS = int(os.getenv("DOCUMENT_MIGRATION_STALE_SECONDS", 120))
@@ -1,10 +1,166 @@
+import threading
+import time
+
 import mysql.connector
 from contextlib import contextmanager
+from flask import g, has_request_context
 from mysql.connector import pooling
+from mysql.connector.errors import PoolError
 
 from app.config.settings import DB_CONFIG
 
 _pool = None
+_pool_lock = threading.Lock()
+
+POOL_WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class PoolExhaustedError(PoolError):
+    pass
+
+
+class PooledConnection:
+    # Wraps a connection checked out from DatabasePool so close() frees the
+    # slot and wakes up the next waiter. Overflow connections are real
+    # connections outside the mysql-connector pool and are closed for good.
+    def __init__(self, pool, connection, overflow=False):
+        self._pool = pool
+        self._connection = connection
+        self._overflow = overflow
+        self._released = False
+
+    def close(self):
+        if self._released:
+            return None
+        self._released = True
+        try:
+            self._connection.close()
+        finally:
+            self._pool._release(self._overflow)
+        return None
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+class DatabasePool:
+    def __init__(self, config):
+        self.pool_size = max(1, min(int(config.get("pool_size") or 5), pooling.CNX_POOL_MAXSIZE))
+        self.max_overflow = max(0, int(config.get("max_overflow") or 0))
+        self.timeout = max(0.0, float(config.get("pool_timeout") or 0))
+        self.max_waiters = max(0, int(config.get("pool_max_waiters") or 0))
+
+        self._connect_args = {
+            "host": config["host"],
+            "user": config["user"],
+            "password": config["password"],
+            "database": config["database"],
+            "port": config.get("port", 3306),
+            "connection_timeout": 10,
+            "charset": "utf8mb4",
+            "collation": "utf8mb4_unicode_ci",
+            "use_unicode": True,
+            "autocommit": False,
+        }
+        self._pool = pooling.MySQLConnectionPool(
+            pool_name="consignado_pool",
+            pool_size=self.pool_size,
+            pool_reset_session=bool(config.get("pool_reset_session", True)),
+            **self._connect_args,
+        )
+
+        self._condition = threading.Condition()
+        self._in_use = 0
+        self._overflow_in_use = 0
+        self._waiters = 0
+        self._checkouts = 0
+        self._exhaustion_events = 0
+        self._wait_histogram = [0] * (len(POOL_WAIT_BUCKETS_MS) + 1)
+        self._wait_total_ms = 0.0
+
+    def _record_wait(self, waited_ms):
+        self._wait_total_ms += waited_ms
+        for index, bucket in enumerate(POOL_WAIT_BUCKETS_MS):
+            if waited_ms <= bucket:
+                self._wait_histogram[index] += 1
+                return
+        self._wait_histogram[-1] += 1
+
+    def _reserve_slot(self):
+        # Returns "pool" or "overflow" when a slot was taken, None otherwise.
+        if self._in_use < self.pool_size:
+            self._in_use += 1
+            return "pool"
+        if self._overflow_in_use < self.max_overflow:
+            self._overflow_in_use += 1
+            return "overflow"
+        return None
+
+    def get_connection(self):
+        started = time.monotonic()
+        with self._condition:
+            slot = self._reserve_slot()
+            if slot is None:
+                if self._waiters >= self.max_waiters:
+                    self._exhaustion_events += 1
+                    raise PoolExhaustedError("Pool de conexoes esgotado (fila cheia)")
+
+                self._waiters += 1
+                try:
+                    deadline = started + self.timeout
+                    while slot is None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+                        slot = self._reserve_slot()
+                finally:
+                    self._waiters -= 1
+
+                if slot is None:
+                    self._exhaustion_events += 1
+                    self._record_wait((time.monotonic() - started) * 1000)
+                    raise PoolExhaustedError("Tempo esgotado aguardando conexao do pool")
+
+            self._checkouts += 1
+            self._record_wait((time.monotonic() - started) * 1000)
+
+        overflow = slot == "overflow"
+        try:
+            if overflow:
+                connection = mysql.connector.connect(**self._connect_args)
+            else:
+                connection = self._pool.get_connection()
+        except Exception:
+            self._release(overflow)
+            raise
+        return PooledConnection(self, connection, overflow=overflow)
+
+    def _release(self, overflow):
+        with self._condition:
+            if overflow:
+                self._overflow_in_use = max(0, self._overflow_in_use - 1)
+            else:
+                self._in_use = max(0, self._in_use - 1)
+            self._condition.notify()
+
+    def stats(self):
+        with self._condition:
+            buckets = {f"le_{bucket}ms": count for bucket, count in zip(POOL_WAIT_BUCKETS_MS, self._wait_histogram)}
+            buckets["gt_{}ms".format(POOL_WAIT_BUCKETS_MS[-1])] = self._wait_histogram[-1]
+            return {
+                "pool_size": self.pool_size,
+                "max_overflow": self.max_overflow,
+                "timeout_seconds": self.timeout,
+                "max_waiters": self.max_waiters,
+                "in_use": self._in_use + self._overflow_in_use,
+                "overflow_in_use": self._overflow_in_use,
+                "waiters": self._waiters,
+                "checkouts": self._checkouts,
+                "exhaustion_events": self._exhaustion_events,
+                "wait_ms_total": round(self._wait_total_ms, 3),
+                "wait_ms_histogram": buckets,
+            }
 
 
 def _get_pool():
@@ -14,29 +170,76 @@ def _get_pool():
     # hanging the sync worker until gunicorn's 30s WORKER TIMEOUT kills it.
     global _pool
     if _pool is None:
-        _pool = pooling.MySQLConnectionPool(
-            pool_name="consignado_pool",
-            pool_size=5,
-            pool_reset_session=True,
-            connection_timeout=10,
-            host=DB_CONFIG["host"],
-            user=DB_CONFIG["user"],
-            password=DB_CONFIG["password"],
-            database=DB_CONFIG["database"],
-            port=DB_CONFIG.get("port", 3306),
-            charset="utf8mb4",
-            collation="utf8mb4_unicode_ci",
-            use_unicode=True,
-            autocommit=False,
-        )
+        with _pool_lock:
+            if _pool is None:
+                _pool = DatabasePool(DB_CONFIG)
     return _pool
 
 
-def get_db():
+def pool_stats():
+    if _pool is None:
+        return {"initialized": False}
+    return {"initialized": True, **_pool.stats()}
+
+
+class RequestConnection:
+    # Handed out by get_db() inside a request. Every helper and the route
+    # itself share the same pooled connection, so close() is a no-op here and
+    # the real connection goes back to the pool once, in teardown_request.
+    def __init__(self, connection):
+        self._connection = connection
+
+    def close(self):
+        return None
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def _checkout():
+    connection = _get_pool().get_connection()
+    if has_request_context():
+        g._db_checkouts = request_db_checkouts() + 1
+    return connection
+
+
+def request_db_checkouts():
+    if not has_request_context():
+        return 0
+    return int(g.get("_db_checkouts") or 0)
+
+
+def get_db(dedicated=False):
     """
     Returns a pooled MySQL connection.
+
+    Inside a request the connection is shared by every caller until the
+    request ends; pass dedicated=True to get a private one.
     """
-    return _get_pool().get_connection()
+    if dedicated or not has_request_context():
+        return _checkout()
+
+    connection = g.get("_request_db")
+    if connection is None:
+        connection = _checkout()
+        g._request_db = connection
+    return RequestConnection(connection)
+
+
+def release_request_db(exc=None):
+    connection = g.pop("_request_db", None)
+    if connection is None:
+        return
+
+    try:
+        connection.rollback()
+    except Exception:
+        pass
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
 
 
 @contextmanager
@@ -56,4 +259,3 @@ def db_cursor(dictionary=False):
     finally:
         cursor.close()
         db.close()
-
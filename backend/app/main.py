@@ -5,17 +5,18 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, get_jwt, verify_jwt_in_request
 
-from app.database import get_db
+from app.database import release_request_db, request_db_checkouts
 from app.routes.auth import auth_bp
 from app.routes.clients import clients_bp
 from app.routes.health import health_bp
 from app.routes.system import system_bp
 from app.routes.users import users_bp
+from app.services.file_service import UploadRequest
+from app.utils.notification_bus import publish_pending_notification_events
 from app.utils.security import (
     ROLE_ADMIN,
     ROLE_GLOBAL,
-    ensure_system_settings_table,
-    get_maintenance_state,
+    get_cached_maintenance_state,
 )
 
 load_dotenv()
@@ -38,6 +39,7 @@ def parse_cors_origins():
 
 def create_app():
     app = Flask(__name__)
+    app.request_class = UploadRequest
     app.json.ensure_ascii = False
 
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev-secret-key")
@@ -54,7 +56,8 @@ def create_app():
         app,
         resources={r"/api/*": {"origins": cors_origins}},
         supports_credentials=(cors_origins != "*"),
-        allow_headers=["Content-Type", "Authorization"],
+        allow_headers=["Content-Type", "Authorization", "If-None-Match"],
+        expose_headers=["ETag"],
         methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     )
 
@@ -69,20 +72,10 @@ def create_app():
         if request.path in MAINTENANCE_PUBLIC_PATHS:
             return None
 
-        db = None
-        cursor = None
         try:
-            db = get_db()
-            cursor = db.cursor(dictionary=True)
-            ensure_system_settings_table(cursor, db)
-            state = get_maintenance_state(cursor)
+            state = get_cached_maintenance_state()
         except Exception:
             return None
-        finally:
-            if cursor is not None:
-                cursor.close()
-            if db is not None:
-                db.close()
 
         if not state.get("enabled"):
             return None
@@ -108,6 +101,22 @@ def create_app():
             503,
         )
 
+    @app.after_request
+    def report_db_checkouts(response):
+        response.headers["X-DB-Checkouts"] = str(request_db_checkouts())
+        return response
+
+    @app.after_request
+    def flush_notification_events(response):
+        # Routes commit before returning, so open notification streams only
+        # get the signal once the new rows are visible to them.
+        publish_pending_notification_events()
+        return response
+
+    @app.teardown_request
+    def close_request_db(exc):
+        release_request_db(exc)
+
     app.register_blueprint(health_bp, url_prefix="/api")
     app.register_blueprint(auth_bp, url_prefix="/api")
     app.register_blueprint(clients_bp, url_prefix="/api")
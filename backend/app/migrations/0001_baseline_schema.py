@@ -0,0 +1,51 @@
+# Schema that used to be checked lazily by the ensure_* helpers on the first
+# requests of every worker. The helpers are idempotent, so running them here
+# upgrades both fresh databases and ones already touched by older releases.
+
+
+def upgrade(cursor, db):
+    from app.routes.clients import (
+        ensure_clients_extra_columns,
+        ensure_dashboard_goals_table,
+        ensure_documents_table,
+        ensure_operation_comments_table,
+        ensure_operation_notifications_table,
+        ensure_operation_status_history_table,
+        ensure_operations_extra_columns,
+    )
+    from app.routes.users import ensure_user_profile_columns, ensure_user_role_enum
+    from app.utils.company import (
+        ensure_companies_table,
+        ensure_company_operations_lock_columns,
+        ensure_company_scope_columns,
+    )
+    from app.utils.security import (
+        ensure_audit_logs_table,
+        ensure_system_settings_table,
+        ensure_trash_bin_table,
+        ensure_user_security_columns,
+    )
+
+    ensure_companies_table(cursor, db)
+    ensure_company_operations_lock_columns(cursor, db)
+
+    ensure_user_role_enum(cursor, db)
+    ensure_user_profile_columns(cursor, db)
+    ensure_user_security_columns(cursor, db)
+
+    ensure_clients_extra_columns(cursor, db)
+    ensure_operations_extra_columns(cursor, db)
+    ensure_documents_table(cursor, db)
+    ensure_dashboard_goals_table(cursor, db)
+    ensure_operation_comments_table(cursor, db)
+    ensure_operation_status_history_table(cursor, db)
+    ensure_operation_notifications_table(cursor, db)
+
+    ensure_audit_logs_table(cursor, db)
+    ensure_trash_bin_table(cursor, db)
+    ensure_system_settings_table(cursor, db)
+
+    # Tables created above (dashboard_goals, comments, history, notifications)
+    # still need empresa_id; the earlier calls ran before they existed.
+    ensure_company_scope_columns.__wrapped__(cursor, db)
+    db.commit()
@@ -0,0 +1,21 @@
+from app.migrations import create_index_if_missing
+
+# Access paths of the pipeline, dashboard, stats, sales board and dashboard
+# notifications. All of them filter by empresa_id (except GLOBAL) and status,
+# then range over one of the date columns. Keep in sync with build_hot_queries in
+# app/migrations/explain.py.
+OPERACOES_INDEXES = (
+    ("idx_operacoes_empresa_status_criado", "empresa_id, status, criado_em"),
+    ("idx_operacoes_empresa_status_pagamento", "empresa_id, status, data_pagamento"),
+    ("idx_operacoes_empresa_status_esteira", "empresa_id, status, enviada_esteira_em"),
+    ("idx_operacoes_empresa_criado", "empresa_id, criado_em"),
+    ("idx_operacoes_empresa_produto_status", "empresa_id, produto, status"),
+    ("idx_operacoes_empresa_digitador_status", "empresa_id, digitador_id, status"),
+    ("idx_operacoes_status_criado", "status, criado_em"),
+)
+
+
+def upgrade(cursor, db):
+    for index_name, columns_sql in OPERACOES_INDEXES:
+        create_index_if_missing(cursor, "operacoes", index_name, columns_sql)
+    db.commit()
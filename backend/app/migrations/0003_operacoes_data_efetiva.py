@@ -0,0 +1,31 @@
+from app.migrations import create_index_if_missing
+from app.utils.company import column_exists
+
+# Dashboard and sales board group approved operations by the payment date,
+# falling back to the creation date. Storing that as a generated column lets
+# the month/year windows be plain index range scans.
+
+
+def upgrade(cursor, db):
+    if not column_exists(cursor, "operacoes", "data_efetiva"):
+        cursor.execute(
+            """
+            ALTER TABLE operacoes
+            ADD COLUMN data_efetiva DATETIME
+                GENERATED ALWAYS AS (COALESCE(data_pagamento, criado_em)) STORED
+            """
+        )
+
+    create_index_if_missing(
+        cursor,
+        "operacoes",
+        "idx_operacoes_empresa_status_efetiva",
+        "empresa_id, status, data_efetiva",
+    )
+    create_index_if_missing(
+        cursor,
+        "operacoes",
+        "idx_operacoes_status_efetiva",
+        "status, data_efetiva",
+    )
+    db.commit()
@@ -0,0 +1,34 @@
+from app.migrations import create_index_if_missing
+
+
+def upgrade(cursor, db):
+    from app.routes.clients import rebuild_client_operation_summaries
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS client_operation_summary (
+            client_id INT NOT NULL PRIMARY KEY,
+            empresa_id INT NULL,
+            last_operation_id INT NULL,
+            last_operation_status VARCHAR(50) NULL,
+            last_operation_at DATETIME NULL,
+            operation_count INT NOT NULL DEFAULT 0,
+            updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_client_operation_summary_empresa (empresa_id)
+        )
+        """
+    )
+
+    # Serves the per-client "last operation" lookup used to refresh a row.
+    create_index_if_missing(cursor, "operacoes", "idx_operacoes_cliente_criado", "cliente_id, criado_em, id")
+    # GET /clients orders by criado_em inside the caller's scope.
+    create_index_if_missing(cursor, "clientes", "idx_clientes_empresa_criado", "empresa_id, criado_em")
+    create_index_if_missing(
+        cursor,
+        "clientes",
+        "idx_clientes_empresa_vendedor_criado",
+        "empresa_id, vendedor_id, criado_em",
+    )
+    db.commit()
+
+    rebuild_client_operation_summaries(cursor, db, log=print)
@@ -0,0 +1,53 @@
+from app.migrations import create_index_if_missing, index_exists
+from app.utils.company import column_exists
+
+# /search/global runs on every keystroke. Digits-only copies of cpf and
+# numero_beneficio make CPF/benefit lookups index prefix ranges, and the
+# accent-folded nome_busca carries an ngram FULLTEXT index for names.
+
+
+def upgrade(cursor, db):
+    from app.routes.clients import backfill_client_search_columns
+
+    new_columns = (
+        ("cpf_digits", "VARCHAR(14) NULL"),
+        ("beneficio_digits", "VARCHAR(30) NULL"),
+        ("nome_busca", "VARCHAR(255) NULL"),
+    )
+    for column_name, definition in new_columns:
+        if not column_exists(cursor, "clientes", column_name):
+            cursor.execute(f"ALTER TABLE clientes ADD COLUMN {column_name} {definition}")
+    db.commit()
+
+    backfill_client_search_columns(cursor, db, log=print)
+
+    create_index_if_missing(cursor, "clientes", "idx_clientes_cpf_digits", "cpf_digits")
+    create_index_if_missing(cursor, "clientes", "idx_clientes_beneficio_digits", "beneficio_digits")
+    create_index_if_missing(
+        cursor,
+        "clientes",
+        "idx_clientes_empresa_cpf_digits",
+        "empresa_id, cpf_digits",
+    )
+    create_index_if_missing(
+        cursor,
+        "clientes",
+        "idx_clientes_empresa_beneficio_digits",
+        "empresa_id, beneficio_digits",
+    )
+
+    if not index_exists(cursor, "clientes", "ft_clientes_nome_busca"):
+        # The default InnoDB stopword list includes "de" and "la", which would
+        # drop bigrams out of Portuguese names. The setting is read when the
+        # index is built, so it only has to be off for this statement.
+        cursor.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+        try:
+            cursor.execute(
+                """
+                ALTER TABLE clientes
+                ADD FULLTEXT INDEX ft_clientes_nome_busca (nome_busca) WITH PARSER ngram
+                """
+            )
+        finally:
+            cursor.execute("SET SESSION innodb_ft_enable_stopword = ON")
+    db.commit()
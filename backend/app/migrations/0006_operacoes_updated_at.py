@@ -0,0 +1,32 @@
+from app.migrations import create_index_if_missing
+from app.utils.company import column_exists
+
+# Last-change timestamp for operacoes, maintained by MySQL itself on every
+# UPDATE that changes the row. GET /operations/pipeline fingerprints the
+# caller's scope with COUNT/MAX(updated_at) to answer polls with 304.
+
+
+def upgrade(cursor, db):
+    if not column_exists(cursor, "operacoes", "updated_at"):
+        cursor.execute(
+            """
+            ALTER TABLE operacoes
+            ADD COLUMN updated_at DATETIME(6) NOT NULL
+                DEFAULT CURRENT_TIMESTAMP(6)
+                ON UPDATE CURRENT_TIMESTAMP(6)
+            """
+        )
+
+    create_index_if_missing(
+        cursor,
+        "operacoes",
+        "idx_operacoes_empresa_status_updated",
+        "empresa_id, status, updated_at",
+    )
+    create_index_if_missing(
+        cursor,
+        "operacoes",
+        "idx_operacoes_status_updated",
+        "status, updated_at",
+    )
+    db.commit()
@@ -0,0 +1,29 @@
+from app.migrations import create_index_if_missing
+
+# Delta mode of GET /operations/pipeline (since=<cursor>) reads operations
+# whose updated_at moved past the cursor and, for deleted operations, the
+# tombstones written by the delete paths right before the row goes away.
+
+
+def upgrade(cursor, db):
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS operation_tombstones (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            operation_id INT NOT NULL,
+            empresa_id INT NULL,
+            deleted_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+            INDEX idx_operation_tombstones_empresa_deleted (empresa_id, deleted_at),
+            INDEX idx_operation_tombstones_deleted (deleted_at)
+        )
+        """
+    )
+
+    create_index_if_missing(
+        cursor,
+        "operacoes",
+        "idx_operacoes_empresa_updated",
+        "empresa_id, updated_at",
+    )
+    create_index_if_missing(cursor, "operacoes", "idx_operacoes_updated", "updated_at")
+    db.commit()
@@ -0,0 +1,14 @@
+from app.migrations import create_index_if_missing
+
+# /notifications/stream re-reads "user_id = ? AND id > last_event_id" on every
+# wake-up and recheck; (user_id, id) turns that into a short range scan.
+
+
+def upgrade(cursor, db):
+    create_index_if_missing(
+        cursor,
+        "operation_notifications",
+        "idx_operation_notifications_user_id",
+        "user_id, id",
+    )
+    db.commit()
@@ -0,0 +1,29 @@
+# Maintained unread counter per user; see app/utils/notification_counters.py.
+# Backfilled in one pass here, before the workers that keep it up to date
+# start. Drift is fixed later by the periodic job
+# `python -m app.migrations reconcile-notification-counters`.
+
+
+def upgrade(cursor, db):
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS notification_unread_counters (
+            user_id INT PRIMARY KEY,
+            unread_count INT UNSIGNED NOT NULL DEFAULT 0,
+            updated_at DATETIME(6) NOT NULL
+                DEFAULT CURRENT_TIMESTAMP(6)
+                ON UPDATE CURRENT_TIMESTAMP(6)
+        )
+        """
+    )
+    cursor.execute(
+        """
+        INSERT INTO notification_unread_counters (user_id, unread_count)
+        SELECT user_id, COUNT(*)
+        FROM operation_notifications
+        WHERE read_at IS NULL
+        GROUP BY user_id
+        ON DUPLICATE KEY UPDATE unread_count = VALUES(unread_count)
+        """
+    )
+    db.commit()
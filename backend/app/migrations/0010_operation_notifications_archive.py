@@ -0,0 +1,36 @@
+from app.migrations import create_index_if_missing
+
+# Cold storage for read notifications past NOTIFICATION_RETENTION_DAYS. The
+# archive keeps the original id as primary key so a batch replayed after a
+# crash is a no-op; (read_at) lets the job find old rows without walking the
+# unread ones.
+
+
+def upgrade(cursor, db):
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS operation_notifications_archive (
+            id INT PRIMARY KEY,
+            user_id INT NOT NULL,
+            empresa_id INT NULL,
+            operation_id INT NOT NULL,
+            previous_status VARCHAR(50) NULL,
+            next_status VARCHAR(50) NOT NULL,
+            title VARCHAR(180) NOT NULL,
+            message TEXT NOT NULL,
+            read_at DATETIME NULL,
+            created_at DATETIME NOT NULL,
+            archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_operation_notifications_archive_user_created (user_id, created_at),
+            INDEX idx_operation_notifications_archive_operation (operation_id)
+        )
+        """
+    )
+
+    create_index_if_missing(
+        cursor,
+        "operation_notifications",
+        "idx_operation_notifications_read_at",
+        "read_at",
+    )
+    db.commit()
@@ -0,0 +1,27 @@
+# Transactional outbox for notification fan-out: the request writes one row
+# next to its own changes and app.workers.notification_outbox expands it into
+# operation_notifications later. (status, available_at) serves the worker's
+# claim query; (created_at) serves the lag metrics and the cleanup of
+# delivered rows.
+
+
+def upgrade(cursor, db):
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS notification_outbox (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            kind VARCHAR(40) NOT NULL,
+            payload TEXT NOT NULL,
+            empresa_id INT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'PENDING',
+            attempts INT NOT NULL DEFAULT 0,
+            last_error VARCHAR(500) NULL,
+            available_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+            created_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+            processed_at DATETIME(6) NULL,
+            INDEX idx_notification_outbox_status_available (status, available_at, id),
+            INDEX idx_notification_outbox_created (created_at)
+        )
+        """
+    )
+    db.commit()
@@ -0,0 +1,19 @@
+from app.migrations import create_index_if_missing
+
+# Stores operacoes.status/produto and usuarios.role in canonical form so the
+# read paths compare them with plain equality (and can use the indexes)
+# instead of UPPER()/TRIM() and legacy status IN-lists. The write paths
+# canonicalize from here on; `python -m app.migrations canonicalize-values`
+# reruns the rewrite for rows written by an older deploy.
+
+
+def upgrade(cursor, db):
+    from app.routes.clients import canonicalize_stored_operation_values
+    from app.routes.users import canonicalize_stored_user_roles
+
+    canonicalize_stored_operation_values(cursor, db, log=print)
+    canonicalize_stored_user_roles(cursor, db)
+
+    create_index_if_missing(cursor, "usuarios", "idx_usuarios_empresa_role", "empresa_id, role")
+    db.commit()
+
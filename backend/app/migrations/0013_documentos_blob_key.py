@@ -0,0 +1,21 @@
+from app.migrations import create_index_if_missing
+from app.utils.company import column_exists
+
+# Document bytes move from documentos.file_data (LONGBLOB) to the blob store
+# in app/services/document_storage.py; blob_key is the SHA-256 of the content.
+# Existing rows keep file_data until `python -m app.migrations
+# move-document-blobs` copies them out, and reads fall back to file_data while
+# blob_key is NULL. The index serves the reference scan of the blob cleanup.
+
+
+def upgrade(cursor, db):
+    if not column_exists(cursor, "documentos", "blob_key"):
+        cursor.execute("ALTER TABLE documentos ADD COLUMN blob_key CHAR(64) NULL AFTER file_size")
+
+    create_index_if_missing(
+        cursor,
+        "documentos",
+        "idx_documentos_blob_key",
+        "blob_key",
+    )
+    db.commit()
@@ -0,0 +1,20 @@
+# Marks legacy storage/clients/<id> folders already copied into documentos, so
+# document reads stop listing directories (see sync_legacy_documents_once).
+# When no legacy folder exists at all the global marker is set right away.
+
+
+def upgrade(cursor, db):
+    from app.routes.clients import iter_storage_client_ids, mark_legacy_documents_migrated
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS document_legacy_sync (
+            client_id INT NOT NULL PRIMARY KEY,
+            synced_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+    if next(iter_storage_client_ids(), None) is None:
+        mark_legacy_documents_migrated(cursor)
+    db.commit()
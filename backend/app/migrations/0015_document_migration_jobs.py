@@ -0,0 +1,28 @@
+# Progress of the legacy storage -> documentos copy started by
+# POST /system/documents/migrate-storage (app/services/document_migration.py).
+# Finished clients are checkpointed in document_legacy_sync, so a job whose
+# heartbeat went stale is resumed instead of starting over.
+
+
+def upgrade(cursor, db):
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS document_migration_jobs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            status VARCHAR(20) NOT NULL DEFAULT 'QUEUED',
+            requested_by INT NULL,
+            scanned_clients INT NOT NULL DEFAULT 0,
+            migrated_clients INT NOT NULL DEFAULT 0,
+            migrated_files INT NOT NULL DEFAULT 0,
+            failed_files INT NOT NULL DEFAULT 0,
+            result TEXT NULL,
+            last_error VARCHAR(500) NULL,
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            started_at DATETIME NULL,
+            heartbeat_at DATETIME NULL,
+            finished_at DATETIME NULL,
+            INDEX idx_document_migration_jobs_status (status, id)
+        )
+        """
+    )
+    db.commit()
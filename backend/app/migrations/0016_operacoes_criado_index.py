@@ -0,0 +1,9 @@
+from app.migrations import create_index_if_missing
+
+# GET /operations/stats for GLOBAL ranges over criado_em across every company
+# and status, which none of the composite indexes from 0002 can serve.
+
+
+def upgrade(cursor, db):
+    create_index_if_missing(cursor, "operacoes", "idx_operacoes_criado", "criado_em")
+    db.commit()
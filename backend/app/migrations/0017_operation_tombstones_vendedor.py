@@ -0,0 +1,22 @@
+from app.migrations import create_index_if_missing
+from app.utils.company import column_exists
+
+# Delta mode only hands a VENDEDOR the tombstones of their own clients'
+# operations, so each tombstone keeps the seller of the deleted operation.
+# Tombstones written before this have no seller and are left out for
+# vendedores; they expire within PIPELINE_TOMBSTONE_RETENTION_DAYS.
+
+
+def upgrade(cursor, db):
+    if not column_exists(cursor, "operation_tombstones", "vendedor_id"):
+        cursor.execute(
+            "ALTER TABLE operation_tombstones ADD COLUMN vendedor_id INT NULL AFTER empresa_id"
+        )
+
+    create_index_if_missing(
+        cursor,
+        "operation_tombstones",
+        "idx_operation_tombstones_empresa_vendedor_deleted",
+        "empresa_id, vendedor_id, deleted_at",
+    )
+    db.commit()
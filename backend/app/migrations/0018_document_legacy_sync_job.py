@@ -0,0 +1,22 @@
+from app.migrations import create_index_if_missing
+from app.utils.company import column_exists
+
+# The document migration job commits its document_legacy_sync claim right
+# away and keeps job_id set until the client's rows are committed; read paths
+# treat such a row as "being copied" instead of waiting on the job's
+# transaction. Rows written by read paths keep job_id NULL.
+
+
+def upgrade(cursor, db):
+    if not column_exists(cursor, "document_legacy_sync", "job_id"):
+        cursor.execute(
+            "ALTER TABLE document_legacy_sync ADD COLUMN job_id INT NULL AFTER client_id"
+        )
+
+    create_index_if_missing(
+        cursor,
+        "document_legacy_sync",
+        "idx_document_legacy_sync_job",
+        "job_id",
+    )
+    db.commit()
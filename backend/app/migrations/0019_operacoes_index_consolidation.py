@@ -0,0 +1,36 @@
+from app.migrations import drop_index_if_exists, index_exists
+
+# Migrations 0002-0007 and 0016 left operacoes with overlapping
+# (empresa_id, status, ...) variants, several updated_at indexes that every
+# status change rewrites, and single-column prefixes of composite indexes.
+# What stays is the set the hot queries in app/migrations/explain.py use:
+#   idx_operacoes_empresa_status_efetiva  company pipeline, dashboard, sales board
+#   idx_operacoes_empresa_criado          created-at windows per company
+#   idx_operacoes_empresa_produto_status  digitador product scope
+#   idx_operacoes_status_efetiva          GLOBAL pipeline and sales board
+#   idx_operacoes_criado                  GLOBAL stats
+#   idx_operacoes_cliente_criado          per-client listing, vendedor joins
+#   idx_operacoes_updated                 pipeline delta (the only updated_at one)
+
+REDUNDANT_OPERACOES_INDEXES = (
+    "idx_operacoes_empresa",
+    "idx_operacoes_empresa_status_criado",
+    "idx_operacoes_empresa_status_pagamento",
+    "idx_operacoes_empresa_status_esteira",
+    "idx_operacoes_empresa_digitador_status",
+    "idx_operacoes_empresa_status_updated",
+    "idx_operacoes_empresa_updated",
+    "idx_operacoes_status_criado",
+    "idx_operacoes_status_updated",
+)
+
+
+def upgrade(cursor, db):
+    for index_name in REDUNDANT_OPERACOES_INDEXES:
+        drop_index_if_exists(cursor, "operacoes", index_name)
+
+    # The foreign key's own index is a prefix of idx_operacoes_cliente_criado,
+    # which then backs the constraint.
+    if index_exists(cursor, "operacoes", "idx_operacoes_cliente_criado"):
+        drop_index_if_exists(cursor, "operacoes", "cliente_id")
+    db.commit()
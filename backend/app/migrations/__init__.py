@@ -0,0 +1,197 @@
+import importlib
+import os
+import re
+import threading
+import time
+
+import mysql.connector
+
+from app.database import get_db
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d{4})_([a-z0-9_]+)\.py$")
+MIGRATION_LOCK_NAME = "consignado_schema_migrations"
+MIGRATION_LOCK_TIMEOUT_SECONDS = 120
+
+_schema_version = None
+_schema_version_lock = threading.Lock()
+_migration_state = threading.local()
+
+
+def discover_migrations():
+    migrations = []
+    for file_name in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE_PATTERN.match(file_name)
+        if not match:
+            continue
+        migrations.append(
+            {
+                "version": int(match.group(1)),
+                "name": match.group(2),
+                "module": f"{__name__}.{file_name[:-3]}",
+            }
+        )
+    return migrations
+
+
+LATEST_SCHEMA_VERSION = max((item["version"] for item in discover_migrations()), default=0)
+
+
+def ensure_schema_migrations_table(cursor, db):
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT NOT NULL PRIMARY KEY,
+            name VARCHAR(120) NOT NULL,
+            duration_ms INT NOT NULL DEFAULT 0,
+            applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    db.commit()
+
+
+def index_exists(cursor, table_name, index_name):
+    cursor.execute(
+        """
+        SELECT 1
+        FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND TABLE_NAME = %s
+          AND INDEX_NAME = %s
+        LIMIT 1
+        """,
+        (table_name, index_name),
+    )
+    return cursor.fetchone() is not None
+
+
+def create_index_if_missing(cursor, table_name, index_name, columns_sql):
+    if index_exists(cursor, table_name, index_name):
+        return False
+    cursor.execute(f"CREATE INDEX {index_name} ON {table_name} ({columns_sql})")
+    return True
+
+
+def drop_index_if_exists(cursor, table_name, index_name):
+    if not index_exists(cursor, table_name, index_name):
+        return False
+    cursor.execute(f"DROP INDEX {index_name} ON {table_name}")
+    return True
+
+
+def read_schema_version(cursor):
+    try:
+        cursor.execute("SELECT MAX(version) AS version FROM schema_migrations")
+        row = cursor.fetchone() or {}
+    except mysql.connector.Error:
+        return 0
+    if isinstance(row, dict):
+        return int(row.get("version") or 0)
+    return int(row[0] or 0)
+
+
+def set_schema_version(version):
+    global _schema_version
+    with _schema_version_lock:
+        _schema_version = int(version or 0)
+
+
+def migration_in_progress():
+    return bool(getattr(_migration_state, "active", False))
+
+
+def migration_step_done(fn):
+    # Inside a migration run the legacy ensure_* bodies call each other (most
+    # of them start with ensure_company_scope_columns), so each one runs at
+    # most once per run.
+    done = getattr(_migration_state, "done", None)
+    if done is None:
+        return False
+    if fn in done:
+        return True
+    done.add(fn)
+    return False
+
+
+def schema_is_current(cursor=None):
+    # The in-memory version is the only thing request paths look at. It is
+    # read from schema_migrations once per worker; after that a current schema
+    # costs no round trip at all.
+    if _schema_version is None and cursor is not None:
+        set_schema_version(read_schema_version(cursor))
+    return (_schema_version or 0) >= LATEST_SCHEMA_VERSION
+
+
+def run_migrations(db=None, log=print):
+    own_connection = db is None
+    if own_connection:
+        db = get_db(dedicated=True)
+    cursor = db.cursor(dictionary=True)
+    applied_now = []
+
+    _migration_state.active = True
+    _migration_state.done = set()
+    try:
+        cursor.execute(
+            "SELECT GET_LOCK(%s, %s) AS acquired",
+            (MIGRATION_LOCK_NAME, MIGRATION_LOCK_TIMEOUT_SECONDS),
+        )
+        if not int((cursor.fetchone() or {}).get("acquired") or 0):
+            raise RuntimeError("Nao foi possivel obter o lock de migracao do schema")
+
+        try:
+            ensure_schema_migrations_table(cursor, db)
+            cursor.execute("SELECT version FROM schema_migrations")
+            applied = {int(row.get("version")) for row in cursor.fetchall()}
+
+            for migration in discover_migrations():
+                if migration["version"] in applied:
+                    continue
+
+                module = importlib.import_module(migration["module"])
+                started = time.monotonic()
+                module.upgrade(cursor, db)
+                duration_ms = int((time.monotonic() - started) * 1000)
+
+                cursor.execute(
+                    """
+                    INSERT INTO schema_migrations (version, name, duration_ms)
+                    VALUES (%s, %s, %s)
+                    """,
+                    (migration["version"], migration["name"], duration_ms),
+                )
+                db.commit()
+                applied.add(migration["version"])
+                applied_now.append(migration["version"])
+                log(f"[migrations] {migration['version']:04d}_{migration['name']} aplicada em {duration_ms}ms")
+
+            set_schema_version(max(applied, default=0))
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s) AS released", (MIGRATION_LOCK_NAME,))
+            cursor.fetchall()
+    finally:
+        _migration_state.active = False
+        _migration_state.done = None
+        cursor.close()
+        if own_connection:
+            db.close()
+
+    from app.utils.company import clear_table_columns_cache
+
+    clear_table_columns_cache()
+    return applied_now
+
+
+def list_applied_migrations(cursor):
+    try:
+        cursor.execute(
+            """
+            SELECT version, name, duration_ms, applied_at
+            FROM schema_migrations
+            ORDER BY version ASC
+            """
+        )
+        return cursor.fetchall()
+    except mysql.connector.Error:
+        return []
@@ -0,0 +1,184 @@
+import sys
+
+from app.database import get_db
+from app.migrations import (
+    LATEST_SCHEMA_VERSION,
+    discover_migrations,
+    list_applied_migrations,
+    run_migrations,
+)
+
+
+def print_status():
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    try:
+        applied = {int(row.get("version")): row for row in list_applied_migrations(cursor)}
+    finally:
+        cursor.close()
+        db.close()
+
+    for migration in discover_migrations():
+        row = applied.get(migration["version"])
+        state = f"aplicada em {row.get('applied_at')}" if row else "pendente"
+        print(f"{migration['version']:04d}_{migration['name']}: {state}")
+    print(f"Versao mais recente: {LATEST_SCHEMA_VERSION}")
+
+
+def check_explain():
+    from app.migrations.explain import explain_hot_queries
+
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    try:
+        results = explain_hot_queries(cursor)
+    finally:
+        cursor.close()
+        db.close()
+
+    failures = 0
+    for result in results:
+        state = "; ".join(result["problems"]) if result["problems"] else "ok"
+        access = ", ".join(
+            f"{item['table']}={item['type']}:{item['key']}" for item in result["access"]
+        )
+        print(f"{result['name']}: {state} ({access})")
+        if result["problems"]:
+            failures += 1
+    if failures:
+        print(f"[explain] {failures} consulta(s) sem o indice esperado")
+    return 1 if failures else 0
+
+
+def repair_client_summary():
+    from app.routes.clients import rebuild_client_operation_summaries
+
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    try:
+        result = rebuild_client_operation_summaries(cursor, db, log=print)
+    finally:
+        cursor.close()
+        db.close()
+    print(f"[client-summary] concluido: {result}")
+    return 0
+
+
+def reconcile_notification_counters():
+    from app.utils.notification_counters import reconcile_unread_notification_counters
+
+    db = get_db()
+    try:
+        result = reconcile_unread_notification_counters(db)
+    finally:
+        db.close()
+    print(f"[notification-counters] concluido: {result}")
+    return 0
+
+
+def archive_notifications():
+    from app.utils.notification_retention import archive_read_notifications
+
+    db = get_db()
+    try:
+        result = archive_read_notifications(db, log=print)
+    finally:
+        db.close()
+    print(f"[notification-archive] concluido: {result}")
+    return 0
+
+
+def canonicalize_values():
+    from app.routes.clients import canonicalize_stored_operation_values
+    from app.routes.users import canonicalize_stored_user_roles
+
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    try:
+        result = canonicalize_stored_operation_values(cursor, db, log=print)
+        canonicalize_stored_user_roles(cursor, db)
+    finally:
+        cursor.close()
+        db.close()
+    print(f"[canonical] concluido: {result}")
+    return 0
+
+
+def move_document_blobs():
+    from app.routes.clients import move_inline_document_blobs
+
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    try:
+        result = move_inline_document_blobs(cursor, db, log=print)
+    finally:
+        cursor.close()
+        db.close()
+    print(f"[document-blobs] concluido: {result}")
+    return 0
+
+
+def sync_legacy_documents():
+    from app.services.document_migration import start_document_migration_job
+
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    try:
+        job, started = start_document_migration_job(cursor, db, background=False)
+    finally:
+        cursor.close()
+        db.close()
+    if not started:
+        print(f"[legacy-documents] job {job['id']} ja em andamento em outro processo")
+        return 1
+    print(f"[legacy-documents] job {job['id']}: {job['status']} {job['result'] or job['last_error']}")
+    return 0 if job["status"] == "DONE" else 1
+
+
+def gc_document_blobs():
+    from app.routes.clients import collect_document_blobs
+
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    try:
+        result = collect_document_blobs(cursor, db)
+    finally:
+        cursor.close()
+        db.close()
+    print(f"[document-blobs] limpeza concluida: {result}")
+    return 0
+
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else "upgrade"
+    if command == "status":
+        print_status()
+        return 0
+    if command == "explain":
+        return check_explain()
+    if command == "repair-client-summary":
+        return repair_client_summary()
+    if command == "reconcile-notification-counters":
+        return reconcile_notification_counters()
+    if command == "archive-notifications":
+        return archive_notifications()
+    if command == "canonicalize-values":
+        return canonicalize_values()
+    if command == "move-document-blobs":
+        return move_document_blobs()
+    if command == "sync-legacy-documents":
+        return sync_legacy_documents()
+    if command == "gc-document-blobs":
+        return gc_document_blobs()
+    if command != "upgrade":
+        print("Uso: python -m app.migrations [upgrade|status|explain|repair-client-summary|reconcile-notification-counters|archive-notifications|canonicalize-values|move-document-blobs|sync-legacy-documents|gc-document-blobs]")
+        return 2
+
+    applied = run_migrations()
+    if not applied:
+        print("[migrations] schema ja esta na versao mais recente")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,335 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from flask_jwt_extended import create_access_token, verify_jwt_in_request
+
+from app.routes.clients import (
+    ROLE_ADMIN,
+    ROLE_DIGITADOR_PORT_REFIN,
+    ROLE_GLOBAL,
+    ROLE_VENDOR,
+    apply_company_scope,
+    apply_pipeline_owner_scope,
+    build_active_pipeline_conditions,
+    build_approved_period_conditions,
+    build_client_search_conditions,
+    build_created_period_conditions,
+    build_dashboard_notifications_scope,
+    build_dashboard_scope,
+    build_operations_stats_period,
+    build_pipeline_scope,
+    build_sales_board_scope,
+    combine_conditions,
+    parse_dashboard_period,
+)
+
+# The hot queries of the pipeline (full and delta), dashboard summary, stats,
+# sales board, dashboard notifications and the /search/global typeahead, with
+# their WHERE
+# clauses taken from the same builders the routes use, once per role path.
+# `python -m app.migrations explain` runs EXPLAIN on each one against a seeded
+# database and exits non-zero when operacoes or clientes is read with a full
+# (table or index) scan, or through an index other than the ones listed for
+# that query. The operacoes key lists are the indexes kept by migration 0019;
+# keep them in sync with it and with 0004/0005.
+
+HOT_QUERY_USER_ID = 1
+
+OPERACOES_COMPANY_KEYS = (
+    "idx_operacoes_empresa_status_efetiva",
+    "idx_operacoes_empresa_criado",
+    "idx_operacoes_empresa_produto_status",
+)
+OPERACOES_STATUS_KEYS = ("idx_operacoes_status_efetiva",)
+OPERACOES_CLIENT_KEYS = ("idx_operacoes_cliente_criado",)
+OPERACOES_DELTA_KEYS = ("idx_operacoes_updated",)
+CLIENTES_VENDOR_KEYS = (
+    "PRIMARY",
+    "idx_clientes_vendedor",
+    "idx_clientes_empresa_vendedor_criado",
+)
+CLIENTES_SEARCH_DIGITS_KEYS = (
+    "idx_clientes_cpf_digits",
+    "idx_clientes_beneficio_digits",
+    "idx_clientes_empresa_cpf_digits",
+    "idx_clientes_empresa_beneficio_digits",
+)
+
+FULL_SCAN_TYPES = {"ALL", "INDEX"}
+
+OPERATIONS_JOIN_SQL = "FROM operacoes o JOIN clientes c ON c.id = o.cliente_id"
+
+
+@contextmanager
+def hot_query_identity(app, role, company_id, user_id=HOT_QUERY_USER_ID):
+    # The builders read the caller's company and digitador scope from the JWT,
+    # so each role path is built inside a request carrying a matching token.
+    with app.app_context():
+        token = create_access_token(
+            identity=str(user_id),
+            additional_claims={
+                "role": role,
+                "empresa_id": company_id,
+                "digitador_full_scope": False,
+            },
+        )
+    with app.test_request_context(headers={"Authorization": f"Bearer {token}"}):
+        verify_jwt_in_request()
+        yield
+
+
+def hot_query(name, sql, where, params, keys, tail=""):
+    # keys maps the table alias to the indexes it may be read through; an
+    # empty tuple accepts any index as long as it is not a full scan.
+    return {
+        "name": name,
+        "sql": f"{sql} WHERE {where} {tail}".rstrip(),
+        "params": tuple(params),
+        "keys": keys,
+    }
+
+
+def pipeline_queries(app, company_id):
+    role_keys = (
+        (ROLE_ADMIN, {"o": OPERACOES_COMPANY_KEYS, "c": ("PRIMARY",)}),
+        (
+            ROLE_VENDOR,
+            {"o": OPERACOES_COMPANY_KEYS + OPERACOES_CLIENT_KEYS, "c": CLIENTES_VENDOR_KEYS},
+        ),
+        (ROLE_DIGITADOR_PORT_REFIN, {"o": OPERACOES_COMPANY_KEYS, "c": ("PRIMARY",)}),
+        (ROLE_GLOBAL, {"o": OPERACOES_STATUS_KEYS, "c": ("PRIMARY",)}),
+    )
+    queries = []
+    for role, keys in role_keys:
+        with hot_query_identity(app, role, company_id):
+            conditions, params = build_pipeline_scope(role, HOT_QUERY_USER_ID)
+        queries.append(
+            hot_query(
+                f"pipeline_{role.lower()}",
+                f"SELECT o.id {OPERATIONS_JOIN_SQL}",
+                " AND ".join(conditions),
+                params,
+                keys,
+                tail="ORDER BY o.criado_em DESC",
+            )
+        )
+    return queries
+
+
+def pipeline_delta_queries(app, company_id, since):
+    # The changed-rows read of fetch_pipeline_delta: a short updated_at range,
+    # narrowed to the caller's company/product/seller afterwards.
+    role_keys = (
+        (ROLE_ADMIN, {"o": OPERACOES_DELTA_KEYS, "c": ("PRIMARY",)}),
+        (
+            ROLE_VENDOR,
+            {"o": OPERACOES_DELTA_KEYS + OPERACOES_CLIENT_KEYS, "c": CLIENTES_VENDOR_KEYS},
+        ),
+        (ROLE_GLOBAL, {"o": OPERACOES_DELTA_KEYS, "c": ("PRIMARY",)}),
+    )
+    queries = []
+    for role, keys in role_keys:
+        conditions, params = ["o.updated_at > %s"], [since]
+        with hot_query_identity(app, role, company_id):
+            apply_pipeline_owner_scope(role, HOT_QUERY_USER_ID, conditions, params)
+        queries.append(
+            hot_query(
+                f"pipeline_delta_{role.lower()}",
+                f"SELECT o.id {OPERATIONS_JOIN_SQL}",
+                " AND ".join(conditions),
+                params,
+                keys,
+            )
+        )
+    return queries
+
+
+def dashboard_queries(app, company_id, period_start, period_end):
+    role_paths = (
+        (ROLE_ADMIN, None, {"o": OPERACOES_COMPANY_KEYS, "c": ("PRIMARY",)}),
+        (
+            ROLE_VENDOR,
+            HOT_QUERY_USER_ID,
+            {"o": OPERACOES_COMPANY_KEYS + OPERACOES_CLIENT_KEYS, "c": CLIENTES_VENDOR_KEYS},
+        ),
+        (ROLE_DIGITADOR_PORT_REFIN, None, {"o": OPERACOES_COMPANY_KEYS, "c": ("PRIMARY",)}),
+    )
+    year_start = datetime(period_start.year, 1, 1)
+    year_end = datetime(period_start.year + 1, 1, 1)
+    queries = []
+    for role, vendor_id, keys in role_paths:
+        with hot_query_identity(app, role, company_id):
+            scope = build_dashboard_scope(role, company_id, vendor_id)
+            notifications_scope = build_dashboard_notifications_scope(role, vendor_id)
+        for name, base in (
+            ("generated", build_created_period_conditions(period_start, period_end)),
+            ("approved", build_approved_period_conditions(period_start, period_end)),
+            ("pipeline", build_active_pipeline_conditions()),
+            ("series", build_approved_period_conditions(year_start, year_end)),
+        ):
+            where, params = combine_conditions(base, scope)
+            queries.append(
+                hot_query(
+                    f"dashboard_{name}_{role.lower()}",
+                    f"SELECT COUNT(*) {OPERATIONS_JOIN_SQL}",
+                    where,
+                    params,
+                    keys,
+                )
+            )
+        where, params = combine_conditions(notifications_scope)
+        queries.append(
+            hot_query(
+                f"dashboard_notifications_{role.lower()}",
+                f"SELECT COUNT(*) {OPERATIONS_JOIN_SQL}",
+                where,
+                params,
+                keys,
+            )
+        )
+    return queries
+
+
+def stats_queries(app, company_id, today):
+    role_keys = (
+        (ROLE_ADMIN, {"o": ("idx_operacoes_empresa_criado",)}),
+        (ROLE_GLOBAL, {"o": ("idx_operacoes_criado",)}),
+    )
+    queries = []
+    for role, keys in role_keys:
+        with hot_query_identity(app, role, company_id):
+            where, params = combine_conditions(
+                build_created_period_conditions(*build_operations_stats_period("month", today)),
+                build_dashboard_scope(role, company_id),
+            )
+        queries.append(
+            hot_query(f"stats_{role.lower()}", "SELECT COUNT(*) FROM operacoes o", where, params, keys)
+        )
+    return queries
+
+
+def sales_board_queries(company_id, period_start, period_end):
+    year_start = datetime(period_start.year, 1, 1)
+    year_end = datetime(period_start.year + 1, 1, 1)
+    queries = []
+    # 0 is GLOBAL looking at every company.
+    for selected_company_id, keys in (
+        (company_id, {"o": ("idx_operacoes_empresa_status_efetiva",), "c": ("PRIMARY",)}),
+        (0, {"o": ("idx_operacoes_status_efetiva",), "c": ("PRIMARY",)}),
+    ):
+        suffix = "empresa" if selected_company_id else "todas"
+        company_scope = build_sales_board_scope(selected_company_id)
+        where, params = combine_conditions(
+            build_approved_period_conditions(year_start, year_end),
+            company_scope,
+        )
+        queries.append(
+            hot_query(
+                f"sales_board_approved_{suffix}",
+                f"SELECT c.vendedor_id, MONTH(o.data_efetiva), COUNT(*) {OPERATIONS_JOIN_SQL}",
+                where,
+                params,
+                keys,
+                tail="GROUP BY c.vendedor_id, MONTH(o.data_efetiva)",
+            )
+        )
+        where, params = combine_conditions(
+            build_approved_period_conditions(period_start, period_end),
+            company_scope,
+        )
+        queries.append(
+            hot_query(
+                f"sales_board_total_{suffix}",
+                "SELECT COUNT(*) FROM operacoes o",
+                where,
+                params,
+                {"o": keys["o"]},
+            )
+        )
+    return queries
+
+
+def search_queries(app, company_id):
+    queries = []
+    for name, query, keys in (
+        ("search_digits", "123", {"c": CLIENTES_SEARCH_DIGITS_KEYS}),
+        ("search_name", "maria", {"c": ("ft_clientes_nome_busca",)}),
+    ):
+        conditions, params = build_client_search_conditions(query)
+        with hot_query_identity(app, ROLE_ADMIN, company_id):
+            apply_company_scope(ROLE_ADMIN, conditions, params, "c.empresa_id")
+        queries.append(
+            hot_query(
+                name,
+                "SELECT c.id FROM clientes c",
+                " AND ".join(conditions),
+                params,
+                keys,
+                tail="ORDER BY c.nome ASC LIMIT 8",
+            )
+        )
+    return queries
+
+
+def build_hot_queries(company_id, today, app=None):
+    if app is None:
+        from app.main import create_app
+
+        app = create_app()
+
+    period_start, period_end, _ = parse_dashboard_period(today.month, today.year)
+    return (
+        pipeline_queries(app, company_id)
+        + pipeline_delta_queries(app, company_id, today - timedelta(minutes=5))
+        + dashboard_queries(app, company_id, period_start, period_end)
+        + stats_queries(app, company_id, today)
+        + sales_board_queries(company_id, period_start, period_end)
+        + search_queries(app, company_id)
+    )
+
+
+def plan_problems(plan, keys):
+    problems = []
+    seen_aliases = set()
+    for row in plan:
+        alias = row.get("table")
+        if alias not in keys:
+            continue
+        seen_aliases.add(alias)
+        access_type = str(row.get("type") or "").upper()
+        key = str(row.get("key") or "")
+        if access_type in FULL_SCAN_TYPES or not key:
+            problems.append(f"{alias}: leitura completa ({access_type or '-'})")
+            continue
+        # index_merge lists every index it reads, separated by commas.
+        unexpected = [name for name in key.split(",") if keys[alias] and name not in keys[alias]]
+        if unexpected:
+            problems.append(f"{alias}: indice inesperado {','.join(unexpected)}")
+
+    for alias in keys:
+        if alias not in seen_aliases:
+            problems.append(f"{alias}: fora do plano (banco sem dados?)")
+    return problems
+
+
+def explain_hot_queries(cursor, company_id=None, app=None):
+    if company_id is None:
+        cursor.execute("SELECT MIN(id) AS id FROM empresas")
+        company_id = int((cursor.fetchone() or {}).get("id") or 1)
+
+    results = []
+    for query in build_hot_queries(company_id, datetime.now(), app=app):
+        cursor.execute(f"EXPLAIN {query['sql']}", query["params"])
+        plan = cursor.fetchall()
+        results.append(
+            {
+                "name": query["name"],
+                "problems": plan_problems(plan, query["keys"]),
+                "access": [
+                    {"table": row.get("table"), "type": row.get("type"), "key": row.get("key")}
+                    for row in plan
+                    if row.get("table") in query["keys"]
+                ],
+            }
+        )
+    return results
@@ -1,36 +1,97 @@
 ﻿import base64
+import hashlib
 import json
 import mimetypes
 import mysql.connector
 import os
 import re
+import threading
+import time
 import unicodedata
 import uuid
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from io import BytesIO
-
-from flask import Blueprint, request, jsonify, send_file, current_app
+from urllib.parse import quote
+
+from flask import (
+    Blueprint,
+    request,
+    jsonify,
+    make_response,
+    send_file,
+    current_app,
+    stream_with_context,
+)
 from flask_jwt_extended import jwt_required
-from app.database import get_db
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.wsgi import wrap_file
+from app.config.settings import (
+    DOCUMENT_ACCEL_REDIRECT_PREFIX,
+    DOCUMENT_BLOB_GC_GRACE_SECONDS,
+    DOCUMENT_BLOB_MIGRATION_BATCH_SIZE,
+)
+from app.database import PoolExhaustedError, get_db, release_request_db
+from app.services.document_storage import (
+    BlobNotFoundError,
+    BlobTooLargeError,
+    collect_unreferenced_blobs,
+    get_document_store,
+)
+from app.services.file_service import (
+    MAX_FILE_SIZE_MB,
+    MAX_REQUEST_SIZE_MB,
+    sniff_file_type,
+    stream_uploads_to,
+)
 from app.utils.company import (
     current_user_company_id,
     ensure_company_operations_lock_columns,
     ensure_company_scope_columns,
     ensure_once,
     get_company_operations_lock,
+    table_columns,
 )
 from app.utils.auth import (
+    ACCESS_BATCH_SIZE,
     current_user_id,
     current_user_role,
     current_user_digitador_full_scope,
     is_admin,
-    can_access_client
+    can_access_client,
+    normalize_id_list,
+)
+from app.utils.notification_bus import (
+    NOTIFICATIONS_STREAM_HEARTBEAT_SECONDS,
+    NOTIFICATIONS_STREAM_MAX_SECONDS,
+    NOTIFICATIONS_STREAM_RECHECK_SECONDS,
+    acquire_notification_stream_slot,
+    notification_bus,
+    queue_notification_event,
+    release_notification_stream_slot,
+)
+from app.utils.notification_counters import (
+    adjust_unread_notification_counters,
+    read_unread_notification_count,
+    release_unread_notifications,
+)
+from app.utils.notification_outbox import (
+    enqueue_notification_event,
+    register_notification_handler,
+)
+from app.utils.recipient_directory import get_recipient_directory
+from app.utils.search_index import (
+    client_search_index_enabled,
+    get_client_search_index,
+    index_client,
+    normalize_search_name,
+    unindex_client,
 )
 from app.utils.security import (
     add_to_trash,
     ensure_audit_logs_table,
     ensure_trash_bin_table,
     get_twofa_code_from_request,
+    json_dumps,
     log_audit,
     row_to_insert_dict,
     verify_user_twofa,
@@ -151,6 +212,53 @@ def normalize_text(value):
     return str(value or "").strip()
 
 
+CLIENT_SEARCH_COLUMN_LENGTHS = {
+    "cpf_digits": 14,
+    "beneficio_digits": 30,
+    "nome_busca": 255,
+}
+FULLTEXT_OPERATOR_CHARS = set('+-<>()~*"@')
+
+
+def build_client_search_values(nome, cpf, numero_beneficio):
+    # Denormalized copies of nome/cpf/numero_beneficio that /search/global can
+    # hit through indexes; they are rewritten on every client insert/update.
+    return {
+        "cpf_digits": only_digits(cpf)[: CLIENT_SEARCH_COLUMN_LENGTHS["cpf_digits"]] or None,
+        "beneficio_digits": (
+            only_digits(numero_beneficio)[: CLIENT_SEARCH_COLUMN_LENGTHS["beneficio_digits"]] or None
+        ),
+        "nome_busca": normalize_search_name(nome)[: CLIENT_SEARCH_COLUMN_LENGTHS["nome_busca"]] or None,
+    }
+
+
+def fill_client_search_values(client):
+    client.update(
+        build_client_search_values(
+            client.get("nome"),
+            client.get("cpf"),
+            client.get("numero_beneficio"),
+        )
+    )
+    return client
+
+
+def is_digit_search_query(query):
+    text = str(query or "")
+    return bool(only_digits(text)) and all(char.isdigit() or char in " .-/" for char in text)
+
+
+def build_name_fulltext_query(query):
+    # Every word is required and quoted so the ngram parser matches it as a
+    # phrase (i.e. as a substring of the folded name).
+    words = []
+    for word in normalize_search_name(query).split(" "):
+        word = "".join(char for char in word if char not in FULLTEXT_OPERATOR_CHARS)
+        if len(word) >= 2:
+            words.append(f'+"{word}"')
+    return " ".join(words)
+
+
 def normalize_date_field(value):
     if value is None:
         return ""
@@ -416,11 +524,25 @@ def list_client_documents_metadata_from_db(cursor, client_id):
     return documents
 
 
-def sync_storage_documents_to_db(cursor, client_id, seller_id=None):
-    client_id = int(client_id)
-    if seller_id is None:
-        seller_id = resolve_client_seller_id(cursor, client_id)
+LEGACY_DOCUMENT_INSERT_SQL = """
+    INSERT INTO documentos (
+        client_id,
+        seller_id,
+        document_type,
+        file_name,
+        original_name,
+        content_type,
+        file_size,
+        blob_key,
+        upload_date
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
 
+
+def list_new_legacy_document_files(cursor, client_id):
+    # (file_name, path) of the files in the client's legacy folders that have
+    # no documentos row yet.
     cursor.execute(
         """
         SELECT file_name
@@ -433,7 +555,7 @@ def sync_storage_documents_to_db(cursor, client_id, seller_id=None):
         normalize_document_filename(row.get("file_name")) for row in cursor.fetchall()
     }
 
-    inserted = 0
+    files = []
     for client_folder in iter_client_storage_folders(client_id):
         if not os.path.isdir(client_folder):
             continue
@@ -447,44 +569,44 @@ def sync_storage_documents_to_db(cursor, client_id, seller_id=None):
             if not os.path.isfile(file_path):
                 continue
 
-            with open(file_path, "rb") as storage_file:
-                file_bytes = storage_file.read()
+            existing_files.add(safe_filename)
+            files.append((safe_filename, file_path))
 
-            stat_result = os.stat(file_path)
-            content_type = mimetypes.guess_type(safe_filename)[0] or "application/octet-stream"
-            upload_date = datetime.fromtimestamp(stat_result.st_ctime).strftime(
-                "%Y-%m-%d %H:%M:%S"
-            )
+    return files
 
-            cursor.execute(
-                """
-                INSERT INTO documentos (
-                    client_id,
-                    seller_id,
-                    document_type,
-                    file_name,
-                    original_name,
-                    content_type,
-                    file_size,
-                    file_data,
-                    upload_date
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """,
-                (
-                    client_id,
-                    seller_id,
-                    infer_document_type(filename=safe_filename),
-                    safe_filename,
-                    safe_filename,
-                    content_type,
-                    len(file_bytes),
-                    file_bytes,
-                    upload_date,
-                ),
-            )
-            existing_files.add(safe_filename)
-            inserted += 1
+
+def legacy_document_insert_params(client_id, seller_id, safe_filename, file_path, blob_key, file_size):
+    upload_date = datetime.fromtimestamp(os.stat(file_path).st_ctime).strftime(
+        "%Y-%m-%d %H:%M:%S"
+    )
+    return (
+        client_id,
+        seller_id,
+        infer_document_type(filename=safe_filename),
+        safe_filename,
+        safe_filename,
+        mimetypes.guess_type(safe_filename)[0] or "application/octet-stream",
+        file_size,
+        blob_key,
+        upload_date,
+    )
+
+
+def sync_storage_documents_to_db(cursor, client_id, seller_id=None):
+    client_id = int(client_id)
+    if seller_id is None:
+        seller_id = resolve_client_seller_id(cursor, client_id)
+
+    inserted = 0
+    for safe_filename, file_path in list_new_legacy_document_files(cursor, client_id):
+        blob_key, file_size = get_document_store().put_file(file_path)
+        cursor.execute(
+            LEGACY_DOCUMENT_INSERT_SQL,
+            legacy_document_insert_params(
+                client_id, seller_id, safe_filename, file_path, blob_key, file_size
+            ),
+        )
+        inserted += 1
 
     return inserted
 
@@ -513,30 +635,118 @@ def iter_storage_client_ids():
             yield client_id
 
 
-def migrate_all_storage_documents_to_db(cursor):
-    migrated_files = 0
-    migrated_clients = 0
-    scanned_clients = 0
-    skipped_missing_clients = []
+# Legacy storage/clients/<id> folders are no longer written to; their files
+# only need to be copied into documentos once. document_legacy_sync marks the
+# clients already copied and the LEGACY_DOCUMENTS_MIGRATED_KEY setting marks
+# the whole migration as done, after which document reads never touch the
+# filesystem. Both markers only ever go from unset to set, so a worker caches
+# them for good once it has seen them.
+LEGACY_DOCUMENTS_MIGRATED_KEY = "legacy_documents_migrated"
+LEGACY_DOCUMENTS_CHECK_SECONDS = 60
 
-    for client_id in iter_storage_client_ids():
-        scanned_clients += 1
-        seller_id = resolve_client_seller_id(cursor, client_id)
-        if seller_id is None:
-            skipped_missing_clients.append(client_id)
-            continue
+_legacy_documents_state = {"migrated": False, "checked_at": 0.0, "clients": set()}
+_legacy_documents_lock = threading.Lock()
 
-        inserted = sync_storage_documents_to_db(cursor, client_id, seller_id=seller_id)
-        migrated_files += inserted
-        if inserted > 0:
-            migrated_clients += 1
 
-    return {
-        "scanned_clients": scanned_clients,
-        "migrated_clients": migrated_clients,
-        "migrated_files": migrated_files,
-        "missing_clients": skipped_missing_clients,
-    }
+def legacy_documents_migrated(cursor):
+    now = time.monotonic()
+    with _legacy_documents_lock:
+        if _legacy_documents_state["migrated"]:
+            return True
+        if now - _legacy_documents_state["checked_at"] < LEGACY_DOCUMENTS_CHECK_SECONDS:
+            return False
+
+    cursor.execute(
+        """
+        SELECT setting_value
+        FROM system_settings
+        WHERE setting_key = %s
+        LIMIT 1
+        """,
+        (LEGACY_DOCUMENTS_MIGRATED_KEY,),
+    )
+    row = cursor.fetchone() or {}
+    migrated = str(row.get("setting_value") or "") == "1"
+
+    with _legacy_documents_lock:
+        _legacy_documents_state["migrated"] = _legacy_documents_state["migrated"] or migrated
+        _legacy_documents_state["checked_at"] = now
+    return migrated
+
+
+def mark_legacy_documents_migrated(cursor, updated_by=None):
+    cursor.execute(
+        """
+        INSERT INTO system_settings (
+            setting_key,
+            setting_value,
+            updated_by
+        )
+        VALUES (%s, '1', %s)
+        ON DUPLICATE KEY UPDATE
+            setting_value = '1',
+            updated_by = VALUES(updated_by),
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        (LEGACY_DOCUMENTS_MIGRATED_KEY, updated_by),
+    )
+
+
+def sync_legacy_documents_once(cursor, client_id, seller_id=None):
+    """
+    Copies the client's legacy folder into documentos unless that already
+    happened. Returns True when it wrote something the caller must commit.
+    """
+    client_id = int(client_id)
+    if legacy_documents_migrated(cursor):
+        return False
+    with _legacy_documents_lock:
+        if client_id in _legacy_documents_state["clients"]:
+            return False
+
+    # A plain read first: an existing marker takes no lock, so this request
+    # never waits on the migration job. A row with job_id set is a folder the
+    # job is copying right now; it is left to the job and looked at again on
+    # the next read.
+    row = fetch_legacy_sync_row(cursor, client_id)
+    if row is not None:
+        if row.get("job_id") is None:
+            with _legacy_documents_lock:
+                _legacy_documents_state["clients"].add(client_id)
+        return False
+
+    # The marker row is inserted before copying: a concurrent first read
+    # blocks on it until this transaction commits and then sees rowcount 0,
+    # so the folder is copied by one request only.
+    cursor.execute(
+        "INSERT IGNORE INTO document_legacy_sync (client_id) VALUES (%s)",
+        (client_id,),
+    )
+    if cursor.rowcount == 0:
+        return False
+
+    sync_storage_documents_to_db(cursor, client_id, seller_id=seller_id)
+    return True
+
+
+def fetch_legacy_sync_row(cursor, client_id):
+    cursor.execute(
+        "SELECT client_id, job_id FROM document_legacy_sync WHERE client_id = %s",
+        (client_id,),
+    )
+    return cursor.fetchone()
+
+
+def legacy_documents_synced(cursor, client_id):
+    client_id = int(client_id)
+    if legacy_documents_migrated(cursor):
+        return True
+    with _legacy_documents_lock:
+        if client_id in _legacy_documents_state["clients"]:
+            return True
+
+    row = fetch_legacy_sync_row(cursor, client_id)
+    return row is not None and row.get("job_id") is None
 
 
 def list_client_documents_metadata(client_id):
@@ -544,7 +754,7 @@ def list_client_documents_metadata(client_id):
     cursor = db.cursor(dictionary=True)
     try:
         ensure_documents_table(cursor, db)
-        if sync_storage_documents_to_db(cursor, client_id) > 0:
+        if sync_legacy_documents_once(cursor, client_id):
             db.commit()
         return list_client_documents_metadata_from_db(cursor, client_id)
     finally:
@@ -559,7 +769,17 @@ def get_client_document_record(cursor, client_id, filename):
 
     cursor.execute(
         """
-        SELECT *
+        SELECT
+            id,
+            client_id,
+            document_type,
+            file_name,
+            original_name,
+            content_type,
+            file_size,
+            blob_key,
+            file_data IS NOT NULL AS has_file_data,
+            upload_date
         FROM documentos
         WHERE client_id = %s
           AND file_name = %s
@@ -571,6 +791,126 @@ def get_client_document_record(cursor, client_id, filename):
     return cursor.fetchone(), safe_filename
 
 
+def open_document_content(cursor, document):
+    # Returns (binary file object, size in bytes) for the document row, or
+    # (None, None). Rows that move-document-blobs has not reached yet still
+    # carry file_data; the re-read by id also covers a row moved after the
+    # metadata was selected.
+    store = get_document_store()
+    blob_key = document.get("blob_key")
+    if not blob_key:
+        if not document.get("has_file_data"):
+            return None, None
+        cursor.execute(
+            "SELECT blob_key, file_data FROM documentos WHERE id = %s",
+            (document.get("id"),),
+        )
+        row = cursor.fetchone() or {}
+        blob_key = row.get("blob_key")
+        if not blob_key:
+            file_data = row.get("file_data")
+            if file_data is None:
+                return None, None
+            return BytesIO(file_data), len(file_data)
+
+    try:
+        return store.open(blob_key), store.size(blob_key)
+    except BlobNotFoundError:
+        return None, None
+
+
+def document_content_disposition(download_name):
+    try:
+        download_name.encode("ascii")
+        return f'attachment; filename="{download_name}"'
+    except UnicodeEncodeError:
+        fallback = unicodedata.normalize("NFKD", download_name).encode("ascii", "ignore").decode("ascii")
+        return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(download_name, safe='')}"
+
+
+def send_document_response(cursor, document, safe_filename):
+    # Streams the document without loading it into the worker: send_file with
+    # a path goes through wsgi.file_wrapper (sendfile under gunicorn), answers
+    # Range with 206 and revalidates If-None-Match against the strong ETag,
+    # which is the blob's SHA-256. Returns None when the content is missing.
+    download_name = document.get("original_name") or safe_filename
+    mimetype = document.get("content_type") or "application/octet-stream"
+    blob_key = document.get("blob_key")
+    store = get_document_store()
+    local_path = store.local_path(blob_key) if blob_key else None
+
+    if local_path:
+        if not os.path.isfile(local_path):
+            return None
+
+        if DOCUMENT_ACCEL_REDIRECT_PREFIX:
+            # nginx (location marked internal, aliased to the blob root)
+            # serves the bytes and the ranges; the worker only authorizes.
+            if request.if_none_match.contains(blob_key):
+                response = make_response("", 304)
+            else:
+                relative_path = os.path.relpath(local_path, store.root).replace(os.sep, "/")
+                response = make_response("")
+                response.headers["X-Accel-Redirect"] = (
+                    f"{DOCUMENT_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{relative_path}"
+                )
+                response.headers["Content-Type"] = mimetype
+                response.headers["Content-Disposition"] = document_content_disposition(download_name)
+            response.set_etag(blob_key)
+        else:
+            response = send_file(
+                local_path,
+                as_attachment=True,
+                download_name=download_name,
+                mimetype=mimetype,
+                conditional=True,
+                etag=blob_key,
+            )
+    else:
+        content, size = open_document_content(cursor, document)
+        if content is None:
+            return None
+        # Remote stores and rows still holding file_data. send_file only knows
+        # the size of a BytesIO, so the response is built here with the size
+        # from the store: Content-Length, 206 for Range and 304 all work the
+        # same as the local_path branch, and the body is read in chunks.
+        response = current_app.response_class(
+            wrap_file(request.environ, content),
+            mimetype=mimetype,
+            direct_passthrough=True,
+        )
+        response.content_length = size
+        response.headers["Content-Disposition"] = document_content_disposition(download_name)
+        if blob_key:
+            response.set_etag(blob_key)
+        response.make_conditional(request, accept_ranges=True, complete_length=size)
+
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def document_trash_columns(cursor):
+    return [column for column in table_columns(cursor, "documentos") if column != "file_data"]
+
+
+def select_client_documents_for_trash(cursor, db, client_id):
+    # Inline file_data is moved to the blob store first (inside the caller's
+    # transaction) so the trash payload only carries blob keys, never bytes.
+    move_inline_document_blobs(cursor, db, client_id=client_id, commit=False)
+    columns_sql = ", ".join(document_trash_columns(cursor))
+    cursor.execute(
+        f"""
+        SELECT {columns_sql}
+        FROM documentos
+        WHERE client_id = %s
+        ORDER BY id ASC
+        """,
+        (client_id,),
+    )
+    return cursor.fetchall()
+
+
 def serialize_document_row_for_trash(row):
     payload = row_to_insert_dict(row)
     file_data = payload.get("file_data")
@@ -583,14 +923,135 @@ def serialize_document_row_for_trash(row):
 def deserialize_document_row_from_trash(row):
     payload = dict(row or {})
     if payload.get("file_data_encoding") == DOCUMENT_BINARY_ENCODING:
+        # Trash entries written before the blob store embed the bytes.
         encoded_data = str(payload.get("file_data") or "").strip()
-        payload["file_data"] = (
-            base64.b64decode(encoded_data.encode("ascii")) if encoded_data else None
-        )
+        if encoded_data:
+            blob_key, file_size = get_document_store().put_bytes(
+                base64.b64decode(encoded_data.encode("ascii"))
+            )
+            payload["blob_key"] = blob_key
+            payload["file_size"] = file_size
+    payload.pop("file_data", None)
     payload.pop("file_data_encoding", None)
     return payload
 
 
+def move_inline_document_blobs(
+    cursor,
+    db,
+    client_id=None,
+    batch_size=DOCUMENT_BLOB_MIGRATION_BATCH_SIZE,
+    commit=True,
+    log=None,
+):
+    # Copies documentos.file_data into the blob store and clears it, one row
+    # at a time in id order. Safe to stop and rerun: finished rows have a
+    # blob_key and drop out of the WHERE, and the UPDATE only wins if no one
+    # else moved the row meanwhile.
+    store = get_document_store()
+    scope_sql = "AND client_id = %s" if client_id is not None else ""
+    scope_params = (int(client_id),) if client_id is not None else ()
+
+    last_id = 0
+    moved = 0
+    while True:
+        cursor.execute(
+            f"""
+            SELECT id
+            FROM documentos
+            WHERE id > %s
+              AND blob_key IS NULL
+              AND file_data IS NOT NULL
+              {scope_sql}
+            ORDER BY id ASC
+            LIMIT %s
+            """,
+            (last_id, *scope_params, max(1, int(batch_size))),
+        )
+        document_ids = [to_int(row.get("id")) for row in cursor.fetchall()]
+        if not document_ids:
+            break
+
+        for document_id in document_ids:
+            cursor.execute(
+                "SELECT file_data FROM documentos WHERE id = %s AND blob_key IS NULL",
+                (document_id,),
+            )
+            row = cursor.fetchone() or {}
+            if row.get("file_data") is None:
+                continue
+
+            blob_key, file_size = store.put_bytes(row.get("file_data"))
+            cursor.execute(
+                """
+                UPDATE documentos
+                SET blob_key = %s,
+                    file_size = %s,
+                    file_data = NULL
+                WHERE id = %s
+                  AND blob_key IS NULL
+                """,
+                (blob_key, file_size, document_id),
+            )
+            moved += max(cursor.rowcount, 0)
+
+        if commit:
+            db.commit()
+        last_id = document_ids[-1]
+        if log:
+            log(f"[document-blobs] {moved} documentos movidos (ate id {last_id})")
+
+    return {"moved": moved, "last_id": last_id}
+
+
+def collect_document_blobs(cursor, db, grace_seconds=DOCUMENT_BLOB_GC_GRACE_SECONDS):
+    # Deleting a document or a client only drops rows; the blob stays while a
+    # row or a pending CLIENTE trash entry still names it, and is removed here.
+    cursor.execute("SELECT DISTINCT blob_key FROM documentos WHERE blob_key IS NOT NULL")
+    referenced = {row.get("blob_key") for row in cursor.fetchall()}
+
+    cursor.execute(
+        """
+        SELECT payload
+        FROM trash_bin
+        WHERE entity_type = 'CLIENTE'
+          AND restored_at IS NULL
+        """
+    )
+    for row in cursor.fetchall():
+        try:
+            payload = json.loads(row.get("payload") or "{}")
+        except ValueError:
+            continue
+        for document in payload.get("documents") or []:
+            if isinstance(document, dict) and document.get("blob_key"):
+                referenced.add(document.get("blob_key"))
+
+    db.commit()
+
+    def still_referenced(blob_key):
+        # Locking read: sees rows committed after the snapshot above and waits
+        # for an INSERT of this key that is still in flight. New trash entries
+        # only take keys that were already in documentos, so they need no
+        # second look.
+        cursor.execute(
+            "SELECT 1 FROM documentos WHERE blob_key = %s LIMIT 1 LOCK IN SHARE MODE",
+            (blob_key,),
+        )
+        found = cursor.fetchone() is not None
+        db.commit()
+        return found
+
+    result = collect_unreferenced_blobs(
+        get_document_store(),
+        referenced,
+        grace_seconds,
+        still_referenced=still_referenced,
+    )
+    result["referenced"] = len(referenced)
+    return result
+
+
 def find_client_document_file(client_id, filename):
     safe_filename = normalize_document_filename(filename)
     if not safe_filename:
@@ -651,27 +1112,16 @@ PIPELINE_ACTIVE_STATUSES = (
     "DEVOLVIDA_VENDEDOR",
 )
 
-PIPELINE_ACTIVE_STATUSES_WITH_LEGACY = PIPELINE_ACTIVE_STATUSES + (
-    "PENDENTE",
-    "ENVIADA_ESTEIRA",
-    "FORMALIZADA",
-    "EM_ANALISE_BANCO",
-    "PENDENTE_BANCO",
-    "EM_TRATATIVA_VENDEDOR",
-    "REENVIADA_BANCO",
-    "EM_ANALISE",
-    "DEVOLVIDA",
-)
-
-PIPELINE_READY_VISIBLE_STATUSES_WITH_LEGACY = (
+PIPELINE_READY_VISIBLE_STATUSES = (
     "PRONTA_DIGITAR",
     "EM_DIGITACAO",
-    "PENDENTE",
-    "ENVIADA_ESTEIRA",
 )
 
 VALID_PIPELINE_STATUS_UPDATES = set(PIPELINE_ACTIVE_STATUSES) | FINAL_OPERATION_STATUSES
 
+# Only read by normalize_operation_status() and the one-time rewrite in
+# migration 0012: operacoes.status is stored canonical since then, so queries
+# compare it with plain equality.
 LEGACY_STATUS_MAP = {
     "PENDENTE": "PRONTA_DIGITAR",
     "ENVIADA_ESTEIRA": "PRONTA_DIGITAR",
@@ -771,12 +1221,24 @@ def build_operation_update(data, allowed_fields):
 
     for field in allowed_fields:
         if field in data:
+            value = data.get(field)
+            canonicalize = OPERATION_CANONICAL_FIELDS.get(field)
+            if canonicalize is not None and isinstance(value, str):
+                value = canonicalize(value)
             updates.append(f"{field}=%s")
-            params.append(data.get(field))
+            params.append(value)
 
     return updates, params
 
 
+def canonicalize_operation_row(row):
+    clean = dict(row or {})
+    for field, canonicalize in OPERATION_CANONICAL_FIELDS.items():
+        if isinstance(clean.get(field), str):
+            clean[field] = canonicalize(clean[field])
+    return clean
+
+
 def normalize_portability_form(payload):
     if payload is None:
         return None
@@ -939,6 +1401,69 @@ def role_can_access_operation(role, user_id, operation):
     return normalize_product_name(operation.get("produto")) in products
 
 
+def filter_accessible_operations(operation_ids, role=None, user_id=None):
+    # Batch form of role_can_access_operation over operation ids: one query
+    # per chunk of ids, returning the ids the caller may access. Each
+    # condition below is the SQL twin of a branch there, evaluated on the
+    # same operacoes LEFT JOIN clientes row (an operation without a client
+    # row is still judged by its own columns). produto is stored canonical
+    # (migration 0012), so it is compared as is and stays sargable.
+    ids = normalize_id_list(operation_ids)
+    if not ids:
+        return set()
+
+    normalized_role = normalize_role(role if role is not None else current_user_role())
+    conditions = []
+    params = []
+
+    if normalized_role != ROLE_GLOBAL:
+        if user_id is None:
+            user_id = current_user_id()
+
+        actor_company_id = current_user_company_id()
+        if actor_company_id > 0:
+            conditions.append("(COALESCE(o.empresa_id, 0) <= 0 OR o.empresa_id = %s)")
+            params.append(actor_company_id)
+
+        if normalized_role == ROLE_ADMIN or has_full_company_operation_scope(normalized_role):
+            pass
+        elif normalized_role == ROLE_VENDOR:
+            conditions.append("c.vendedor_id = %s")
+            params.append(user_id)
+        else:
+            products = allowed_products_for_role(normalized_role)
+            if not products:
+                return set()
+            placeholders = ", ".join(["%s"] * len(products))
+            conditions.append(f"o.produto IN ({placeholders})")
+            params.extend(products)
+
+    scope_clause = "".join(f" AND {condition}" for condition in conditions)
+
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    allowed = set()
+    try:
+        for start in range(0, len(ids), ACCESS_BATCH_SIZE):
+            chunk = ids[start : start + ACCESS_BATCH_SIZE]
+            cursor.execute(
+                f"""
+                SELECT o.id
+                FROM operacoes o
+                LEFT JOIN clientes c ON c.id = o.cliente_id
+                WHERE o.id IN ({', '.join(['%s'] * len(chunk))})
+                  {scope_clause}
+                """,
+                (*chunk, *params),
+            )
+            allowed.update(to_int(row.get("id")) for row in cursor.fetchall())
+    finally:
+        cursor.close()
+        db.close()
+
+    return allowed
+
+
 def can_access_client_documents(client_id):
     if can_access_client(client_id):
         return True
@@ -985,7 +1510,7 @@ def apply_role_product_scope(role, conditions, params, column_name):
         return
 
     placeholders = ", ".join(["%s"] * len(products))
-    conditions.append(f"UPPER({column_name}) IN ({placeholders})")
+    conditions.append(f"{column_name} IN ({placeholders})")
     params.extend(products)
 
 
@@ -1006,6 +1531,56 @@ def parse_dashboard_period(month, year):
     return period_start, period_end, None
 
 
+# WHERE builders of the dashboard, stats and sales board queries. Each returns
+# (conditions, params) to be joined with " AND "; app/migrations/explain.py
+# EXPLAINs the same output, so the index checks follow the routes.
+def build_created_period_conditions(period_start, period_end):
+    return ["o.criado_em >= %s", "o.criado_em < %s"], [period_start, period_end]
+
+
+def build_approved_period_conditions(period_start, period_end):
+    return (
+        ["o.status = 'APROVADO'", "o.data_efetiva >= %s", "o.data_efetiva < %s"],
+        [period_start, period_end],
+    )
+
+
+def build_dashboard_scope(role, company_id, vendor_id=None):
+    conditions = []
+    params = []
+
+    if role != ROLE_GLOBAL:
+        conditions.append("o.empresa_id = %s")
+        params.append(company_id)
+
+    if vendor_id:
+        conditions.append("c.vendedor_id = %s")
+        params.append(vendor_id)
+
+    products = () if has_full_company_operation_scope(role) else allowed_products_for_role(role)
+    if products:
+        conditions.append(f"o.produto IN ({', '.join(['%s'] * len(products))})")
+        params.extend(products)
+
+    return conditions, params
+
+
+def build_sales_board_scope(company_id):
+    # GLOBAL may look at every company (company_id 0).
+    if company_id > 0:
+        return ["o.empresa_id = %s"], [company_id]
+    return [], []
+
+
+def combine_conditions(*parts):
+    conditions = []
+    params = []
+    for part_conditions, part_params in parts:
+        conditions.extend(part_conditions)
+        params.extend(part_params)
+    return " AND ".join(conditions), params
+
+
 def normalize_optional_email(value):
     email = normalize_text(value).lower()
     if not email:
@@ -1153,6 +1728,19 @@ def ensure_clients_extra_columns(cursor, db):
         db.commit()
 
 
+# Generated or maintained by MySQL (see migrations); must never be part of
+# an INSERT. A restored operation gets a fresh updated_at so pipeline polls
+# notice it.
+OPERATION_GENERATED_COLUMNS = ("data_efetiva", "updated_at")
+
+
+def strip_operation_generated_columns(row):
+    clean = dict(row or {})
+    for column_name in OPERATION_GENERATED_COLUMNS:
+        clean.pop(column_name, None)
+    return clean
+
+
 @ensure_once
 def ensure_operations_extra_columns(cursor, db):
     ensure_company_scope_columns(cursor, db)
@@ -1395,7 +1983,7 @@ def register_operation_status_history(
 
     cursor.execute(
         """
-        SELECT empresa_id
+        SELECT empresa_id, cliente_id
         FROM operacoes
         WHERE id = %s
         LIMIT 1
@@ -1429,11 +2017,155 @@ def register_operation_status_history(
         ),
     )
 
+    client_id = to_int(operation_row.get("cliente_id"))
+    if client_id > 0:
+        refresh_client_operation_summary(cursor, client_id)
 
-def resolve_previous_status_before_final(cursor, operation_id, current_status):
-    normalized_current = normalize_operation_status(current_status)
-    if normalized_current not in FINAL_OPERATION_STATUSES:
-        return ""
+
+# Last operation and operation count per client, kept in
+# client_operation_summary so GET /clients doesn't need correlated
+# subqueries. Every path that creates, deletes, restores or changes the
+# status of an operation refreshes the affected client in the same
+# transaction; `python -m app.migrations repair-client-summary` rebuilds it.
+CLIENT_OPERATION_SUMMARY_UPSERT_SQL = """
+    INSERT INTO client_operation_summary (
+        client_id,
+        empresa_id,
+        last_operation_id,
+        last_operation_status,
+        last_operation_at,
+        operation_count
+    )
+    SELECT
+        c.id,
+        c.empresa_id,
+        lo.id,
+        lo.status,
+        lo.criado_em,
+        (
+            SELECT COUNT(*)
+            FROM operacoes oc
+            WHERE oc.cliente_id = c.id
+        )
+    FROM clientes c
+    LEFT JOIN operacoes lo ON lo.id = (
+        SELECT o.id
+        FROM operacoes o
+        WHERE o.cliente_id = c.id
+        ORDER BY o.criado_em DESC, o.id DESC
+        LIMIT 1
+    )
+    WHERE {where_clause}
+    ON DUPLICATE KEY UPDATE
+        empresa_id = VALUES(empresa_id),
+        last_operation_id = VALUES(last_operation_id),
+        last_operation_status = VALUES(last_operation_status),
+        last_operation_at = VALUES(last_operation_at),
+        operation_count = VALUES(operation_count)
+"""
+
+
+def refresh_client_operation_summary(cursor, client_id):
+    cursor.execute(
+        CLIENT_OPERATION_SUMMARY_UPSERT_SQL.format(where_clause="c.id = %s"),
+        (int(client_id),),
+    )
+
+
+def delete_client_operation_summary(cursor, client_id):
+    cursor.execute(
+        "DELETE FROM client_operation_summary WHERE client_id = %s",
+        (int(client_id),),
+    )
+
+
+def rebuild_client_operation_summaries(cursor, db, batch_size=500, log=None):
+    cursor.execute("SELECT COALESCE(MAX(id), 0) AS max_id FROM clientes")
+    max_id = to_int((cursor.fetchone() or {}).get("max_id"))
+
+    cursor.execute(
+        """
+        DELETE s
+        FROM client_operation_summary s
+        LEFT JOIN clientes c ON c.id = s.client_id
+        WHERE c.id IS NULL
+        """
+    )
+    db.commit()
+
+    last_id = 0
+    refreshed = 0
+    while last_id < max_id:
+        upper_id = last_id + batch_size
+        cursor.execute(
+            CLIENT_OPERATION_SUMMARY_UPSERT_SQL.format(
+                where_clause="c.id > %s AND c.id <= %s"
+            ),
+            (last_id, upper_id),
+        )
+        db.commit()
+        refreshed += max(cursor.rowcount, 0)
+        last_id = upper_id
+        if log:
+            log(f"[client-summary] clientes ate id {min(upper_id, max_id)} de {max_id}")
+
+    return {"max_client_id": max_id, "affected_rows": refreshed}
+
+
+def backfill_client_search_columns(cursor, db, batch_size=500, log=None):
+    cursor.execute("SELECT COALESCE(MAX(id), 0) AS max_id FROM clientes")
+    max_id = to_int((cursor.fetchone() or {}).get("max_id"))
+
+    last_id = 0
+    updated = 0
+    while last_id < max_id:
+        upper_id = last_id + batch_size
+        cursor.execute(
+            """
+            SELECT id, nome, cpf, numero_beneficio
+            FROM clientes
+            WHERE id > %s AND id <= %s
+            """,
+            (last_id, upper_id),
+        )
+        rows = cursor.fetchall()
+        if rows:
+            updates = []
+            for row in rows:
+                values = build_client_search_values(
+                    row.get("nome"),
+                    row.get("cpf"),
+                    row.get("numero_beneficio"),
+                )
+                updates.append(
+                    (
+                        values["cpf_digits"],
+                        values["beneficio_digits"],
+                        values["nome_busca"],
+                        row["id"],
+                    )
+                )
+            cursor.executemany(
+                """
+                UPDATE clientes
+                SET cpf_digits = %s, beneficio_digits = %s, nome_busca = %s
+                WHERE id = %s
+                """,
+                updates,
+            )
+            db.commit()
+            updated += len(updates)
+        last_id = upper_id
+        if log:
+            log(f"[client-search] clientes ate id {min(upper_id, max_id)} de {max_id}")
+
+    return {"max_client_id": max_id, "updated_rows": updated}
+
+
+def resolve_previous_status_before_final(cursor, operation_id, current_status):
+    normalized_current = normalize_operation_status(current_status)
+    if normalized_current not in FINAL_OPERATION_STATUSES:
+        return ""
 
     cursor.execute(
         """
@@ -1490,21 +2222,13 @@ def collect_operation_notification_recipients(
         if digitador_id > 0:
             recipients.add(digitador_id)
 
+    directory = None
+    if include_admins or include_product_digitadores:
+        directory = get_recipient_directory(cursor)
+
     if include_admins:
-        cursor.execute(
-            """
-            SELECT id
-            FROM usuarios
-            WHERE UPPER(role) IN ('ADMIN', 'GLOBAL')
-              AND (%s = 0 OR empresa_id = %s OR UPPER(role) = 'GLOBAL')
-            """
-            ,
-            (company_id, company_id),
-        )
-        for row in cursor.fetchall() or []:
-            user_id = to_int(row.get("id"))
-            if user_id > 0:
-                recipients.add(user_id)
+        recipients |= directory.users(company_id, ["ADMIN"])
+        recipients |= directory.users_any_company(["GLOBAL"])
 
     if include_product_digitadores:
         product_name = normalize_product_name(operation.get("produto"))
@@ -1515,20 +2239,7 @@ def collect_operation_notification_recipients(
         ]
 
         if digitador_roles:
-            placeholders = ", ".join(["%s"] * len(digitador_roles))
-            cursor.execute(
-                f"""
-                SELECT id
-                FROM usuarios
-                WHERE UPPER(role) IN ({placeholders})
-                  AND (%s = 0 OR empresa_id = %s)
-                """,
-                tuple([*digitador_roles, company_id, company_id]),
-            )
-            for row in cursor.fetchall() or []:
-                user_id = to_int(row.get("id"))
-                if user_id > 0:
-                    recipients.add(user_id)
+            recipients |= directory.users(company_id, digitador_roles)
 
     return recipients
 
@@ -1594,8 +2305,14 @@ def insert_operation_notifications(
         rows,
     )
 
+    deltas = {}
+    for row in rows:
+        deltas[row[0]] = deltas.get(row[0], 0) + 1
+    adjust_unread_notification_counters(cursor, deltas)
+    queue_notification_event(deltas)
 
-def notify_vendor_status_change(
+
+def deliver_vendor_status_change(
     cursor,
     operation_id,
     previous_status,
@@ -1623,7 +2340,10 @@ def notify_vendor_status_change(
         """,
         (operation_id,),
     )
-    operation = cursor.fetchone() or {}
+    operation = cursor.fetchone()
+    if not operation:
+        # Deleted before the outbox worker got to it.
+        return
     recipients = collect_operation_notification_recipients(
         cursor,
         operation,
@@ -1666,7 +2386,7 @@ def notify_vendor_status_change(
     )
 
 
-def notify_vendor_progress_change(
+def deliver_vendor_progress_change(
     cursor,
     operation_id,
     previous_progress,
@@ -1728,7 +2448,7 @@ def notify_vendor_progress_change(
     )
 
 
-def notify_operation_comment(
+def deliver_operation_comment(
     cursor,
     operation_id,
     operation,
@@ -1777,7 +2497,7 @@ def notify_operation_comment(
     )
 
 
-def notify_operation_arrived_pipeline(
+def deliver_operation_arrived_pipeline(
     cursor,
     operation_id,
     operation,
@@ -1820,6 +2540,201 @@ def notify_operation_arrived_pipeline(
     )
 
 
+NOTIFICATION_EVENT_STATUS_CHANGE = "OPERATION_STATUS_CHANGE"
+NOTIFICATION_EVENT_PROGRESS_CHANGE = "OPERATION_PROGRESS_CHANGE"
+NOTIFICATION_EVENT_COMMENT = "OPERATION_COMMENT"
+NOTIFICATION_EVENT_ARRIVED_PIPELINE = "OPERATION_ARRIVED_PIPELINE"
+
+# Only what the delivery step reads from the operation travels in the outbox.
+NOTIFICATION_OPERATION_FIELDS = (
+    "id",
+    "empresa_id",
+    "vendedor_id",
+    "digitador_id",
+    "produto",
+    "status",
+    "cliente_nome",
+)
+
+register_notification_handler(NOTIFICATION_EVENT_STATUS_CHANGE, deliver_vendor_status_change)
+register_notification_handler(NOTIFICATION_EVENT_PROGRESS_CHANGE, deliver_vendor_progress_change)
+register_notification_handler(NOTIFICATION_EVENT_COMMENT, deliver_operation_comment)
+register_notification_handler(NOTIFICATION_EVENT_ARRIVED_PIPELINE, deliver_operation_arrived_pipeline)
+
+
+def notification_operation_snapshot(operation):
+    operation = operation or {}
+    return {field: operation.get(field) for field in NOTIFICATION_OPERATION_FIELDS}
+
+
+def notify_vendor_status_change(
+    cursor,
+    operation_id,
+    previous_status,
+    next_status,
+    changed_by=None,
+):
+    normalized_previous = normalize_operation_status(previous_status)
+    normalized_next = normalize_operation_status(next_status)
+    if not normalized_next or normalized_previous == normalized_next:
+        return
+
+    enqueue_notification_event(
+        cursor,
+        NOTIFICATION_EVENT_STATUS_CHANGE,
+        {
+            "operation_id": to_int(operation_id),
+            "previous_status": normalized_previous,
+            "next_status": normalized_next,
+            "changed_by": to_int(changed_by) or None,
+        },
+    )
+
+
+def notify_vendor_progress_change(
+    cursor,
+    operation_id,
+    previous_progress,
+    next_progress,
+    changed_by=None,
+):
+    normalized_previous = normalize_operation_progress_status(previous_progress)
+    normalized_next = normalize_operation_progress_status(next_progress)
+    if normalized_previous == normalized_next:
+        return
+
+    enqueue_notification_event(
+        cursor,
+        NOTIFICATION_EVENT_PROGRESS_CHANGE,
+        {
+            "operation_id": to_int(operation_id),
+            "previous_progress": normalized_previous,
+            "next_progress": normalized_next,
+            "changed_by": to_int(changed_by) or None,
+        },
+    )
+
+
+def notify_operation_comment(
+    cursor,
+    operation_id,
+    operation,
+    author_id=None,
+    author_name="",
+    comment_message="",
+):
+    snapshot = notification_operation_snapshot(operation)
+    enqueue_notification_event(
+        cursor,
+        NOTIFICATION_EVENT_COMMENT,
+        {
+            "operation_id": to_int(operation_id),
+            "operation": snapshot,
+            "author_id": to_int(author_id) or None,
+            "author_name": str(author_name or ""),
+            "comment_message": str(comment_message or ""),
+        },
+        company_id=snapshot.get("empresa_id"),
+    )
+
+
+def notify_operation_arrived_pipeline(
+    cursor,
+    operation_id,
+    operation,
+    changed_by=None,
+):
+    snapshot = notification_operation_snapshot(operation)
+    enqueue_notification_event(
+        cursor,
+        NOTIFICATION_EVENT_ARRIVED_PIPELINE,
+        {
+            "operation_id": to_int(operation_id),
+            "operation": snapshot,
+            "changed_by": to_int(changed_by) or None,
+        },
+        company_id=snapshot.get("empresa_id"),
+    )
+
+
+# Columns stored in canonical form (trimmed, upper case, no legacy status);
+# every write goes through build_operation_update() or
+# canonicalize_operation_row(), so reads can compare with plain equality.
+OPERATION_CANONICAL_FIELDS = {
+    "status": normalize_operation_status,
+    "produto": normalize_product_name,
+}
+
+
+def canonical_status_case_sql(column_name):
+    """CASE expression mapping column_name to its canonical status."""
+    whens = " ".join("WHEN %s THEN %s" for _ in LEGACY_STATUS_MAP)
+    params = [value for item in sorted(LEGACY_STATUS_MAP.items()) for value in item]
+    sql = f"CASE UPPER(TRIM({column_name})) {whens} ELSE UPPER(TRIM({column_name})) END"
+    return sql, params
+
+
+def canonicalize_stored_operation_values(cursor, db, batch_size=1000, log=None):
+    """
+    Rewrites operacoes.status/produto and client_operation_summary's copy
+    of the status in id batches. Rows already canonical are skipped by the
+    WHERE clause, so an interrupted run simply starts over cheaply.
+    """
+    status_sql, status_params = canonical_status_case_sql("status")
+
+    cursor.execute("SELECT COALESCE(MAX(id), 0) AS max_id FROM operacoes")
+    max_id = to_int((cursor.fetchone() or {}).get("max_id"))
+
+    last_id = 0
+    updated = 0
+    while last_id < max_id:
+        upper_id = last_id + batch_size
+        # ENVIADA_ESTEIRA rows were shown in the pipeline without the
+        # enviada_esteira_em stamp; keep them there once they become
+        # PRONTA_DIGITAR.
+        cursor.execute(
+            """
+            UPDATE operacoes
+            SET enviada_esteira_em = COALESCE(criado_em, NOW())
+            WHERE id > %s AND id <= %s
+              AND status = 'ENVIADA_ESTEIRA'
+              AND enviada_esteira_em IS NULL
+            """,
+            (last_id, upper_id),
+        )
+        cursor.execute(
+            f"""
+            UPDATE operacoes
+            SET status = {status_sql},
+                produto = UPPER(TRIM(produto))
+            WHERE id > %s AND id <= %s
+              AND (
+                BINARY status <> BINARY ({status_sql})
+                OR BINARY produto <> BINARY UPPER(TRIM(produto))
+              )
+            """,
+            (*status_params, *status_params, last_id, upper_id),
+        )
+        updated += max(cursor.rowcount, 0)
+        db.commit()
+        last_id = upper_id
+        if log:
+            log(f"[canonical] operacoes ate id {min(upper_id, max_id)} de {max_id}")
+
+    summary_sql, summary_params = canonical_status_case_sql("last_operation_status")
+    cursor.execute(
+        f"""
+        UPDATE client_operation_summary
+        SET last_operation_status = {summary_sql}
+        WHERE BINARY last_operation_status <> BINARY ({summary_sql})
+        """,
+        (*summary_params, *summary_params),
+    )
+    db.commit()
+
+    return {"max_operation_id": max_id, "operations_updated": updated}
+
+
 def to_int(value):
     try:
         return int(value or 0)
@@ -1831,6 +2746,9 @@ def is_transient_db_connection_error(error):
     if not isinstance(error, mysql.connector.Error):
         return False
 
+    if isinstance(error, PoolExhaustedError):
+        return True
+
     if getattr(error, "errno", None) in DB_CONNECTION_ERROR_CODES:
         return True
 
@@ -1919,6 +2837,138 @@ def serialize_client_record(client):
     return client
 
 
+CLIENT_LIST_DEFAULT_LIMIT = 50
+CLIENT_LIST_MAX_LIMIT = 200
+CLIENT_LIST_REQUIRED_FIELDS = ("id", "criado_em")
+CLIENT_LIST_EXTRA_FIELDS = {
+    "beneficios",
+    "last_operation_status",
+    "last_operation_id",
+    "operation_count",
+}
+
+
+def encode_client_list_cursor(created_at, client_id):
+    if isinstance(created_at, datetime):
+        created_text = created_at.strftime("%Y-%m-%d %H:%M:%S")
+    else:
+        created_text = str(created_at or "")
+    raw = f"{created_text}|{to_int(client_id)}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_client_list_cursor(value):
+    text = str(value or "").strip()
+    padding = "=" * ((4 - (len(text) % 4)) % 4)
+    try:
+        raw = base64.urlsafe_b64decode((text + padding).encode("ascii")).decode("utf-8")
+        created_text, client_id_text = raw.rsplit("|", 1)
+        client_id = int(client_id_text)
+    except (ValueError, UnicodeError):
+        raise ValueError("cursor invalido")
+
+    if client_id <= 0:
+        raise ValueError("cursor invalido")
+    if not created_text:
+        return None, client_id
+    return datetime.strptime(created_text, "%Y-%m-%d %H:%M:%S"), client_id
+
+
+def parse_client_list_fields(value, client_columns):
+    # Returns [] when no projection was requested and None when a field is
+    # unknown, so the route can answer 400 instead of silently dropping it.
+    names = [name.strip().lower() for name in str(value or "").split(",") if name.strip()]
+    if not names:
+        return []
+
+    allowed = set(client_columns) | CLIENT_LIST_EXTRA_FIELDS
+    if any(name not in allowed for name in names):
+        return None
+
+    fields = list(CLIENT_LIST_REQUIRED_FIELDS)
+    for name in names:
+        if name not in fields:
+            fields.append(name)
+    return fields
+
+
+CLIENT_LIST_SUMMARY_FIELDS = {
+    "last_operation_status": "s.last_operation_status",
+    "last_operation_id": "s.last_operation_id",
+    "operation_count": "COALESCE(s.operation_count, 0)",
+}
+# serialize_client_record derives these from beneficios_json and the stored
+# numero_beneficio.
+CLIENT_LIST_BENEFIT_FIELDS = {"beneficios", "numero_beneficio"}
+
+
+def build_client_list_select(requested_fields):
+    # Returns (select list, whether client_operation_summary is needed). The
+    # field names were checked against the clientes columns by
+    # parse_client_list_fields, so they can be quoted into the SQL.
+    if not requested_fields:
+        return (
+            """
+                c.*,
+                s.last_operation_status AS last_operation_status,
+                s.last_operation_id AS last_operation_id,
+                COALESCE(s.operation_count, 0) AS operation_count
+            """,
+            True,
+        )
+
+    columns = []
+    needs_summary = False
+    for name in requested_fields:
+        if name in CLIENT_LIST_SUMMARY_FIELDS:
+            columns.append(f"{CLIENT_LIST_SUMMARY_FIELDS[name]} AS {name}")
+            needs_summary = True
+        elif name != "beneficios":
+            columns.append(f"c.`{name}`")
+
+    if CLIENT_LIST_BENEFIT_FIELDS & set(requested_fields):
+        for name in ("beneficios_json", "numero_beneficio"):
+            if name not in requested_fields:
+                columns.append(f"c.`{name}`")
+
+    return ", ".join(columns), needs_summary
+
+
+def apply_client_list_scope(role, company_id, user_id, conditions, params):
+    if role == ROLE_GLOBAL:
+        return
+
+    conditions.append("c.empresa_id = %s")
+    params.append(company_id)
+
+    if role == ROLE_ADMIN or has_full_company_operation_scope(role):
+        return
+
+    if is_digitador_role(role):
+        product_conditions = []
+        product_params = []
+        apply_role_product_scope(role, product_conditions, product_params, "o.produto")
+        product_clause = (
+            f" AND {' AND '.join(product_conditions)}" if product_conditions else ""
+        )
+        conditions.append(
+            f"""
+            EXISTS (
+                SELECT 1
+                FROM operacoes o
+                WHERE o.cliente_id = c.id
+                  AND o.empresa_id = %s
+                  {product_clause}
+            )
+            """
+        )
+        params.extend([company_id, *product_params])
+        return
+
+    conditions.append("c.vendedor_id = %s")
+    params.append(user_id)
+
+
 def fetch_client_record(cursor, client_id):
     cursor.execute(
         """
@@ -2165,20 +3215,7 @@ def create_client():
                     "can_take_over": True,
                 }), 409
 
-        cursor.execute(
-            """
-            SELECT
-                COLUMN_NAME,
-                CHARACTER_MAXIMUM_LENGTH
-            FROM INFORMATION_SCHEMA.COLUMNS
-            WHERE TABLE_SCHEMA = DATABASE()
-              AND TABLE_NAME = 'clientes'
-            """
-        )
-        column_meta = {
-            row["COLUMN_NAME"]: row.get("CHARACTER_MAXIMUM_LENGTH")
-            for row in cursor.fetchall()
-        }
+        column_meta = table_columns(cursor, "clientes")
 
         base_columns = [
             "vendedor_id",
@@ -2290,6 +3327,11 @@ def create_client():
             insert_columns.append("beneficios_json")
             insert_values.append(serialize_client_beneficios(beneficios))
 
+        for column_name, value in build_client_search_values(nome, cpf, numero_beneficio).items():
+            if column_name in column_meta:
+                insert_columns.append(column_name)
+                insert_values.append(value)
+
         if "empresa_id" in column_meta:
             insert_columns = ["empresa_id", *insert_columns]
             insert_values = [seller_company_id, *insert_values]
@@ -2299,6 +3341,9 @@ def create_client():
 
         if existing_client:
             previous_seller_id = to_int(existing_client.get("vendedor_id"))
+            if previous_seller_id != vendedor_id:
+                # The previous seller's pipeline delta no longer reads these rows.
+                record_operation_tombstones(cursor, "o.cliente_id = %s", (existing_client["id"],))
             update_sql = ", ".join([f"{column_name} = %s" for column_name in insert_columns])
             cursor.execute(
                 f"""
@@ -2308,8 +3353,10 @@ def create_client():
                 """,
                 tuple([*insert_values, existing_client["id"]]),
             )
+            touch_client_operations(cursor, existing_client["id"])
             db.commit()
             client_id = to_int(existing_client.get("id"))
+            index_client(cursor, client_id)
 
             return jsonify({
                 "message": "Cliente existente atualizado com sucesso",
@@ -2331,6 +3378,7 @@ def create_client():
 
         db.commit()
         client_id = cursor.lastrowid
+        index_client(cursor, client_id)
 
         return jsonify({
             "message": "Cliente criado com sucesso",
@@ -2500,99 +3548,208 @@ def create_operation(client_id):
 @clients_bp.route("/clients", methods=["GET"])
 @jwt_required()
 def list_clients():
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
-    ensure_company_scope_columns(cursor, db)
-    ensure_clients_extra_columns(cursor, db)
     role = normalize_role(current_user_role())
     company_id = current_user_company_id()
-    client_operation_summary_select = """
-                (
-                    SELECT o.status
-                    FROM operacoes o
-                    WHERE o.cliente_id = c.id
-                    ORDER BY o.criado_em DESC
-                    LIMIT 1
-                ) AS last_operation_status,
-                (
-                    SELECT o.id
-                    FROM operacoes o
-                    WHERE o.cliente_id = c.id
-                    ORDER BY o.criado_em DESC
-                    LIMIT 1
-                ) AS last_operation_id,
-                (
-                    SELECT COUNT(*)
-                    FROM operacoes o
-                    WHERE o.cliente_id = c.id
-                ) AS operation_count
-    """
+    user_id = current_user_id()
 
-    if role == ROLE_GLOBAL:
-        cursor.execute(f"""
-            SELECT 
-                c.*,
-                {client_operation_summary_select}
-            FROM clientes c
-            ORDER BY c.criado_em DESC
-        """)
-    elif role == ROLE_ADMIN:
-        cursor.execute(f"""
-            SELECT 
-                c.*,
-                {client_operation_summary_select}
-            FROM clientes c
-            WHERE c.empresa_id=%s
-            ORDER BY c.criado_em DESC
-        """, (company_id,))
-    elif has_full_company_operation_scope(role):
-        cursor.execute(f"""
-            SELECT
-                c.*,
-                {client_operation_summary_select}
-            FROM clientes c
-            WHERE c.empresa_id=%s
-            ORDER BY c.criado_em DESC
-        """, (company_id,))
-    elif is_digitador_role(role):
-        product_conditions = []
-        product_params = []
-        apply_role_product_scope(role, product_conditions, product_params, "o.produto")
-        product_clause = (
-            f" AND {' AND '.join(product_conditions)}" if product_conditions else ""
+    # legacy=1 keeps the original unpaginated array for older clients.
+    legacy = normalize_optional_boolean(request.args.get("legacy"))
+
+    filter_conditions = []
+    filter_params = []
+
+    vendedor_filter = to_int(request.args.get("vendedor_id"))
+    if vendedor_filter > 0:
+        filter_conditions.append("c.vendedor_id = %s")
+        filter_params.append(vendedor_filter)
+
+    fase_filter = normalize_text(request.args.get("fase")).upper()
+    if fase_filter:
+        filter_conditions.append("UPPER(c.fase) = %s")
+        filter_params.append(fase_filter)
+
+    try:
+        created_from = normalize_text(request.args.get("created_from"))
+        if created_from:
+            filter_conditions.append("c.criado_em >= %s")
+            filter_params.append(datetime.strptime(normalize_date_text(created_from), "%Y-%m-%d"))
+
+        created_to = normalize_text(request.args.get("created_to"))
+        if created_to:
+            filter_conditions.append("c.criado_em < %s")
+            filter_params.append(
+                datetime.strptime(normalize_date_text(created_to), "%Y-%m-%d") + timedelta(days=1)
+            )
+    except ValueError:
+        return jsonify({"error": "Periodo de criacao invalido"}), 400
+
+    has_open_operation = normalize_text(request.args.get("has_open_operation"))
+    if has_open_operation:
+        final_placeholders = ", ".join(["%s"] * len(FINAL_OPERATION_STATUSES))
+        exists_keyword = "EXISTS" if normalize_optional_boolean(has_open_operation) else "NOT EXISTS"
+        filter_conditions.append(
+            f"""
+            {exists_keyword} (
+                SELECT 1
+                FROM operacoes oa
+                WHERE oa.cliente_id = c.id
+                  AND COALESCE(oa.status, '') NOT IN ({final_placeholders})
+            )
+            """
         )
+        filter_params.extend(sorted(FINAL_OPERATION_STATUSES))
+
+    limit = to_int(request.args.get("limit")) or CLIENT_LIST_DEFAULT_LIMIT
+    limit = max(1, min(limit, CLIENT_LIST_MAX_LIMIT))
 
+    cursor_text = normalize_text(request.args.get("cursor"))
+    keyset = None
+    if cursor_text and not legacy:
+        try:
+            keyset = decode_client_list_cursor(cursor_text)
+        except ValueError:
+            return jsonify({"error": "Cursor invalido"}), 400
+
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    try:
+        ensure_company_scope_columns(cursor, db)
+        ensure_clients_extra_columns(cursor, db)
+
+        requested_fields = parse_client_list_fields(
+            request.args.get("fields"),
+            table_columns(cursor, "clientes"),
+        )
+        if requested_fields is None:
+            return jsonify({"error": "Campos invalidos em fields"}), 400
+
+        conditions = []
+        params = []
+        apply_client_list_scope(role, company_id, user_id, conditions, params)
+        conditions.extend(filter_conditions)
+        params.extend(filter_params)
+
+        if keyset is not None:
+            keyset_created_at, keyset_id = keyset
+            # MySQL sorts NULL criado_em last on DESC, so those rows come after
+            # every dated row and are paged by id alone.
+            if keyset_created_at is None:
+                conditions.append("(c.criado_em IS NULL AND c.id < %s)")
+                params.append(keyset_id)
+            else:
+                conditions.append(
+                    "(c.criado_em < %s OR c.criado_em IS NULL OR (c.criado_em = %s AND c.id < %s))"
+                )
+                params.extend([keyset_created_at, keyset_created_at, keyset_id])
+
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        limit_clause = "" if legacy else "LIMIT %s"
+        if not legacy:
+            params.append(limit + 1)
+
+        select_list, needs_summary = build_client_list_select(requested_fields)
+        summary_join = (
+            "LEFT JOIN client_operation_summary s ON s.client_id = c.id" if needs_summary else ""
+        )
         cursor.execute(
             f"""
-            SELECT DISTINCT
-                c.*,
-                {client_operation_summary_select}
+            SELECT {select_list}
             FROM clientes c
-            JOIN operacoes o ON o.cliente_id = c.id
-            WHERE c.empresa_id=%s
-              AND o.empresa_id=%s
-              {product_clause}
-            ORDER BY c.criado_em DESC
+            {summary_join}
+            {where_clause}
+            ORDER BY c.criado_em DESC, c.id DESC
+            {limit_clause}
             """,
-            (company_id, company_id, *product_params),
+            tuple(params),
         )
-    else:
-        cursor.execute(f"""
-            SELECT 
-                c.*,
-                {client_operation_summary_select}
-            FROM clientes c
-            WHERE c.vendedor_id=%s
-              AND c.empresa_id=%s
-            ORDER BY c.criado_em DESC
-        """, (current_user_id(), company_id))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        db.close()
 
-    clients = [serialize_client_record(client) for client in cursor.fetchall()]
+    if legacy:
+        return jsonify([serialize_client_record(row) for row in rows]), 200
 
-    cursor.close()
-    db.close()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = encode_client_list_cursor(rows[-1].get("criado_em"), rows[-1].get("id"))
+
+    clients = []
+    for row in rows:
+        client = serialize_client_record(row)
+        if requested_fields:
+            client = {key: client.get(key) for key in requested_fields}
+        clients.append(client)
+
+    return jsonify(
+        {
+            "clients": clients,
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+            "limit": limit,
+        }
+    ), 200
 
-    return jsonify(clients), 200
+
+CLIENT_SEARCH_INDEX_MAX_SCOPE_CANDIDATES = 500
+
+
+def search_clients_in_index(cursor, role, user_id, query, limit):
+    # Same scoping as the SQL branches of search_global. Returns None when
+    # the digitador product check would need too large an IN list, so the
+    # route falls back to SQL.
+    company_id = current_user_company_id() if role != ROLE_GLOBAL else 0
+    matches = get_client_search_index().search(
+        cursor,
+        company_id if company_id > 0 else None,
+        query,
+        is_digit_search_query(query),
+    )
+
+    if is_admin_like_role(role):
+        return matches[:limit]
+    if role == ROLE_VENDOR:
+        return [client for client in matches if to_int(client.get("vendedor_id")) == user_id][:limit]
+    if has_full_company_operation_scope(role):
+        return matches[:limit]
+    if not is_digitador_role(role):
+        return []
+
+    if not matches:
+        return []
+    if len(matches) > CLIENT_SEARCH_INDEX_MAX_SCOPE_CANDIDATES:
+        return None
+
+    client_ids = [to_int(client.get("id")) for client in matches]
+    conditions = [f"o.cliente_id IN ({', '.join(['%s'] * len(client_ids))})"]
+    params = list(client_ids)
+    apply_role_product_scope(role, conditions, params, "o.produto")
+    cursor.execute(
+        f"""
+        SELECT DISTINCT o.cliente_id
+        FROM operacoes o
+        WHERE {' AND '.join(conditions)}
+        """,
+        tuple(params),
+    )
+    allowed_ids = {to_int(row.get("cliente_id")) for row in cursor.fetchall()}
+    return [client for client in matches if to_int(client.get("id")) in allowed_ids][:limit]
+
+
+def build_client_search_conditions(query):
+    # Digits go to prefix ranges on the indexed cpf_digits/beneficio_digits
+    # columns; anything else is a FULLTEXT (ngram) match on nome_busca.
+    # None when the name has nothing left to match.
+    if is_digit_search_query(query):
+        digits_prefix = f"{only_digits(query)}%"
+        return ["(c.cpf_digits LIKE %s OR c.beneficio_digits LIKE %s)"], [digits_prefix, digits_prefix]
+
+    fulltext_query = build_name_fulltext_query(query)
+    if not fulltext_query:
+        return None
+    return ["MATCH(c.nome_busca) AGAINST (%s IN BOOLEAN MODE)"], [fulltext_query]
 
 
 # ======================================================
@@ -2614,24 +3771,21 @@ def search_global():
     if len(query) < 2:
         return jsonify({"query": query, "clients": []}), 200
 
-    like_term = f"%{query}%"
-    only_digits_term = only_digits(query)
-    digit_like_term = f"%{only_digits_term}%" if only_digits_term else like_term
+    search_conditions = build_client_search_conditions(query)
+    if search_conditions is None:
+        return jsonify({"query": query, "clients": []}), 200
+    base_where, params = search_conditions
 
     db = get_db()
     cursor = db.cursor(dictionary=True)
     ensure_operations_extra_columns(cursor, db)
 
     try:
-        base_where = [
-            "("
-            "c.nome LIKE %s OR "
-            "c.cpf LIKE %s OR "
-            "REPLACE(REPLACE(c.cpf, '.', ''), '-', '') LIKE %s OR "
-            "c.numero_beneficio LIKE %s"
-            ")"
-        ]
-        params = [like_term, like_term, digit_like_term, like_term]
+        if client_search_index_enabled():
+            indexed_clients = search_clients_in_index(cursor, role, user_id, query, limit)
+            if indexed_clients is not None:
+                return jsonify({"query": query, "clients": indexed_clients}), 200
+
         apply_company_scope(role, base_where, params, "c.empresa_id")
 
         if is_admin_like_role(role):
@@ -3241,20 +4395,7 @@ def update_client(client_id):
         if not existing_client:
             return jsonify({"error": "Cliente nao encontrado"}), 404
 
-        cursor.execute(
-            """
-            SELECT
-                COLUMN_NAME,
-                CHARACTER_MAXIMUM_LENGTH
-            FROM INFORMATION_SCHEMA.COLUMNS
-            WHERE TABLE_SCHEMA = DATABASE()
-              AND TABLE_NAME = 'clientes'
-            """
-        )
-        column_meta = {
-            row["COLUMN_NAME"]: row.get("CHARACTER_MAXIMUM_LENGTH")
-            for row in cursor.fetchall()
-        }
+        column_meta = table_columns(cursor, "clientes")
 
         base_columns = [
             "nome",
@@ -3368,6 +4509,10 @@ def update_client(client_id):
         if "beneficios_json" in column_meta:
             update_columns.append("beneficios_json")
             update_values["beneficios_json"] = serialize_client_beneficios(beneficios)
+        for column_name, value in build_client_search_values(nome, cpf, numero_beneficio).items():
+            if column_name in column_meta:
+                update_columns.append(column_name)
+                update_values[column_name] = value
         update_sql = ", ".join([f"{column_name} = %s" for column_name in update_columns])
         update_params = [update_values[column_name] for column_name in update_columns]
         update_params.append(client_id)
@@ -3380,7 +4525,9 @@ def update_client(client_id):
             """,
             tuple(update_params),
         )
+        touch_client_operations(cursor, client_id)
         db.commit()
+        index_client(cursor, client_id)
 
         client = fetch_client_record(cursor, client_id)
         return jsonify(
@@ -3527,11 +4674,14 @@ def delete_operation(operation_id):
             "DELETE FROM operation_status_history WHERE operation_id = %s",
             (operation_id,),
         )
+        release_unread_notifications(cursor, "operation_id = %s", (operation_id,))
         cursor.execute(
             "DELETE FROM operation_notifications WHERE operation_id = %s",
             (operation_id,),
         )
+        record_operation_tombstones(cursor, "o.id = %s", (operation_id,))
         cursor.execute("DELETE FROM operacoes WHERE id = %s", (operation_id,))
+        refresh_client_operation_summary(cursor, to_int(operation.get("cliente_id")))
         log_audit(
             cursor,
             actor_id=actor_id,
@@ -3676,18 +4826,8 @@ def delete_client(client_id):
             operation_notifications = cursor.fetchall()
 
         ensure_documents_table(cursor, db)
-        sync_storage_documents_to_db(cursor, client_id, seller_id=to_int(client.get("vendedor_id")))
-        documents = []
-        cursor.execute(
-            """
-            SELECT *
-            FROM documentos
-            WHERE client_id = %s
-            ORDER BY id ASC
-            """,
-            (client_id,),
-        )
-        documents = cursor.fetchall()
+        sync_legacy_documents_once(cursor, client_id, seller_id=to_int(client.get("vendedor_id")))
+        documents = select_client_documents_for_trash(cursor, db, client_id)
 
         trash_id = add_to_trash(
             cursor,
@@ -3718,15 +4858,22 @@ def delete_client(client_id):
                 f"DELETE FROM operation_status_history WHERE operation_id IN ({placeholders})",
                 tuple(operation_ids),
             )
+            release_unread_notifications(
+                cursor,
+                f"operation_id IN ({placeholders})",
+                tuple(operation_ids),
+            )
             cursor.execute(
                 f"DELETE FROM operation_notifications WHERE operation_id IN ({placeholders})",
                 tuple(operation_ids),
             )
 
+        record_operation_tombstones(cursor, "o.cliente_id = %s", (client_id,))
         cursor.execute("DELETE FROM operacoes WHERE cliente_id = %s", (client_id,))
         cursor.execute("DELETE FROM documentos WHERE client_id = %s", (client_id,))
 
         cursor.execute("DELETE FROM clientes WHERE id = %s", (client_id,))
+        delete_client_operation_summary(cursor, client_id)
         log_audit(
             cursor,
             actor_id=actor_id,
@@ -3738,6 +4885,7 @@ def delete_client(client_id):
             metadata={"trash_id": trash_id, "operations_count": len(operation_ids)},
         )
         db.commit()
+        unindex_client(client_id)
         return jsonify(
             {
                 "message": "Cliente excluido com sucesso",
@@ -3765,7 +4913,18 @@ def upload_document():
     if request.method == "OPTIONS":
         return "", 200
 
-    client_id = request.form.get("client_id")
+    # Each file is parsed in chunks into a temp file of the blob store, hashed
+    # on the way, and the body is cut off as soon as a limit is exceeded.
+    uploads = stream_uploads_to(get_document_store())
+    try:
+        client_id = request.form.get("client_id")
+        files = request.files
+    except (BlobTooLargeError, RequestEntityTooLarge) as exc:
+        for upload in uploads:
+            upload.discard()
+        if isinstance(exc, BlobTooLargeError):
+            return jsonify({"error": f"Cada arquivo pode ter no maximo {MAX_FILE_SIZE_MB:g} MB"}), 413
+        return jsonify({"error": f"O envio pode ter no maximo {MAX_REQUEST_SIZE_MB:g} MB"}), 413
 
     if not client_id:
         return jsonify({"error": "client_id e obrigatorio"}), 400
@@ -3773,25 +4932,32 @@ def upload_document():
     if not can_access_client(int(client_id)):
         return jsonify({"error": "Acesso nao autorizado"}), 403
 
-    if not request.files:
+    if not files:
         return jsonify({"error": "Nenhum arquivo enviado"}), 400
 
     db = get_db()
     cursor = db.cursor(dictionary=True)
     saved_files = {}
+    rejected_files = []
 
     try:
         ensure_documents_table(cursor, db)
         seller_id = resolve_client_seller_id(cursor, int(client_id))
 
-        for field_name, file in request.files.items():
-            if not file or not allowed_file(file.filename):
+        for field_name, file in files.items():
+            if not file or file.stream not in uploads:
+                continue
+
+            ext, content_type = sniff_file_type(file.stream.head)
+            if not ext:
+                rejected_files.append(field_name)
                 continue
 
-            ext = file.filename.rsplit(".", 1)[1].lower()
             filename = f"{field_name}_{uuid.uuid4().hex}.{ext}"
             original_name = normalize_document_filename(file.filename) or filename
-            file_bytes = file.read()
+            # The blob is fsynced and in place before its row is inserted, so a
+            # committed row never points at content that is not durable yet.
+            blob_key, file_size = file.stream.commit()
 
             cursor.execute(
                 """
@@ -3803,7 +4969,7 @@ def upload_document():
                     original_name,
                     content_type,
                     file_size,
-                    file_data
+                    blob_key
                 )
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
                 """,
@@ -3813,30 +4979,33 @@ def upload_document():
                     infer_document_type(field_name=field_name, filename=filename),
                     filename,
                     original_name,
-                    file.mimetype
-                    or mimetypes.guess_type(original_name)[0]
-                    or "application/octet-stream",
-                    len(file_bytes),
-                    file_bytes,
+                    content_type,
+                    file_size,
+                    blob_key,
                 ),
             )
             saved_files[field_name] = filename
 
         if not saved_files:
             db.rollback()
-            return jsonify({"error": "Nenhum arquivo valido enviado"}), 400
+            return jsonify({"error": "Nenhum arquivo valido enviado (apenas PDF, PNG ou JPG)"}), 400
 
         db.commit()
-        return jsonify({
+        payload = {
             "message": "Arquivos enviados com sucesso",
             "files": saved_files
-        }), 201
+        }
+        if rejected_files:
+            payload["rejected"] = rejected_files
+        return jsonify(payload), 201
     except Exception:
         db.rollback()
         return jsonify({"error": "Nao foi possivel salvar os documentos"}), 500
     finally:
         cursor.close()
         db.close()
+        for upload in uploads:
+            upload.discard()
 
 # ======================================================
 # Ã°Å¸â€œÆ’ LISTAR DOCUMENTOS
@@ -3876,17 +5045,17 @@ def download_document(client_id, filename):
     cursor = db.cursor(dictionary=True)
     try:
         ensure_documents_table(cursor, db)
-        if sync_storage_documents_to_db(cursor, client_id) > 0:
+        if sync_legacy_documents_once(cursor, client_id):
             db.commit()
 
         document, safe_filename = get_client_document_record(cursor, client_id, filename)
-        if document and document.get("file_data") is not None:
-            return send_file(
-                BytesIO(document.get("file_data")),
-                as_attachment=True,
-                download_name=document.get("original_name") or safe_filename,
-                mimetype=document.get("content_type") or "application/octet-stream",
-            )
+        response = send_document_response(cursor, document, safe_filename) if document else None
+        if response is not None:
+            return response
+        # Once the folder has been copied, documentos is the source of truth
+        # and a miss is a plain 404; only unmigrated clients scan the folder.
+        if legacy_documents_synced(cursor, client_id):
+            return jsonify({"error": "Arquivo nao encontrado"}), 404
     finally:
         cursor.close()
         db.close()
@@ -4398,6 +5567,14 @@ def update_operation(operation_id):
         db.close()
         return jsonify({"error": "Nenhum campo permitido para atualizacao"}), 400
 
+    if (
+        "produto" in data
+        and "produto" in allowed_fields
+        and normalize_product_name(data.get("produto")) != normalize_product_name(operation.get("produto"))
+    ):
+        # Product-scoped digitadores of the old product stop reading this row.
+        record_operation_tombstones(cursor, "o.id = %s", (operation_id,))
+
     params.append(operation_id)
     cursor.execute(
         f"UPDATE operacoes SET {', '.join(updates)} WHERE id=%s",
@@ -4714,33 +5891,294 @@ def send_operation_to_pipeline(operation_id):
 @jwt_required()
 def update_client_fase(client_id):
 
-    if not is_admin():
-        return jsonify({
-            "error": "Somente ADMIN/GLOBAL pode alterar fase"
-        }), 403
+    if not is_admin():
+        return jsonify({
+            "error": "Somente ADMIN/GLOBAL pode alterar fase"
+        }), 403
+
+    data = request.get_json() or {}
+    nova_fase = data.get("fase")
+
+    db = get_db()
+    cursor = db.cursor()
+
+    cursor.execute("""
+        UPDATE clientes
+        SET fase=%s
+        WHERE id=%s
+    """, (nova_fase, client_id))
+
+    db.commit()
+    cursor.close()
+    db.close()
+
+    return jsonify({"message": "Fase atualizada com sucesso"}), 200
+
+
+# ======================================================
+# Ã°Å¸â€œâ€ž ADMIN - LISTAR ESTEIRA
+# ======================================================
+
+def build_active_pipeline_conditions():
+    status_placeholders = ", ".join(["%s"] * len(PIPELINE_ACTIVE_STATUSES))
+    conditions = [
+        f"o.status IN ({status_placeholders})",
+        """(
+            o.status <> 'PRONTA_DIGITAR'
+            OR o.enviada_esteira_em IS NOT NULL
+        )""",
+    ]
+    return conditions, list(PIPELINE_ACTIVE_STATUSES)
+
+
+def apply_pipeline_owner_scope(role, user_id, conditions, params):
+    # Company, product and seller: which operations the caller may see at all,
+    # whatever their status. Leaving this scope is reported with a tombstone.
+    apply_company_scope(role, conditions, params, "o.empresa_id")
+    apply_role_product_scope(role, conditions, params, "o.produto")
+    if role == ROLE_VENDOR:
+        conditions.append("c.vendedor_id = %s")
+        params.append(user_id)
+
+
+def build_pipeline_scope(role, user_id):
+    conditions, params = build_active_pipeline_conditions()
+    apply_pipeline_owner_scope(role, user_id, conditions, params)
+
+    if is_digitador_role(role) and not has_full_company_operation_scope(role):
+        ready_placeholders = ", ".join(
+            ["%s"] * len(PIPELINE_READY_VISIBLE_STATUSES)
+        )
+        conditions.append(
+            f"""(
+                o.status IN ({ready_placeholders})
+                OR o.digitador_id = %s
+            )"""
+        )
+        params.extend(PIPELINE_READY_VISIBLE_STATUSES)
+        params.append(user_id)
+
+    return conditions, params
+
+
+def fetch_pipeline_operations(cursor, where_clause, params):
+    cursor.execute(f"""
+        SELECT
+            o.id,
+            o.produto,
+            o.banco_digitacao,
+            o.margem,
+            o.valor_solicitado,
+            o.parcela_solicitada,
+            o.valor_liberado,
+            o.troco,
+            o.parcela_liberada,
+            o.promotora,
+            o.numero_proposta,
+            o.status_andamento,
+            o.enviada_esteira_em,
+            o.link_formalizacao,
+            o.devolvida_em,
+            o.formalizado_em,
+            o.pendencia_tipo,
+            o.pendencia_motivo,
+            o.pendencia_aberta_em,
+            o.pendencia_resposta_vendedor,
+            o.pendencia_respondida_em,
+            o.motivo_reprovacao,
+            o.ficha_portabilidade,
+            o.prazo,
+            o.status,
+            o.digitador_id,
+            o.criado_em,
+            c.id as cliente_id,
+            c.nome,
+            c.cpf,
+            c.numero_beneficio,
+            c.vendedor_id,
+            COALESCE(u.nome, '-') AS vendedor_nome,
+            COALESCE(d.nome, '-') AS digitador_nome
+        FROM operacoes o
+        JOIN clientes c ON c.id = o.cliente_id
+        LEFT JOIN usuarios u ON u.id = c.vendedor_id
+        LEFT JOIN usuarios d ON d.id = o.digitador_id
+        WHERE {where_clause}
+        ORDER BY o.criado_em DESC
+    """, tuple(params))
+
+    return [
+        hydrate_operation_payload(operation)
+        for operation in cursor.fetchall()
+    ]
+
+
+PIPELINE_DELTA_MAX_CHANGES = 1000
+# Rows are read by updated_at, which MySQL stamps when the statement runs and
+# not when it commits; every cursor re-reads this window so a slow commit is
+# never skipped. Re-sent operations are plain upserts for the client.
+PIPELINE_DELTA_OVERLAP_SECONDS = 5
+PIPELINE_TOMBSTONE_RETENTION_DAYS = 7
+
+
+def encode_pipeline_cursor(value):
+    raw = value.strftime("%Y-%m-%dT%H:%M:%S.%f")
+    return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_pipeline_cursor(value):
+    text = str(value or "").strip()
+    padding = "=" * ((4 - (len(text) % 4)) % 4)
+    try:
+        raw = base64.urlsafe_b64decode((text + padding).encode("ascii")).decode("ascii")
+    except (ValueError, UnicodeError):
+        raise ValueError("cursor invalido")
+    return datetime.strptime(raw, "%Y-%m-%dT%H:%M:%S.%f")
+
+
+def touch_client_operations(cursor, client_id):
+    # Pipeline rows embed client data (name, CPF, seller), so a client edit
+    # has to move updated_at of its operations for ETags and since= cursors.
+    cursor.execute(
+        "UPDATE operacoes SET updated_at = CURRENT_TIMESTAMP(6) WHERE cliente_id = %s",
+        (client_id,),
+    )
+
+
+def record_operation_tombstones(cursor, where_clause, params):
+    # Must run before the operacoes rows are deleted, or before they move to
+    # another seller or product: the delta only reads changed rows inside the
+    # caller's apply_pipeline_owner_scope, so a row leaving it is announced here.
+    cursor.execute(
+        f"""
+        INSERT INTO operation_tombstones (operation_id, empresa_id, vendedor_id)
+        SELECT o.id, o.empresa_id, c.vendedor_id
+        FROM operacoes o
+        LEFT JOIN clientes c ON c.id = o.cliente_id
+        WHERE {where_clause}
+        """,
+        tuple(params),
+    )
+    cursor.execute(
+        """
+        DELETE FROM operation_tombstones
+        WHERE deleted_at < NOW(6) - INTERVAL %s DAY
+        LIMIT 500
+        """,
+        (PIPELINE_TOMBSTONE_RETENTION_DAYS,),
+    )
+
 
-    data = request.get_json() or {}
-    nova_fase = data.get("fase")
+def fetch_pipeline_delta(cursor, role, user_id, where_clause, params, since):
+    cursor.execute("SELECT NOW(6) AS db_now")
+    db_now = (cursor.fetchone() or {}).get("db_now") or datetime.now()
+    next_since = db_now - timedelta(seconds=PIPELINE_DELTA_OVERLAP_SECONDS)
+    if since is not None:
+        next_since = max(next_since, since)
 
-    db = get_db()
-    cursor = db.cursor()
+    full_snapshot = {
+        "mode": "full",
+        "removed": [],
+        "cursor": encode_pipeline_cursor(next_since),
+    }
+    if since is None or since < db_now - timedelta(days=PIPELINE_TOMBSTONE_RETENTION_DAYS):
+        full_snapshot["operations"] = fetch_pipeline_operations(cursor, where_clause, params)
+        return full_snapshot
+
+    # Everything that changed inside the caller's company/product/seller
+    # scope, flagged with whether it still belongs to the caller's pipeline.
+    # Operations that left the pipeline (approved, rejected, taken by another
+    # digitador) are removed; ones that left the scope come from tombstones.
+    changed_conditions = ["o.updated_at > %s"]
+    changed_params = [since]
+    apply_pipeline_owner_scope(role, user_id, changed_conditions, changed_params)
+    cursor.execute(
+        f"""
+        SELECT
+            o.id,
+            CASE WHEN {where_clause} THEN 1 ELSE 0 END AS in_pipeline
+        FROM operacoes o
+        JOIN clientes c ON c.id = o.cliente_id
+        WHERE {' AND '.join(changed_conditions)}
+        LIMIT %s
+        """,
+        (*params, *changed_params, PIPELINE_DELTA_MAX_CHANGES + 1),
+    )
+    changed_rows = cursor.fetchall()
+    if len(changed_rows) > PIPELINE_DELTA_MAX_CHANGES:
+        full_snapshot["operations"] = fetch_pipeline_operations(cursor, where_clause, params)
+        return full_snapshot
+
+    upsert_ids = [to_int(row.get("id")) for row in changed_rows if to_int(row.get("in_pipeline"))]
+    removed_ids = {to_int(row.get("id")) for row in changed_rows if not to_int(row.get("in_pipeline"))}
+
+    # Same company/seller predicate as build_pipeline_scope, so a vendedor is
+    # never handed ids of operations deleted from other sellers' clients.
+    tombstone_conditions = ["t.deleted_at > %s"]
+    tombstone_params = [since]
+    apply_company_scope(role, tombstone_conditions, tombstone_params, "t.empresa_id")
+    if role == ROLE_VENDOR:
+        tombstone_conditions.append("t.vendedor_id = %s")
+        tombstone_params.append(user_id)
+    cursor.execute(
+        f"""
+        SELECT DISTINCT t.operation_id
+        FROM operation_tombstones t
+        WHERE {' AND '.join(tombstone_conditions)}
+        """,
+        tuple(tombstone_params),
+    )
+    removed_ids.update(to_int(row.get("operation_id")) for row in cursor.fetchall())
 
-    cursor.execute("""
-        UPDATE clientes
-        SET fase=%s
-        WHERE id=%s
-    """, (nova_fase, client_id))
+    operations = []
+    if upsert_ids:
+        id_placeholders = ", ".join(["%s"] * len(upsert_ids))
+        operations = fetch_pipeline_operations(
+            cursor,
+            f"{where_clause} AND o.id IN ({id_placeholders})",
+            [*params, *upsert_ids],
+        )
+    removed_ids -= {to_int(operation.get("id")) for operation in operations}
 
-    db.commit()
-    cursor.close()
-    db.close()
+    return {
+        "mode": "delta",
+        "operations": operations,
+        "removed": sorted(removed_ids),
+        "cursor": encode_pipeline_cursor(next_since),
+    }
 
-    return jsonify({"message": "Fase atualizada com sucesso"}), 200
 
+def fetch_pipeline_etag(cursor, role, user_id, where_clause, params):
+    # Fingerprint of the caller's pipeline: one aggregate over the same scope
+    # the listing uses. updated_at is bumped by MySQL on every operation
+    # write; XOR-ing a CRC of (id, updated_at) catches an operation entering
+    # while another one leaves, and a write that commits with an updated_at
+    # older than the current maximum. The scope itself is part of the tag.
+    cursor.execute(
+        f"""
+        SELECT
+            COUNT(*) AS total,
+            MAX(o.updated_at) AS last_updated_at,
+            COALESCE(BIT_XOR(CRC32(CONCAT_WS('|', o.id, o.updated_at))), 0) AS ids_xor
+        FROM operacoes o
+        JOIN clientes c ON c.id = o.cliente_id
+        WHERE {where_clause}
+        """,
+        tuple(params),
+    )
+    row = cursor.fetchone() or {}
+    last_updated_at = row.get("last_updated_at")
+    fingerprint = "|".join(
+        [
+            role,
+            str(user_id),
+            str(current_user_company_id()),
+            str(to_int(row.get("total"))),
+            last_updated_at.isoformat() if isinstance(last_updated_at, datetime) else "",
+            str(to_int(row.get("ids_xor"))),
+        ]
+    )
+    return "pipeline-" + hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()
 
-# ======================================================
-# Ã°Å¸â€œâ€ž ADMIN - LISTAR ESTEIRA
-# ======================================================
 
 @clients_bp.route("/operations/pipeline", methods=["GET"])
 @jwt_required()
@@ -4751,6 +6189,15 @@ def get_pipeline():
     if role not in PIPELINE_ALLOWED_ROLES:
         return jsonify({"error": "Acesso restrito"}), 403
 
+    since_text = normalize_text(request.args.get("since"))
+    delta_requested = bool(since_text) or normalize_optional_boolean(request.args.get("delta"))
+    since = None
+    if since_text:
+        try:
+            since = decode_pipeline_cursor(since_text)
+        except ValueError:
+            return jsonify({"error": "Cursor invalido"}), 400
+
     db = None
     cursor = None
 
@@ -4759,89 +6206,29 @@ def get_pipeline():
         cursor = db.cursor(dictionary=True)
         ensure_operations_extra_columns(cursor, db)
 
-        status_placeholders = ", ".join(["%s"] * len(PIPELINE_ACTIVE_STATUSES_WITH_LEGACY))
-        conditions = [
-            f"o.status IN ({status_placeholders})",
-            """(
-                o.status NOT IN ('PRONTA_DIGITAR', 'PENDENTE')
-                OR o.enviada_esteira_em IS NOT NULL
-            )""",
-        ]
-        params = list(PIPELINE_ACTIVE_STATUSES_WITH_LEGACY)
-        apply_company_scope(role, conditions, params, "o.empresa_id")
-        apply_role_product_scope(role, conditions, params, "o.produto")
-
-        if role == ROLE_VENDOR:
-            conditions.append("c.vendedor_id = %s")
-            params.append(user_id)
-        elif is_digitador_role(role) and not has_full_company_operation_scope(role):
-            ready_placeholders = ", ".join(
-                ["%s"] * len(PIPELINE_READY_VISIBLE_STATUSES_WITH_LEGACY)
-            )
-            conditions.append(
-                f"""(
-                    UPPER(o.status) IN ({ready_placeholders})
-                    OR o.digitador_id = %s
-                )"""
-            )
-            params.extend(PIPELINE_READY_VISIBLE_STATUSES_WITH_LEGACY)
-            params.append(user_id)
-
+        conditions, params = build_pipeline_scope(role, user_id)
         where_clause = " AND ".join(conditions)
 
-        cursor.execute(f"""
-            SELECT 
-                o.id,
-                o.produto,
-                o.banco_digitacao,
-                o.margem,
-                o.valor_solicitado,
-                o.parcela_solicitada,
-                o.valor_liberado,
-                o.troco,
-                o.parcela_liberada,
-                o.promotora,
-                o.numero_proposta,
-                o.status_andamento,
-                o.enviada_esteira_em,
-                o.link_formalizacao,
-                o.devolvida_em,
-                o.formalizado_em,
-                o.pendencia_tipo,
-                o.pendencia_motivo,
-                o.pendencia_aberta_em,
-                o.pendencia_resposta_vendedor,
-                o.pendencia_respondida_em,
-                o.motivo_reprovacao,
-                o.ficha_portabilidade,
-                o.prazo,
-                o.status,
-                o.digitador_id,
-                o.criado_em,
-                c.id as cliente_id,
-                c.nome,
-                c.cpf,
-                c.numero_beneficio,
-                c.vendedor_id,
-                COALESCE(u.nome, '-') AS vendedor_nome,
-                COALESCE(d.nome, '-') AS digitador_nome
-            FROM operacoes o
-            JOIN clientes c ON c.id = o.cliente_id
-            LEFT JOIN usuarios u ON u.id = c.vendedor_id
-            LEFT JOIN usuarios d ON d.id = o.digitador_id
-            WHERE {where_clause}
-            ORDER BY o.criado_em DESC
-        """, tuple(params))
-
-        operations = [
-            hydrate_operation_payload(operation)
-            for operation in cursor.fetchall()
-        ]
-
-        for operation in operations:
-            operation["status"] = normalize_operation_status(operation.get("status"))
+        # The ETag covers both modes, so an unchanged poll costs one aggregate
+        # and a bodyless 304 even when it carries a since= cursor.
+        etag = fetch_pipeline_etag(cursor, role, user_id, where_clause, params)
+        if request.if_none_match.contains_weak(etag):
+            response = make_response("", 304)
+            response.set_etag(etag, weak=True)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+
+        # delta=1 (or since=<cursor>) answers {mode, operations, removed,
+        # cursor}; without it the endpoint keeps returning the plain array.
+        if delta_requested:
+            payload = fetch_pipeline_delta(cursor, role, user_id, where_clause, params, since)
+        else:
+            payload = fetch_pipeline_operations(cursor, where_clause, params)
 
-        return jsonify(operations), 200
+        response = make_response(jsonify(payload), 200)
+        response.set_etag(etag, weak=True)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
     except mysql.connector.Error as exc:
         if is_transient_db_connection_error(exc):
             current_app.logger.warning("Falha temporaria ao carregar esteira: %s", exc)
@@ -5052,6 +6439,23 @@ def get_operations_report():
 # Ã°Å¸â€œÅ  ADMIN - ESTATÃƒÂSTICAS DA ESTEIRA
 # ======================================================
 
+def build_operations_stats_period(period, today):
+    # [start, end) ranges instead of DATE()/YEARWEEK()/MONTH() on criado_em,
+    # so the created-at indexes can serve the stats query.
+    start = datetime(today.year, today.month, today.day)
+    if period == "day":
+        return start, start + timedelta(days=1)
+    if period == "week":
+        week_start = start - timedelta(days=start.weekday())
+        return week_start, week_start + timedelta(days=7)
+    if period == "month":
+        month_start = datetime(today.year, today.month, 1)
+        if today.month == 12:
+            return month_start, datetime(today.year + 1, 1, 1)
+        return month_start, datetime(today.year, today.month + 1, 1)
+    return None
+
+
 @clients_bp.route("/operations/stats", methods=["GET"])
 @jwt_required()
 def get_operations_stats():
@@ -5061,22 +6465,20 @@ def get_operations_stats():
         return jsonify({"error": "Acesso restrito"}), 403
 
     period = request.args.get("period", "day")
+    period_range = build_operations_stats_period(period, date.today())
+    if period_range is None:
+        return jsonify({"error": "PerÃƒÂ­odo invÃƒÂ¡lido"}), 400
 
     db = get_db()
     cursor = db.cursor(dictionary=True)
     ensure_operations_extra_columns(cursor, db)
 
-    if period == "day":
-        date_filter = "DATE(o.criado_em) = CURDATE()"
-    elif period == "week":
-        date_filter = "YEARWEEK(o.criado_em, 1) = YEARWEEK(CURDATE(), 1)"
-    elif period == "month":
-        date_filter = "MONTH(o.criado_em) = MONTH(CURDATE()) AND YEAR(o.criado_em)=YEAR(CURDATE())"
-    else:
-        return jsonify({"error": "PerÃƒÂ­odo invÃƒÂ¡lido"}), 400
-
+    stats_where, stats_params = combine_conditions(
+        build_created_period_conditions(*period_range),
+        build_dashboard_scope(role, current_user_company_id()),
+    )
     active_status_placeholders = ", ".join(
-        ["%s"] * len(PIPELINE_ACTIVE_STATUSES_WITH_LEGACY)
+        ["%s"] * len(PIPELINE_ACTIVE_STATUSES)
     )
     cursor.execute(
         f"""
@@ -5086,7 +6488,7 @@ def get_operations_stats():
                 CASE
                     WHEN o.status IN ({active_status_placeholders})
                          AND (
-                            o.status NOT IN ('PRONTA_DIGITAR', 'PENDENTE')
+                            o.status <> 'PRONTA_DIGITAR'
                             OR o.enviada_esteira_em IS NOT NULL
                          ) THEN 1
                     ELSE 0
@@ -5094,15 +6496,9 @@ def get_operations_stats():
             ) as em_analise,
             SUM(CASE WHEN o.status='REPROVADO' THEN 1 ELSE 0 END) as reprovados
         FROM operacoes o
-        WHERE {date_filter}
-          {"AND o.empresa_id = %s" if role != ROLE_GLOBAL else ""}
+        WHERE {stats_where}
         """,
-        tuple(
-            [
-                *PIPELINE_ACTIVE_STATUSES_WITH_LEGACY,
-                *([] if role == ROLE_GLOBAL else [current_user_company_id()]),
-            ]
-        ),
+        tuple([*PIPELINE_ACTIVE_STATUSES, *stats_params]),
     )
 
     stats = cursor.fetchone()
@@ -5145,34 +6541,18 @@ def get_dashboard_summary():
     try:
         ensure_dashboard_goals_table(cursor, db)
 
-        sent_statuses = PIPELINE_ACTIVE_STATUSES_WITH_LEGACY + (
+        sent_statuses = PIPELINE_ACTIVE_STATUSES + (
             "APROVADO",
             "REPROVADO",
         )
         sent_status_placeholders = ", ".join(["%s"] * len(sent_statuses))
         allowed_role_products = () if has_full_company_operation_scope(role) else allowed_products_for_role(role)
-        role_product_clause = ""
-        role_product_params = []
-
-        if allowed_role_products:
-            role_product_placeholders = ", ".join(["%s"] * len(allowed_role_products))
-            role_product_clause = f" AND UPPER(o.produto) IN ({role_product_placeholders})"
-            role_product_params = list(allowed_role_products)
-
-        stats_params = list(sent_statuses) + [period_start, period_end]
-        vendor_clause = ""
-        company_clause = ""
-
-        if role != ROLE_GLOBAL:
-            company_clause = " AND o.empresa_id = %s"
-            stats_params.append(actor_company_id)
-
-        if selected_vendor_id:
-            vendor_clause = " AND c.vendedor_id = %s"
-            stats_params.append(selected_vendor_id)
-
-        stats_params.extend(role_product_params)
+        role_product_params = list(allowed_role_products)
+        scope = build_dashboard_scope(role, actor_company_id, selected_vendor_id)
+        created_in_period = build_created_period_conditions(period_start, period_end)
+        approved_in_period = build_approved_period_conditions(period_start, period_end)
 
+        stats_where, stats_params = combine_conditions(created_in_period, scope)
         cursor.execute(
             f"""
             SELECT
@@ -5181,7 +6561,7 @@ def get_dashboard_summary():
                     CASE
                         WHEN o.status IN ({sent_status_placeholders})
                              AND (
-                                o.status NOT IN ('PRONTA_DIGITAR', 'PENDENTE')
+                                o.status <> 'PRONTA_DIGITAR'
                                 OR o.enviada_esteira_em IS NOT NULL
                              ) THEN 1
                         ELSE 0
@@ -5189,28 +6569,13 @@ def get_dashboard_summary():
                 ) AS sent_to_pipeline
             FROM operacoes o
             JOIN clientes c ON c.id = o.cliente_id
-            WHERE o.criado_em >= %s
-              AND o.criado_em < %s
-              {company_clause}
-              {vendor_clause}
-              {role_product_clause}
+            WHERE {stats_where}
             """,
-            tuple(stats_params),
+            tuple([*sent_statuses, *stats_params]),
         )
         stats_row = cursor.fetchone() or {}
 
-        approved_params = [period_start, period_end]
-        approved_vendor_clause = ""
-
-        if role != ROLE_GLOBAL:
-            approved_params.append(actor_company_id)
-
-        if selected_vendor_id:
-            approved_vendor_clause = " AND c.vendedor_id = %s"
-            approved_params.append(selected_vendor_id)
-
-        approved_params.extend(role_product_params)
-
+        approved_where, approved_params = combine_conditions(approved_in_period, scope)
         cursor.execute(
             f"""
             SELECT
@@ -5223,66 +6588,35 @@ def get_dashboard_summary():
                 ) AS approved_value
             FROM operacoes o
             JOIN clientes c ON c.id = o.cliente_id
-            WHERE o.status = 'APROVADO'
-              AND COALESCE(o.data_pagamento, o.criado_em) >= %s
-              AND COALESCE(o.data_pagamento, o.criado_em) < %s
-              {company_clause}
-              {approved_vendor_clause}
-              {role_product_clause}
+            WHERE {approved_where}
             """,
             tuple(approved_params),
         )
         approved_row = cursor.fetchone() or {}
 
-        pipeline_status_placeholders = ", ".join(
-            ["%s"] * len(PIPELINE_ACTIVE_STATUSES_WITH_LEGACY)
+        pipeline_where, pipeline_params = combine_conditions(
+            build_active_pipeline_conditions(),
+            scope,
         )
-        pipeline_params = list(PIPELINE_ACTIVE_STATUSES_WITH_LEGACY)
-        pipeline_vendor_clause = ""
-
-        if role != ROLE_GLOBAL:
-            pipeline_params.append(actor_company_id)
-
-        if selected_vendor_id:
-            pipeline_vendor_clause = " AND c.vendedor_id = %s"
-            pipeline_params.append(selected_vendor_id)
-
-        pipeline_params.extend(role_product_params)
-
         cursor.execute(
             f"""
             SELECT COUNT(*) AS in_pipeline
             FROM operacoes o
             JOIN clientes c ON c.id = o.cliente_id
-            WHERE o.status IN ({pipeline_status_placeholders})
-              AND (
-                  o.status NOT IN ('PRONTA_DIGITAR', 'PENDENTE')
-                  OR o.enviada_esteira_em IS NOT NULL
-              )
-              {company_clause}
-              {pipeline_vendor_clause}
-              {role_product_clause}
+            WHERE {pipeline_where}
             """,
             tuple(pipeline_params),
         )
         pipeline_row = cursor.fetchone() or {}
 
-        series_params = [year]
-        series_vendor_clause = ""
-
-        if role != ROLE_GLOBAL:
-            series_params.append(actor_company_id)
-
-        if selected_vendor_id:
-            series_vendor_clause = " AND c.vendedor_id = %s"
-            series_params.append(selected_vendor_id)
-
-        series_params.extend(role_product_params)
-
+        series_where, series_params = combine_conditions(
+            build_approved_period_conditions(datetime(year, 1, 1), datetime(year + 1, 1, 1)),
+            scope,
+        )
         cursor.execute(
             f"""
             SELECT
-                MONTH(COALESCE(o.data_pagamento, o.criado_em)) AS month_num,
+                MONTH(o.data_efetiva) AS month_num,
                 COALESCE(
                     SUM(
                         COALESCE(o.valor_liberado, o.valor_solicitado, 0)
@@ -5291,12 +6625,8 @@ def get_dashboard_summary():
                 ) AS total
             FROM operacoes o
             JOIN clientes c ON c.id = o.cliente_id
-            WHERE o.status = 'APROVADO'
-              AND YEAR(COALESCE(o.data_pagamento, o.criado_em)) = %s
-              {company_clause}
-              {series_vendor_clause}
-              {role_product_clause}
-            GROUP BY MONTH(COALESCE(o.data_pagamento, o.criado_em))
+            WHERE {series_where}
+            GROUP BY MONTH(o.data_efetiva)
             """,
             tuple(series_params),
         )
@@ -5315,23 +6645,11 @@ def get_dashboard_summary():
             for i in range(1, 13)
         ]
 
-        approved_by_product_params = [period_start, period_end]
-        approved_by_product_vendor_clause = ""
-
-        if role != ROLE_GLOBAL:
-            approved_by_product_params.append(actor_company_id)
-
-        if selected_vendor_id:
-            approved_by_product_vendor_clause = " AND c.vendedor_id = %s"
-            approved_by_product_params.append(selected_vendor_id)
-
-        approved_by_product_params.extend(role_product_params)
-
         cursor.execute(
             f"""
             SELECT
-                UPPER(TRIM(COALESCE(o.produto, ''))) AS product_key,
-                COALESCE(NULLIF(TRIM(o.produto), ''), 'SEM_PRODUTO') AS product_label,
+                COALESCE(o.produto, '') AS product_key,
+                COALESCE(NULLIF(o.produto, ''), 'SEM_PRODUTO') AS product_label,
                 COUNT(*) AS approved_operations,
                 COALESCE(
                     SUM(
@@ -5341,18 +6659,13 @@ def get_dashboard_summary():
                 ) AS approved_value
             FROM operacoes o
             JOIN clientes c ON c.id = o.cliente_id
-            WHERE o.status = 'APROVADO'
-              AND COALESCE(o.data_pagamento, o.criado_em) >= %s
-              AND COALESCE(o.data_pagamento, o.criado_em) < %s
-              {company_clause}
-              {approved_by_product_vendor_clause}
-              {role_product_clause}
+            WHERE {approved_where}
             GROUP BY
-                UPPER(TRIM(COALESCE(o.produto, ''))),
-                COALESCE(NULLIF(TRIM(o.produto), ''), 'SEM_PRODUTO')
+                COALESCE(o.produto, ''),
+                COALESCE(NULLIF(o.produto, ''), 'SEM_PRODUTO')
             ORDER BY approved_value DESC, product_label ASC
             """,
-            tuple(approved_by_product_params),
+            tuple(approved_params),
         )
         approved_by_product_rows = cursor.fetchall()
         approved_by_product = [
@@ -5372,7 +6685,7 @@ def get_dashboard_summary():
                     """
                     SELECT id, nome
                     FROM usuarios
-                    WHERE UPPER(role) = 'VENDEDOR'
+                    WHERE role = 'VENDEDOR'
                     ORDER BY nome ASC
                     """
                 )
@@ -5381,7 +6694,7 @@ def get_dashboard_summary():
                     """
                     SELECT id, nome
                     FROM usuarios
-                    WHERE UPPER(role) = 'VENDEDOR'
+                    WHERE role = 'VENDEDOR'
                       AND empresa_id = %s
                     ORDER BY nome ASC
                     """,
@@ -5401,9 +6714,9 @@ def get_dashboard_summary():
                     FROM usuarios u
                     JOIN clientes c ON c.vendedor_id = u.id
                     JOIN operacoes o ON o.cliente_id = c.id
-                    WHERE UPPER(u.role) = 'VENDEDOR'
+                    WHERE u.role = 'VENDEDOR'
                       AND o.empresa_id = %s
-                      AND UPPER(o.produto) IN ({role_vendor_placeholders})
+                      AND o.produto IN ({role_vendor_placeholders})
                     ORDER BY u.nome ASC
                     """,
                     tuple([actor_company_id, *role_product_params]),
@@ -5414,7 +6727,7 @@ def get_dashboard_summary():
                     """
                     SELECT id, nome
                     FROM usuarios
-                    WHERE UPPER(role) = 'VENDEDOR'
+                    WHERE role = 'VENDEDOR'
                       AND empresa_id = %s
                     ORDER BY nome ASC
                     """,
@@ -5423,29 +6736,9 @@ def get_dashboard_summary():
                 vendors = cursor.fetchall()
 
         vendor_stats_pipeline_placeholders = ", ".join(
-            ["%s"] * len(PIPELINE_ACTIVE_STATUSES_WITH_LEGACY)
+            ["%s"] * len(PIPELINE_ACTIVE_STATUSES)
         )
-        vendor_stats_params = [
-            *PIPELINE_ACTIVE_STATUSES_WITH_LEGACY,
-            period_start,
-            period_end,
-            period_start,
-            period_end,
-            period_start,
-            period_end,
-        ]
-        vendor_stats_clause = ""
-
-        if role != ROLE_GLOBAL:
-            vendor_stats_clause = " AND o.empresa_id = %s"
-            vendor_stats_params.append(actor_company_id)
-
-        if selected_vendor_id:
-            vendor_stats_clause = f"{vendor_stats_clause} AND c.vendedor_id = %s"
-            vendor_stats_params.append(selected_vendor_id)
-
-        vendor_stats_params.extend(role_product_params)
-
+        vendor_stats_where, vendor_stats_params = combine_conditions(created_in_period, scope)
         cursor.execute(
             f"""
             SELECT
@@ -5456,7 +6749,7 @@ def get_dashboard_summary():
                     CASE
                         WHEN o.status IN ({vendor_stats_pipeline_placeholders})
                              AND (
-                                o.status NOT IN ('PRONTA_DIGITAR', 'PENDENTE')
+                                o.status <> 'PRONTA_DIGITAR'
                                 OR o.enviada_esteira_em IS NOT NULL
                              ) THEN 1
                         ELSE 0
@@ -5465,8 +6758,8 @@ def get_dashboard_summary():
                 SUM(
                     CASE
                         WHEN o.status = 'APROVADO'
-                             AND COALESCE(o.data_pagamento, o.criado_em) >= %s
-                             AND COALESCE(o.data_pagamento, o.criado_em) < %s
+                             AND o.data_efetiva >= %s
+                             AND o.data_efetiva < %s
                         THEN 1
                         ELSE 0
                     END
@@ -5475,8 +6768,8 @@ def get_dashboard_summary():
                     SUM(
                         CASE
                             WHEN o.status = 'APROVADO'
-                                 AND COALESCE(o.data_pagamento, o.criado_em) >= %s
-                                 AND COALESCE(o.data_pagamento, o.criado_em) < %s
+                                 AND o.data_efetiva >= %s
+                                 AND o.data_efetiva < %s
                             THEN COALESCE(o.valor_liberado, o.valor_solicitado, 0)
                             ELSE 0
                         END
@@ -5486,14 +6779,20 @@ def get_dashboard_summary():
             FROM operacoes o
             JOIN clientes c ON c.id = o.cliente_id
             LEFT JOIN usuarios u ON u.id = c.vendedor_id
-            WHERE o.criado_em >= %s
-              AND o.criado_em < %s
-              {vendor_stats_clause}
-              {role_product_clause}
+            WHERE {vendor_stats_where}
             GROUP BY c.vendedor_id, u.nome
             ORDER BY u.nome ASC
             """,
-            tuple(vendor_stats_params),
+            tuple(
+                [
+                    *PIPELINE_ACTIVE_STATUSES,
+                    period_start,
+                    period_end,
+                    period_start,
+                    period_end,
+                    *vendor_stats_params,
+                ]
+            ),
         )
         vendor_stats_rows = cursor.fetchall()
         vendors_product_stats = [
@@ -5516,7 +6815,7 @@ def get_dashboard_summary():
                 SELECT id, nome, empresa_id
                 FROM usuarios
                 WHERE id = %s
-                  AND UPPER(role) = 'VENDEDOR'
+                  AND role = 'VENDEDOR'
                   AND (%s = 0 OR empresa_id = %s)
                 LIMIT 1
                 """,
@@ -5635,7 +6934,7 @@ def get_sales_board():
             if not company:
                 return jsonify({"error": "Empresa nao encontrada"}), 404
 
-        vendor_conditions = ["UPPER(u.role) = 'VENDEDOR'"]
+        vendor_conditions = ["u.role = 'VENDEDOR'"]
         vendor_params = []
         if selected_company_id > 0:
             vendor_conditions.append("u.empresa_id = %s")
@@ -5711,17 +7010,16 @@ def get_sales_board():
             if 1 <= to_int(row.get("month")) <= 12
         }
 
-        approved_scope_clause = ""
-        approved_scope_params = [year_start, year_end]
-        if selected_company_id > 0:
-            approved_scope_clause = " AND o.empresa_id = %s"
-            approved_scope_params.append(selected_company_id)
-
+        company_scope = build_sales_board_scope(selected_company_id)
+        approved_where, approved_params = combine_conditions(
+            build_approved_period_conditions(year_start, year_end),
+            company_scope,
+        )
         cursor.execute(
             f"""
             SELECT
                 c.vendedor_id,
-                MONTH(COALESCE(o.data_pagamento, o.criado_em)) AS month_num,
+                MONTH(o.data_efetiva) AS month_num,
                 COUNT(*) AS paid_count,
                 COALESCE(
                     SUM(COALESCE(o.valor_liberado, o.valor_solicitado, 0)),
@@ -5729,13 +7027,10 @@ def get_sales_board():
                 ) AS approved_value
             FROM operacoes o
             JOIN clientes c ON c.id = o.cliente_id
-            WHERE o.status = 'APROVADO'
-              AND COALESCE(o.data_pagamento, o.criado_em) >= %s
-              AND COALESCE(o.data_pagamento, o.criado_em) < %s
-              {approved_scope_clause}
-            GROUP BY c.vendedor_id, MONTH(COALESCE(o.data_pagamento, o.criado_em))
+            WHERE {approved_where}
+            GROUP BY c.vendedor_id, MONTH(o.data_efetiva)
             """,
-            tuple(approved_scope_params),
+            tuple(approved_params),
         )
         approved_rows = cursor.fetchall() or []
 
@@ -5754,25 +7049,18 @@ def get_sales_board():
                 row.get("paid_count")
             )
 
-        total_realized_scope_clause = ""
-        if selected_company_id > 0:
-            total_realized_scope_clause = " AND o.empresa_id = %s"
-
-        total_realized_month_params = [period_start, period_end]
-        if selected_company_id > 0:
-            total_realized_month_params.append(selected_company_id)
-
+        total_realized_where, total_realized_params = combine_conditions(
+            build_approved_period_conditions(period_start, period_end),
+            company_scope,
+        )
         cursor.execute(
             f"""
             SELECT
                 COALESCE(SUM(COALESCE(o.valor_liberado, o.valor_solicitado, 0)), 0) AS total
             FROM operacoes o
-            WHERE o.status = 'APROVADO'
-              AND COALESCE(o.data_pagamento, o.criado_em) >= %s
-              AND COALESCE(o.data_pagamento, o.criado_em) < %s
-              {total_realized_scope_clause}
+            WHERE {total_realized_where}
             """,
-            tuple(total_realized_month_params),
+            tuple(total_realized_params),
         )
         total_realized_month = round(to_number((cursor.fetchone() or {}).get("total")), 2)
 
@@ -6027,6 +7315,94 @@ def upsert_dashboard_goal():
 # NOTIFICACOES DE OPERACOES
 # ======================================================
 
+NOTIFICATION_STREAM_BATCH = 50
+
+
+def serialize_user_notification(item):
+    previous_status = item.get("previous_status")
+    item["previous_status"] = (
+        normalize_operation_status(previous_status) if previous_status else None
+    )
+    item["next_status"] = normalize_operation_status(item.get("next_status"))
+    item["read"] = item.get("read_at") is not None
+    return item
+
+
+def drop_inaccessible_notification_links(notifications):
+    # A notification outlives the access that produced it (client handed to
+    # another vendedor, role changed), so links to operations the user can
+    # no longer open are dropped instead of leading to a 403.
+    accessible_ids = filter_accessible_operations(
+        [item.get("operation_id") for item in notifications]
+    )
+    for item in notifications:
+        if item.get("operation_id") and to_int(item.get("operation_id")) not in accessible_ids:
+            item["operation_id"] = None
+            item["cliente_id"] = None
+    return notifications
+
+
+def read_notification_stream_updates(user_id, after_id, include_count=False):
+    # Runs on its own short-lived connection: the request-shared one from
+    # get_db() would stay checked out for the whole life of the stream.
+    db = get_db(dedicated=True)
+    cursor = db.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            """
+            SELECT
+                n.id,
+                n.operation_id,
+                o.cliente_id,
+                n.previous_status,
+                n.next_status,
+                n.title,
+                n.message,
+                n.read_at,
+                n.created_at
+            FROM operation_notifications n
+            LEFT JOIN operacoes o ON o.id = n.operation_id
+            WHERE n.user_id = %s
+              AND n.id > %s
+            ORDER BY n.id ASC
+            LIMIT %s
+            """,
+            (user_id, after_id, NOTIFICATION_STREAM_BATCH),
+        )
+        notifications = [serialize_user_notification(item) for item in cursor.fetchall()]
+
+        unread_count = None
+        if notifications or include_count:
+            unread_count = read_unread_notification_count(cursor, user_id)
+        return notifications, unread_count
+    finally:
+        cursor.close()
+        db.close()
+
+
+def read_latest_notification_id(user_id):
+    db = get_db(dedicated=True)
+    cursor = db.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            "SELECT COALESCE(MAX(id), 0) AS last_id FROM operation_notifications WHERE user_id = %s",
+            (user_id,),
+        )
+        return to_int((cursor.fetchone() or {}).get("last_id"))
+    finally:
+        cursor.close()
+        db.close()
+
+
+def format_sse_event(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json_dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
 @clients_bp.route("/notifications", methods=["GET"])
 @jwt_required()
 def list_user_notifications():
@@ -6076,23 +7452,10 @@ def list_user_notifications():
         notifications = cursor.fetchall()
 
         for item in notifications:
-            previous_status = item.get("previous_status")
-            item["previous_status"] = (
-                normalize_operation_status(previous_status) if previous_status else None
-            )
-            item["next_status"] = normalize_operation_status(item.get("next_status"))
-            item["read"] = item.get("read_at") is not None
+            serialize_user_notification(item)
+        drop_inaccessible_notification_links(notifications)
 
-        cursor.execute(
-            """
-            SELECT COUNT(*) AS unread_count
-            FROM operation_notifications
-            WHERE user_id = %s
-              AND read_at IS NULL
-            """,
-            (user_id,),
-        )
-        unread_count = to_int((cursor.fetchone() or {}).get("unread_count"))
+        unread_count = read_unread_notification_count(cursor, user_id)
 
         return jsonify(
             {
@@ -6133,17 +7496,7 @@ def get_user_notifications_unread_count():
     try:
         db = get_db()
         cursor = db.cursor(dictionary=True)
-        ensure_operation_notifications_table(cursor, db)
-        cursor.execute(
-            """
-            SELECT COUNT(*) AS unread_count
-            FROM operation_notifications
-            WHERE user_id = %s
-              AND read_at IS NULL
-            """,
-            (user_id,),
-        )
-        unread_count = to_int((cursor.fetchone() or {}).get("unread_count"))
+        unread_count = read_unread_notification_count(cursor, user_id)
 
         return jsonify(
             {
@@ -6166,6 +7519,113 @@ def get_user_notifications_unread_count():
             db.close()
 
 
+@clients_bp.route("/notifications/stream", methods=["GET"])
+@jwt_required()
+def stream_user_notifications():
+    user_id = current_user_id()
+    last_event_id = to_int(
+        request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    )
+
+    # Each open stream pins one worker thread, so streams are capped per
+    # worker; past the cap the frontend keeps polling /notifications.
+    if not acquire_notification_stream_slot(user_id):
+        response = jsonify(
+            {
+                "error": "Limite de conexoes de notificacao atingido",
+                "fallback": "poll",
+            }
+        )
+        response.status_code = 503
+        response.headers["Retry-After"] = "30"
+        return response
+
+    try:
+        if last_event_id <= 0:
+            last_event_id = read_latest_notification_id(user_id)
+    except Exception:
+        release_notification_stream_slot(user_id)
+        raise
+
+    # The JWT/auth checks may have checked out the request-shared connection;
+    # teardown only runs when the stream ends, so hand it back now. The
+    # generator reads on its own short-lived connections.
+    release_request_db()
+
+    def generate():
+        nonlocal last_event_id
+        try:
+            started = time.monotonic()
+            deadline = started + NOTIFICATIONS_STREAM_MAX_SECONDS
+            seen_version = notification_bus.version(user_id)
+            next_heartbeat = started + NOTIFICATIONS_STREAM_HEARTBEAT_SECONDS
+            next_recheck = started + NOTIFICATIONS_STREAM_RECHECK_SECONDS
+
+            yield "retry: 5000\n\n"
+
+            # Always send the unread badge first; a resumed connection also
+            # gets whatever arrived while it was disconnected.
+            notifications, unread_count = read_notification_stream_updates(
+                user_id, last_event_id, include_count=True
+            )
+            for item in notifications:
+                last_event_id = max(last_event_id, to_int(item.get("id")))
+                yield format_sse_event("notification", item, event_id=item.get("id"))
+            last_unread_count = unread_count
+            if unread_count is not None:
+                yield format_sse_event("unread", {"unread_count": unread_count})
+
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    return
+
+                timeout = min(next_heartbeat, next_recheck, deadline) - now
+                version = notification_bus.wait(user_id, seen_version, max(0.0, timeout))
+                now = time.monotonic()
+
+                if version != seen_version or now >= next_recheck:
+                    # A signal may be a mark-read from another tab, which
+                    # adds no rows but moves the badge, so it re-reads the count.
+                    signalled = version != seen_version
+                    seen_version = version
+                    next_recheck = now + NOTIFICATIONS_STREAM_RECHECK_SECONDS
+                    notifications, unread_count = read_notification_stream_updates(
+                        user_id, last_event_id, include_count=signalled
+                    )
+                    for item in notifications:
+                        last_event_id = max(last_event_id, to_int(item.get("id")))
+                        yield format_sse_event("notification", item, event_id=item.get("id"))
+                    if notifications or (unread_count is not None and unread_count != last_unread_count):
+                        last_unread_count = unread_count
+                        yield format_sse_event("unread", {"unread_count": unread_count})
+                        next_heartbeat = now + NOTIFICATIONS_STREAM_HEARTBEAT_SECONDS
+                        continue
+
+                if now >= next_heartbeat:
+                    next_heartbeat = now + NOTIFICATIONS_STREAM_HEARTBEAT_SECONDS
+                    yield ": ping\n\n"
+        except mysql.connector.Error as exc:
+            # Ending the stream is enough: the browser reconnects with
+            # Last-Event-ID and the frontend polls in the meantime.
+            current_app.logger.warning(
+                "Stream de notificacoes do usuario %s encerrado: %s",
+                user_id,
+                exc,
+            )
+
+    response = current_app.response_class(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+    )
+    # call_on_close also fires when the client goes away before the first
+    # chunk, which a finally block inside generate() would never see.
+    response.call_on_close(lambda: release_notification_stream_slot(user_id))
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
 @clients_bp.route("/notifications/<int:notification_id>/read", methods=["PUT"])
 @jwt_required()
 def mark_user_notification_as_read(notification_id):
@@ -6198,9 +7658,14 @@ def mark_user_notification_as_read(notification_id):
                 SET read_at = NOW()
                 WHERE id = %s
                   AND user_id = %s
+                  AND read_at IS NULL
                 """,
                 (notification_id, user_id),
             )
+            # rowcount guards against two tabs marking the same one at once.
+            if cursor.rowcount:
+                adjust_unread_notification_counters(cursor, {user_id: -cursor.rowcount})
+                queue_notification_event([user_id])
             db.commit()
 
         return jsonify({"message": "Notificacao marcada como lida"}), 200
@@ -6228,12 +7693,16 @@ def mark_all_user_notifications_as_read():
             """,
             (user_id,),
         )
+        updated = cursor.rowcount
+        if updated:
+            adjust_unread_notification_counters(cursor, {user_id: -updated})
+            queue_notification_event([user_id])
         db.commit()
 
         return jsonify(
             {
                 "message": "Notificacoes marcadas como lidas",
-                "updated": cursor.rowcount,
+                "updated": updated,
             }
         ), 200
     finally:
@@ -6245,6 +7714,18 @@ def mark_all_user_notifications_as_read():
 # DASHBOARD - NOTIFICACOES DO SINO
 # ======================================================
 
+def build_dashboard_notifications_scope(role, vendor_id):
+    conditions, params = build_active_pipeline_conditions()
+    apply_company_scope(role, conditions, params, "o.empresa_id")
+
+    if vendor_id:
+        conditions.append("c.vendedor_id = %s")
+        params.append(vendor_id)
+
+    apply_role_product_scope(role, conditions, params, "o.produto")
+    return conditions, params
+
+
 @clients_bp.route("/dashboard/notifications", methods=["GET"])
 @jwt_required()
 def get_dashboard_notifications():
@@ -6266,24 +7747,7 @@ def get_dashboard_notifications():
         db = get_db()
         cursor = db.cursor(dictionary=True)
         ensure_operations_extra_columns(cursor, db)
-        active_status_placeholders = ", ".join(
-            ["%s"] * len(PIPELINE_ACTIVE_STATUSES_WITH_LEGACY)
-        )
-        params = list(PIPELINE_ACTIVE_STATUSES_WITH_LEGACY)
-        conditions = [
-            f"o.status IN ({active_status_placeholders})",
-            """(
-                o.status NOT IN ('PRONTA_DIGITAR', 'PENDENTE')
-                OR o.enviada_esteira_em IS NOT NULL
-            )""",
-        ]
-        apply_company_scope(role, conditions, params, "o.empresa_id")
-
-        if vendor_id:
-            conditions.append("c.vendedor_id = %s")
-            params.append(vendor_id)
-
-        apply_role_product_scope(role, conditions, params, "o.produto")
+        conditions, params = build_dashboard_notifications_scope(role, vendor_id)
         where_clause = " AND ".join(conditions)
 
         cursor.execute(
@@ -1,29 +1,48 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
 
-from app.database import get_db
+from app.database import get_db, pool_stats
 from app.routes.clients import (
+    canonicalize_operation_row,
+    delete_client_operation_summary,
     deserialize_document_row_from_trash,
     ensure_documents_table,
     ensure_operation_comments_table,
     ensure_operation_notifications_table,
     ensure_operation_status_history_table,
     ensure_operations_extra_columns,
-    migrate_all_storage_documents_to_db,
+    fill_client_search_values,
+    record_operation_tombstones,
+    refresh_client_operation_summary,
+    select_client_documents_for_trash,
     serialize_document_row_for_trash,
-    sync_storage_documents_to_db,
+    strip_operation_generated_columns,
+    sync_legacy_documents_once,
 )
 from app.routes.users import ensure_user_profile_columns
+from app.services.document_migration import (
+    get_document_migration_job,
+    start_document_migration_job,
+)
 from app.utils.auth import current_user_id, current_user_role
+from app.utils.auth_cache import invalidate_user_auth_context
+from app.utils.notification_counters import (
+    adjust_unread_notification_counters,
+    release_unread_notifications,
+)
+from app.utils.notification_outbox import notification_outbox_stats
+from app.utils.recipient_directory import bump_recipient_directory_version
+from app.utils.search_index import index_client, unindex_client
 from app.utils.security import (
     ROLE_GLOBAL,
     add_to_trash,
     ensure_audit_logs_table,
     ensure_system_settings_table,
     ensure_trash_bin_table,
-    get_maintenance_state,
+    get_cached_maintenance_state,
     get_twofa_code_from_request,
     insert_row,
+    invalidate_maintenance_cache,
     json_loads,
     log_audit,
     row_to_insert_dict,
@@ -185,8 +204,11 @@ def delete_operation_record(cursor, operation_id, actor_id, actor_role, reason):
 
     cursor.execute("DELETE FROM operation_comments WHERE operation_id = %s", (operation_id,))
     cursor.execute("DELETE FROM operation_status_history WHERE operation_id = %s", (operation_id,))
+    release_unread_notifications(cursor, "operation_id = %s", (operation_id,))
     cursor.execute("DELETE FROM operation_notifications WHERE operation_id = %s", (operation_id,))
+    record_operation_tombstones(cursor, "o.id = %s", (operation_id,))
     cursor.execute("DELETE FROM operacoes WHERE id = %s", (operation_id,))
+    refresh_client_operation_summary(cursor, int(operation.get("cliente_id") or 0))
 
     log_audit(
         cursor,
@@ -280,21 +302,12 @@ def delete_client_record(cursor, db, client_id, actor_id, actor_role, reason):
         operation_notifications = cursor.fetchall()
 
     ensure_documents_table(cursor, db)
-    sync_storage_documents_to_db(
+    sync_legacy_documents_once(
         cursor,
         client_id,
         seller_id=int(client.get("vendedor_id") or 0) or None,
     )
-    cursor.execute(
-        """
-        SELECT *
-        FROM documentos
-        WHERE client_id = %s
-        ORDER BY id ASC
-        """,
-        (client_id,),
-    )
-    documents = cursor.fetchall()
+    documents = select_client_documents_for_trash(cursor, db, client_id)
 
     trash_id = add_to_trash(
         cursor,
@@ -325,14 +338,21 @@ def delete_client_record(cursor, db, client_id, actor_id, actor_role, reason):
             f"DELETE FROM operation_status_history WHERE operation_id IN ({placeholders})",
             tuple(operation_ids),
         )
+        release_unread_notifications(
+            cursor,
+            f"operation_id IN ({placeholders})",
+            tuple(operation_ids),
+        )
         cursor.execute(
             f"DELETE FROM operation_notifications WHERE operation_id IN ({placeholders})",
             tuple(operation_ids),
         )
 
+    record_operation_tombstones(cursor, "o.cliente_id = %s", (client_id,))
     cursor.execute("DELETE FROM operacoes WHERE cliente_id = %s", (client_id,))
     cursor.execute("DELETE FROM documentos WHERE client_id = %s", (client_id,))
     cursor.execute("DELETE FROM clientes WHERE id = %s", (client_id,))
+    delete_client_operation_summary(cursor, client_id)
 
     log_audit(
         cursor,
@@ -399,7 +419,7 @@ def delete_user_record(cursor, user_id, actor_id, actor_role, reason):
             """
             SELECT COUNT(*) AS total_globals
             FROM usuarios
-            WHERE UPPER(role) = %s
+            WHERE role = %s
             """,
             (ROLE_GLOBAL,),
         )
@@ -459,6 +479,7 @@ def delete_user_record(cursor, user_id, actor_id, actor_role, reason):
         reason=reason,
     )
     cursor.execute("DELETE FROM usuarios WHERE id = %s", (user_id,))
+    bump_recipient_directory_version(cursor, actor_id)
     log_audit(
         cursor,
         actor_id=actor_id,
@@ -487,7 +508,7 @@ def restore_operation_payload(cursor, payload):
     if not record_exists(cursor, "clientes", client_id):
         raise ValueError("Cliente da operacao nao existe para restauracao")
 
-    insert_row(cursor, "operacoes", operation)
+    insert_row(cursor, "operacoes", canonicalize_operation_row(strip_operation_generated_columns(operation)))
 
     comments = payload.get("comments") or []
     for item in comments:
@@ -506,13 +527,19 @@ def restore_operation_payload(cursor, payload):
         insert_row(cursor, "operation_status_history", row)
 
     notifications = payload.get("notifications") or []
+    unread_deltas = {}
     for item in notifications:
         if not isinstance(item, dict):
             continue
         row = dict(item)
         row.pop("id", None)
         insert_row(cursor, "operation_notifications", row)
+        if row.get("read_at") is None and row.get("user_id"):
+            user_id = int(row["user_id"])
+            unread_deltas[user_id] = unread_deltas.get(user_id, 0) + 1
+    adjust_unread_notification_counters(cursor, unread_deltas)
 
+    refresh_client_operation_summary(cursor, client_id)
     return {"entity_type": "OPERACAO", "entity_id": operation_id}
 
 
@@ -531,7 +558,7 @@ def restore_client_payload(cursor, db, payload):
     if seller_id > 0 and not record_exists(cursor, "usuarios", seller_id):
         raise ValueError("Vendedor vinculado nao existe para restauracao")
 
-    insert_row(cursor, "clientes", client)
+    insert_row(cursor, "clientes", fill_client_search_values(dict(client)))
 
     operations = payload.get("operations") or []
     for item in operations:
@@ -542,7 +569,7 @@ def restore_client_payload(cursor, db, payload):
             continue
         if record_exists(cursor, "operacoes", operation_id):
             raise ValueError(f"Operacao {operation_id} ja existe no banco")
-        insert_row(cursor, "operacoes", item)
+        insert_row(cursor, "operacoes", canonicalize_operation_row(strip_operation_generated_columns(item)))
 
     comments = payload.get("operation_comments") or []
     for item in comments:
@@ -561,12 +588,19 @@ def restore_client_payload(cursor, db, payload):
         insert_row(cursor, "operation_status_history", row)
 
     notifications = payload.get("operation_notifications") or []
+    unread_deltas = {}
     for item in notifications:
         if not isinstance(item, dict):
             continue
         row = dict(item)
         row.pop("id", None)
         insert_row(cursor, "operation_notifications", row)
+        if row.get("read_at") is None and row.get("user_id"):
+            user_id = int(row["user_id"])
+            unread_deltas[user_id] = unread_deltas.get(user_id, 0) + 1
+    adjust_unread_notification_counters(cursor, unread_deltas)
+
+    refresh_client_operation_summary(cursor, client_id)
 
     documents_restored = 0
     document_warnings = []
@@ -606,18 +640,34 @@ def restore_user_payload(cursor, payload):
     if record_exists(cursor, "usuarios", user_id):
         raise ValueError("Usuario ja existe no banco")
 
-    insert_row(cursor, "usuarios", user)
+    insert_row(cursor, "usuarios", dict(user, role=normalize_role(user.get("role"))))
+    bump_recipient_directory_version(cursor)
     return {"entity_type": "USUARIO", "entity_id": user_id}
 
 
 @system_bp.route("/system/maintenance/status", methods=["GET"])
 def get_system_maintenance_status():
+    return jsonify({"maintenance": get_cached_maintenance_state()}), 200
+
+
+@system_bp.route("/system/metrics/db-pool", methods=["GET"])
+@jwt_required()
+def get_db_pool_metrics():
+    if not actor_is_admin_like():
+        return jsonify({"error": "Somente ADMIN ou GLOBAL pode consultar metricas"}), 403
+    return jsonify({"db_pool": pool_stats()}), 200
+
+
+@system_bp.route("/system/metrics/notification-outbox", methods=["GET"])
+@jwt_required()
+def get_notification_outbox_metrics():
+    if not actor_is_admin_like():
+        return jsonify({"error": "Somente ADMIN ou GLOBAL pode consultar metricas"}), 403
+
     db = get_db()
     cursor = db.cursor(dictionary=True)
     try:
-        ensure_system_settings_table(cursor, db)
-        state = get_maintenance_state(cursor)
-        return jsonify({"maintenance": state}), 200
+        return jsonify({"notification_outbox": notification_outbox_stats(cursor)}), 200
     finally:
         cursor.close()
         db.close()
@@ -631,11 +681,13 @@ def migrate_storage_documents():
     if not actor_is_admin_like():
         return jsonify({"error": "Somente ADMIN ou GLOBAL pode migrar documentos"}), 403
 
+    # Only starts (or resumes) the background job; progress is read from
+    # GET /system/documents/migrate-storage.
     db = get_db()
     cursor = db.cursor(dictionary=True)
     try:
         ensure_documents_table(cursor, db)
-        result = migrate_all_storage_documents_to_db(cursor)
+        job, started = start_document_migration_job(cursor, db, requested_by=actor_id)
         log_audit(
             cursor,
             actor_id=actor_id,
@@ -643,10 +695,11 @@ def migrate_storage_documents():
             action="MIGRATE_STORAGE_DOCUMENTS",
             target_type="SYSTEM",
             success=True,
-            metadata=result,
+            metadata={"job_id": job.get("id"), "started": started},
         )
         db.commit()
-        return jsonify({"message": "Migracao de documentos concluida", "result": result}), 200
+        message = "Migracao de documentos iniciada" if started else "Migracao de documentos ja em andamento"
+        return jsonify({"message": message, "job": job}), 202
     except Exception:
         db.rollback()
         log_audit(
@@ -656,10 +709,29 @@ def migrate_storage_documents():
             action="MIGRATE_STORAGE_DOCUMENTS",
             target_type="SYSTEM",
             success=False,
-            reason="Falha ao migrar documentos legados",
+            reason="Falha ao iniciar migracao de documentos legados",
         )
         db.commit()
-        return jsonify({"error": "Nao foi possivel migrar os documentos antigos"}), 500
+        return jsonify({"error": "Nao foi possivel iniciar a migracao dos documentos antigos"}), 500
+    finally:
+        cursor.close()
+        db.close()
+
+
+@system_bp.route("/system/documents/migrate-storage", methods=["GET"])
+@system_bp.route("/system/documents/migrate-storage/<int:job_id>", methods=["GET"])
+@jwt_required()
+def get_storage_documents_migration(job_id=None):
+    if not actor_is_admin_like():
+        return jsonify({"error": "Somente ADMIN ou GLOBAL pode consultar a migracao"}), 403
+
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    try:
+        job = get_document_migration_job(cursor, job_id)
+        if job is None and job_id is not None:
+            return jsonify({"error": "Migracao nao encontrada"}), 404
+        return jsonify({"job": job}), 200
     finally:
         cursor.close()
         db.close()
@@ -710,6 +782,8 @@ def update_system_maintenance():
             metadata={"enabled": enabled, "message": message},
         )
         db.commit()
+        # Only now can a reload see the new state and version.
+        invalidate_maintenance_cache()
         return jsonify(
             {
                 "message": "Modo manutencao atualizado",
@@ -883,6 +957,12 @@ def restore_trash_item(trash_id):
             metadata={"trash_id": int(trash_id), "result": result},
         )
         db.commit()
+        # The search index and the auth cache only learn about the restored
+        # row once it is committed.
+        if entity_type == "CLIENTE":
+            index_client(cursor, result["entity_id"])
+        elif entity_type == "USUARIO":
+            invalidate_user_auth_context(result["entity_id"])
         return jsonify({"message": "Registro restaurado com sucesso", "trash_id": int(trash_id), "result": result}), 200
     except ValueError as exc:
         db.rollback()
@@ -982,6 +1062,8 @@ def bulk_delete():
                     reason=reason,
                 )
                 db.commit()
+                if result.get("status") == "deleted":
+                    unindex_client(client_id)
             except Exception as exc:
                 db.rollback()
                 result = {"id": int(client_id), "status": "error", "error": str(exc)}
@@ -997,6 +1079,8 @@ def bulk_delete():
                     reason=reason,
                 )
                 db.commit()
+                if result.get("status") == "deleted":
+                    invalidate_user_auth_context(user_id)
             except Exception as exc:
                 db.rollback()
                 result = {"id": int(user_id), "status": "error", "error": str(exc)}
@@ -21,6 +21,8 @@ from flask_jwt_extended import (
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from app.database import get_db
+from app.utils.auth_cache import invalidate_user_auth_context
+from app.utils.recipient_directory import bump_recipient_directory_version
 from app.utils.company import (
     column_exists,
     current_user_company_id,
@@ -179,6 +181,32 @@ def ensure_user_role_enum(cursor, db):
     db.commit()
 
 
+def canonicalize_stored_user_roles(cursor, db):
+    # ENUM columns already store the declared spelling.
+    cursor.execute(
+        """
+        SELECT DATA_TYPE
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND TABLE_NAME = 'usuarios'
+          AND COLUMN_NAME = 'role'
+        LIMIT 1
+        """
+    )
+    column = cursor.fetchone() or {}
+    if str(column.get("DATA_TYPE") or "").lower() == "enum":
+        return
+
+    cursor.execute(
+        """
+        UPDATE usuarios
+        SET role = UPPER(TRIM(role))
+        WHERE BINARY role <> BINARY UPPER(TRIM(role))
+        """
+    )
+    db.commit()
+
+
 @ensure_once
 def ensure_user_profile_columns(cursor, db):
     cursor.execute(
@@ -225,7 +253,7 @@ def ensure_user_profile_columns(cursor, db):
             """
             UPDATE usuarios
             SET digitador_full_scope = 1
-            WHERE UPPER(role) = %s
+            WHERE role = %s
             """,
             (ROLE_DIGITADOR_NOVO_CARTAO,),
         )
@@ -408,7 +436,7 @@ def list_users():
         params = []
 
         if role_filter:
-            conditions.append("UPPER(u.role) = %s")
+            conditions.append("u.role = %s")
             params.append(role_filter)
 
         if company_id:
@@ -536,9 +564,9 @@ def create_user():
             """,
             (nome, email, senha_hash, role, empresa_id, digitador_full_scope),
         )
-        db.commit()
-
         created_id = cursor.lastrowid
+        bump_recipient_directory_version(cursor, int(get_jwt_identity()))
+        db.commit()
         row = fetch_user_row(cursor, created_id)
 
         return (
@@ -591,7 +619,9 @@ def update_user_digitador_scope(user_id):
             """,
             (1 if digitador_full_scope else 0, user_id),
         )
+        bump_recipient_directory_version(cursor, int(get_jwt_identity()))
         db.commit()
+        invalidate_user_auth_context(user_id)
 
         updated = fetch_user_row(cursor, user_id)
         return jsonify(
@@ -1285,7 +1315,7 @@ def delete_user(user_id):
                 """
                 SELECT COUNT(*) AS total_globals
                 FROM usuarios
-                WHERE UPPER(role) = %s
+                WHERE role = %s
                 """,
                 (ROLE_GLOBAL,),
             )
@@ -1360,7 +1390,9 @@ def delete_user(user_id):
             success=True,
             metadata={"trash_id": trash_id},
         )
+        bump_recipient_directory_version(cursor, actor_id)
         db.commit()
+        invalidate_user_auth_context(user_id)
 
         return jsonify(
             {
@@ -0,0 +1,409 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config.settings import (
+    DOCUMENT_MIGRATION_COMMIT_EVERY,
+    DOCUMENT_MIGRATION_STALE_SECONDS,
+    DOCUMENT_MIGRATION_THREADS,
+)
+from app.database import get_db
+from app.routes.clients import (
+    LEGACY_DOCUMENT_INSERT_SQL,
+    iter_storage_client_ids,
+    legacy_document_insert_params,
+    list_new_legacy_document_files,
+    mark_legacy_documents_migrated,
+    resolve_client_seller_id,
+)
+from app.services.document_storage import get_document_store
+from app.utils.security import json_dumps, json_loads
+
+# Copies the legacy storage/clients/<id> folders into documentos as a
+# background job. The caller's thread only walks folders and talks to MySQL;
+# a thread pool reads, hashes and stores the files into the blob store, and
+# the rows go in with executemany. Each client is claimed with its
+# document_legacy_sync marker before its folder is listed, so the job and a
+# read path never both copy the same folder. The claim commits on its own with
+# job_id set, and read paths skip a client in that state instead of waiting
+# on the job's transaction; job_id goes back to NULL in the commit that writes
+# the client's rows. Rows are committed between clients once
+# DOCUMENT_MIGRATION_COMMIT_EVERY files are pending. A job that dies keeps
+# status RUNNING with an old heartbeat_at; starting again claims it, takes
+# over its unfinished clients and skips the committed ones.
+
+DOCUMENT_MIGRATION_JOB_FIELDS = (
+    "id",
+    "status",
+    "requested_by",
+    "scanned_clients",
+    "migrated_clients",
+    "migrated_files",
+    "failed_files",
+    "result",
+    "last_error",
+    "created_at",
+    "started_at",
+    "heartbeat_at",
+    "finished_at",
+)
+DOCUMENT_MIGRATION_HEARTBEAT_SECONDS = 10
+DOCUMENT_MIGRATION_MAX_REPORTED_CLIENTS = 100
+
+# Also covers a QUEUED job whose thread never got to claim it.
+DOCUMENT_MIGRATION_STALE_SQL = """
+    (status IN ('QUEUED', 'RUNNING')
+     AND COALESCE(heartbeat_at, created_at) < NOW() - INTERVAL %s SECOND)
+"""
+
+
+def serialize_document_migration_job(row):
+    if not row:
+        return None
+    job = {}
+    for field in DOCUMENT_MIGRATION_JOB_FIELDS:
+        value = row.get(field)
+        job[field] = value.strftime("%Y-%m-%d %H:%M:%S") if hasattr(value, "strftime") else value
+    job["result"] = json_loads(row.get("result")) if row.get("result") else None
+    job["stale"] = bool(row.get("stale"))
+    return job
+
+
+def get_document_migration_job(cursor, job_id=None):
+    # Latest job when job_id is None.
+    where_sql = "WHERE id = %s" if job_id is not None else ""
+    params = (job_id,) if job_id is not None else ()
+    cursor.execute(
+        f"""
+        SELECT
+            {", ".join(DOCUMENT_MIGRATION_JOB_FIELDS)},
+            {DOCUMENT_MIGRATION_STALE_SQL} AS stale
+        FROM document_migration_jobs
+        {where_sql}
+        ORDER BY id DESC
+        LIMIT 1
+        """,
+        (DOCUMENT_MIGRATION_STALE_SECONDS, *params),
+    )
+    return serialize_document_migration_job(cursor.fetchone())
+
+
+def start_document_migration_job(cursor, db, requested_by=None, background=True):
+    """
+    Returns (job, started). An active job is returned as is; a stale one is
+    resumed; otherwise a new job is queued. With background=False the job
+    runs in the calling thread before returning.
+    """
+    cursor.execute(
+        f"""
+        SELECT
+            id,
+            {DOCUMENT_MIGRATION_STALE_SQL} AS stale
+        FROM document_migration_jobs
+        WHERE status IN ('QUEUED', 'RUNNING')
+        ORDER BY id DESC
+        LIMIT 1
+        FOR UPDATE
+        """,
+        (DOCUMENT_MIGRATION_STALE_SECONDS,),
+    )
+    active = cursor.fetchone()
+    if active and not active.get("stale"):
+        db.commit()
+        return get_document_migration_job(cursor, int(active["id"])), False
+
+    if active:
+        job_id = int(active["id"])
+    else:
+        cursor.execute(
+            "INSERT INTO document_migration_jobs (status, requested_by) VALUES ('QUEUED', %s)",
+            (requested_by,),
+        )
+        job_id = int(cursor.lastrowid)
+    db.commit()
+
+    if background:
+        threading.Thread(
+            target=run_document_migration_job,
+            args=(job_id,),
+            name=f"document-migration-{job_id}",
+            daemon=True,
+        ).start()
+    else:
+        run_document_migration_job(job_id, log=print)
+    return get_document_migration_job(cursor, job_id), True
+
+
+def claim_document_migration_job(cursor, db, job_id):
+    # Only one runner wins: a QUEUED job, or a RUNNING one whose runner
+    # stopped sending heartbeats.
+    cursor.execute(
+        """
+        UPDATE document_migration_jobs
+        SET status = 'RUNNING',
+            started_at = COALESCE(started_at, NOW()),
+            heartbeat_at = NOW(),
+            last_error = NULL
+        WHERE id = %s
+          AND (
+            status = 'QUEUED'
+            OR (status = 'RUNNING' AND heartbeat_at < NOW() - INTERVAL %s SECOND)
+          )
+        """,
+        (job_id, DOCUMENT_MIGRATION_STALE_SECONDS),
+    )
+    claimed = cursor.rowcount == 1
+    db.commit()
+    return claimed
+
+
+def claim_legacy_client(cursor, db, client_id, job_id):
+    # Committed right away, so the marker row is never locked for longer than
+    # this statement. rowcount 0 means a read path synced the client (or is
+    # syncing it: the INSERT waits for that transaction and then finds its
+    # row), or a previous runner of this job died while copying it.
+    cursor.execute(
+        "INSERT IGNORE INTO document_legacy_sync (client_id, job_id) VALUES (%s, %s)",
+        (client_id, job_id),
+    )
+    claimed = cursor.rowcount == 1
+    if not claimed:
+        # Only one runner holds a job at a time, so a claim still in progress
+        # belongs to a runner that is gone.
+        cursor.execute(
+            "SELECT job_id FROM document_legacy_sync WHERE client_id = %s FOR UPDATE",
+            (client_id,),
+        )
+        row = cursor.fetchone() or {}
+        claimed = row.get("job_id") is not None
+        if claimed:
+            cursor.execute(
+                "UPDATE document_legacy_sync SET job_id = %s WHERE client_id = %s",
+                (job_id, client_id),
+            )
+    db.commit()
+    return claimed
+
+
+def release_legacy_client(cursor, db, client_id, job_id):
+    # Drops this job's claim, so a later run (or the next read) copies the
+    # client again; files already in documentos are skipped.
+    cursor.execute(
+        "DELETE FROM document_legacy_sync WHERE client_id = %s AND job_id = %s",
+        (client_id, job_id),
+    )
+    db.commit()
+
+
+def release_unfinished_legacy_clients(cursor, job_id):
+    # Clients whose rows were committed already have job_id NULL.
+    cursor.execute("DELETE FROM document_legacy_sync WHERE job_id = %s", (job_id,))
+
+
+def iter_legacy_client_files(cursor, db, job_id, progress):
+    for client_id in iter_storage_client_ids():
+        progress["scanned_clients"] += 1
+        if not claim_legacy_client(cursor, db, client_id, job_id):
+            continue
+
+        seller_id = resolve_client_seller_id(cursor, client_id)
+        if seller_id is None:
+            release_legacy_client(cursor, db, client_id, job_id)
+            progress["missing_clients"].append(client_id)
+            continue
+
+        yield client_id, seller_id, list_new_legacy_document_files(cursor, client_id)
+
+
+def run_document_migration_job(job_id, log=None):
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    try:
+        if not claim_document_migration_job(cursor, db, job_id):
+            return None
+        cursor.execute(
+            """
+            SELECT requested_by, migrated_clients, migrated_files
+            FROM document_migration_jobs
+            WHERE id = %s
+            """,
+            (job_id,),
+        )
+        job = cursor.fetchone() or {}
+        # A resumed job keeps counting from what the previous runner committed.
+        result = copy_legacy_documents(
+            cursor,
+            db,
+            job_id,
+            migrated_clients=int(job.get("migrated_clients") or 0),
+            migrated_files=int(job.get("migrated_files") or 0),
+            log=log,
+        )
+
+        if not result["failed_files"]:
+            mark_legacy_documents_migrated(cursor, updated_by=job.get("requested_by"))
+        cursor.execute(
+            """
+            UPDATE document_migration_jobs
+            SET status = 'DONE',
+                result = %s,
+                heartbeat_at = NOW(),
+                finished_at = NOW()
+            WHERE id = %s
+            """,
+            (json_dumps(result), job_id),
+        )
+        db.commit()
+        return result
+    except Exception as exc:
+        db.rollback()
+        release_unfinished_legacy_clients(cursor, job_id)
+        cursor.execute(
+            """
+            UPDATE document_migration_jobs
+            SET status = 'FAILED',
+                last_error = %s,
+                finished_at = NOW()
+            WHERE id = %s
+            """,
+            (str(exc)[:500], job_id),
+        )
+        db.commit()
+        if log:
+            log(f"[document-migration] job {job_id} falhou: {exc}")
+        return None
+    finally:
+        cursor.close()
+        db.close()
+
+
+def copy_legacy_documents(
+    cursor,
+    db,
+    job_id,
+    migrated_clients=0,
+    migrated_files=0,
+    threads=DOCUMENT_MIGRATION_THREADS,
+    commit_every=DOCUMENT_MIGRATION_COMMIT_EVERY,
+    log=None,
+):
+    store = get_document_store()
+    threads = max(1, int(threads))
+    commit_every = max(1, int(commit_every))
+    window_size = threads * 4
+
+    progress = {
+        "scanned_clients": 0,
+        "migrated_clients": migrated_clients,
+        "migrated_files": migrated_files,
+        "failed_files": 0,
+        "missing_clients": [],
+    }
+    pending_rows = []
+    finished_clients = []
+    failed_clients = set()
+    state = {"last_error": None, "flushed_at": time.monotonic()}
+
+    def flush():
+        if pending_rows:
+            cursor.executemany(LEGACY_DOCUMENT_INSERT_SQL, pending_rows)
+        if finished_clients:
+            placeholders = ", ".join(["%s"] * len(finished_clients))
+            cursor.execute(
+                f"""
+                UPDATE document_legacy_sync
+                SET job_id = NULL
+                WHERE job_id = %s AND client_id IN ({placeholders})
+                """,
+                (job_id, *finished_clients),
+            )
+        progress["migrated_files"] += len(pending_rows)
+        cursor.execute(
+            """
+            UPDATE document_migration_jobs
+            SET scanned_clients = %s,
+                migrated_clients = %s,
+                migrated_files = %s,
+                failed_files = %s,
+                last_error = %s,
+                heartbeat_at = NOW()
+            WHERE id = %s
+            """,
+            (
+                progress["scanned_clients"],
+                progress["migrated_clients"],
+                progress["migrated_files"],
+                progress["failed_files"],
+                state["last_error"],
+                job_id,
+            ),
+        )
+        db.commit()
+        pending_rows.clear()
+        finished_clients.clear()
+        state["flushed_at"] = time.monotonic()
+        if log:
+            log(
+                f"[document-migration] {progress['migrated_files']} arquivos, "
+                f"{progress['scanned_clients']} clientes lidos"
+            )
+
+    def handle(item):
+        client_id, seller_id, safe_filename, file_path, future = item
+        if future is None:
+            # End-of-client marker: every file of the client is in pending_rows
+            # (or failed), so this is the only place rows may be committed.
+            if client_id in failed_clients:
+                release_legacy_client(cursor, db, client_id, job_id)
+            else:
+                finished_clients.append(client_id)
+                if safe_filename:
+                    progress["migrated_clients"] += 1
+            if len(pending_rows) >= commit_every:
+                flush()
+            return
+
+        try:
+            blob_key, file_size = future.result()
+            pending_rows.append(
+                legacy_document_insert_params(
+                    client_id, seller_id, safe_filename, file_path, blob_key, file_size
+                )
+            )
+        except Exception as exc:
+            failed_clients.add(client_id)
+            progress["failed_files"] += 1
+            state["last_error"] = f"{file_path}: {exc}"[:500]
+
+    window = deque()
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="document-migration") as executor:
+        for client_id, seller_id, files in iter_legacy_client_files(cursor, db, job_id, progress):
+            for safe_filename, file_path in files:
+                window.append(
+                    (
+                        client_id,
+                        seller_id,
+                        safe_filename,
+                        file_path,
+                        executor.submit(store.put_file, file_path),
+                    )
+                )
+                while len(window) > window_size:
+                    handle(window.popleft())
+            # safe_filename of the marker only says whether the client had files.
+            window.append((client_id, seller_id, bool(files), None, None))
+
+            if time.monotonic() - state["flushed_at"] >= DOCUMENT_MIGRATION_HEARTBEAT_SECONDS:
+                while window:
+                    handle(window.popleft())
+                flush()
+
+        while window:
+            handle(window.popleft())
+    flush()
+
+    missing_clients = progress.pop("missing_clients")
+    progress["missing_clients"] = len(missing_clients)
+    progress["missing_client_ids"] = missing_clients[:DOCUMENT_MIGRATION_MAX_REPORTED_CLIENTS]
+    return progress
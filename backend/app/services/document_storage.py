@@ -0,0 +1,321 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from io import BytesIO
+
+from app.config.settings import DOCUMENT_STORAGE_BACKEND, DOCUMENT_STORAGE_ROOT
+
+# Client documents live outside MySQL: documentos keeps the metadata and a
+# blob_key, which is the lowercase hex SHA-256 of the file. Identical uploads
+# share one blob and a key always names the exact same bytes, so blobs are
+# never rewritten in place and a row can point at one before its own INSERT
+# commits. Blobs are only removed by collect_unreferenced_blobs, because trash
+# entries of deleted clients keep referencing them.
+
+BLOB_KEY_LENGTH = 64
+BLOB_COPY_CHUNK_SIZE = 1024 * 1024
+BLOB_HEAD_SIZE = 1024
+
+DEFAULT_STORAGE_ROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "storage")
+)
+
+_store = None
+_store_lock = threading.Lock()
+_backends = {}
+
+
+class BlobNotFoundError(FileNotFoundError):
+    pass
+
+
+class BlobTooLargeError(Exception):
+    # Not a ValueError on purpose: werkzeug's form parser silently swallows
+    # ValueError, and this has to abort the request.
+    def __init__(self, max_size):
+        super().__init__(f"Arquivo maior que {max_size} bytes")
+        self.max_size = max_size
+
+
+def is_blob_key(value):
+    text = str(value or "")
+    return len(text) == BLOB_KEY_LENGTH and all(char in "0123456789abcdef" for char in text)
+
+
+class BlobUpload:
+    # Writable temp file that hashes, counts and keeps the first bytes of what
+    # is written to it, and refuses to grow past max_size. Uploads are parsed
+    # straight into one of these, so commit() only has to make it durable.
+    def __init__(self, store, temp_dir, max_size=None):
+        os.makedirs(temp_dir, exist_ok=True)
+        handle, self.temp_path = tempfile.mkstemp(dir=temp_dir, prefix="upload-")
+        self._file = os.fdopen(handle, "w+b")
+        self._digest = hashlib.sha256()
+        self.store = store
+        self.max_size = max_size
+        self.size = 0
+        self.head = b""
+
+    def write(self, data):
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            self.discard()
+            raise BlobTooLargeError(self.max_size)
+        if len(self.head) < BLOB_HEAD_SIZE:
+            self.head += bytes(data[: BLOB_HEAD_SIZE - len(self.head)])
+        self._digest.update(data)
+        return self._file.write(data)
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def seek(self, offset, whence=0):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def flush(self):
+        return self._file.flush()
+
+    @property
+    def blob_key(self):
+        return self._digest.hexdigest()
+
+    def commit(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        try:
+            return self.store.commit_upload(self)
+        finally:
+            self.discard()
+
+    def discard(self):
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+    def close(self):
+        # Werkzeug closes file parts when the request ends; anything not
+        # committed by then is dropped.
+        self.discard()
+
+
+class BlobStore:
+    # Interface every document backend implements. Writes go through
+    # open_upload(): the caller writes the content, then commit() returns
+    # (blob_key, size) once the bytes are durable in the backend.
+    name = ""
+
+    def open_upload(self, max_size=None):
+        return BlobUpload(self, tempfile.gettempdir(), max_size=max_size)
+
+    def commit_upload(self, upload):
+        # Remote backends upload the finished temp file here.
+        raise NotImplementedError
+
+    def put_stream(self, stream):
+        upload = self.open_upload()
+        try:
+            while True:
+                chunk = stream.read(BLOB_COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                upload.write(chunk)
+            return upload.commit()
+        finally:
+            upload.discard()
+
+    def put_bytes(self, data):
+        return self.put_stream(BytesIO(bytes(data or b"")))
+
+    def put_file(self, path):
+        with open(path, "rb") as source:
+            return self.put_stream(source)
+
+    def open(self, blob_key):
+        raise NotImplementedError
+
+    def exists(self, blob_key):
+        raise NotImplementedError
+
+    def size(self, blob_key):
+        raise NotImplementedError
+
+    def delete(self, blob_key):
+        raise NotImplementedError
+
+    def modified_at(self, blob_key):
+        # Epoch of the last write (or dedupe refresh), None when missing.
+        raise NotImplementedError
+
+    def iter_blobs(self):
+        # Yields (blob_key, modified_at_epoch) for every stored blob.
+        raise NotImplementedError
+
+    def local_path(self, blob_key):
+        # Backends that keep blobs on this machine's disk return the path so
+        # the web server can send the file itself; remote stores return None.
+        return None
+
+
+class LocalBlobStore(BlobStore):
+    # Content-addressed directory: <root>/ab/cd/<sha256>. Uploads are written
+    # to <root>/.tmp (same filesystem), fsynced and then renamed into place,
+    # so a reader never sees a partial blob.
+    name = "local"
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.temp_root = os.path.join(self.root, ".tmp")
+
+    def _path(self, blob_key):
+        if not is_blob_key(blob_key):
+            raise ValueError("Chave de documento invalida")
+        return os.path.join(self.root, blob_key[:2], blob_key[2:4], blob_key)
+
+    def open_upload(self, max_size=None):
+        return BlobUpload(self, self.temp_root, max_size=max_size)
+
+    def commit_upload(self, upload):
+        blob_key = upload.blob_key
+        final_path = self._path(blob_key)
+        if os.path.isfile(final_path):
+            # Same content already stored; refresh mtime so a concurrent
+            # collect_unreferenced_blobs treats it as freshly written.
+            os.utime(final_path, None)
+            return blob_key, upload.size
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(upload.temp_path, final_path)
+        directory_fd = os.open(os.path.dirname(final_path), os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+        return blob_key, upload.size
+
+    def open(self, blob_key):
+        try:
+            return open(self._path(blob_key), "rb")
+        except FileNotFoundError as exc:
+            raise BlobNotFoundError(blob_key) from exc
+
+    def exists(self, blob_key):
+        return is_blob_key(blob_key) and os.path.isfile(self._path(blob_key))
+
+    def size(self, blob_key):
+        try:
+            return os.path.getsize(self._path(blob_key))
+        except FileNotFoundError as exc:
+            raise BlobNotFoundError(blob_key) from exc
+
+    def delete(self, blob_key):
+        try:
+            os.remove(self._path(blob_key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def modified_at(self, blob_key):
+        try:
+            return os.path.getmtime(self._path(blob_key))
+        except FileNotFoundError:
+            return None
+
+    def iter_blobs(self):
+        if not os.path.isdir(self.root):
+            return
+        for directory, subdirectories, filenames in os.walk(self.root):
+            subdirectories[:] = [name for name in subdirectories if name != ".tmp"]
+            for filename in filenames:
+                if not is_blob_key(filename):
+                    continue
+                try:
+                    modified_at = os.path.getmtime(os.path.join(directory, filename))
+                except FileNotFoundError:
+                    continue
+                yield filename, modified_at
+
+    def local_path(self, blob_key):
+        return self._path(blob_key)
+
+
+class LocalObjectStore(LocalBlobStore):
+    # Stand-in for an object store (S3, GCS, R2): flat "documents/<key>"
+    # object names and no local_path, so every read goes through open() the
+    # way it would against a remote bucket. Useful to exercise that code path
+    # locally before a real client is registered with
+    # register_blob_store_backend.
+    name = "object-local"
+
+    def _path(self, blob_key):
+        if not is_blob_key(blob_key):
+            raise ValueError("Chave de documento invalida")
+        return os.path.join(self.root, "documents", blob_key)
+
+    def local_path(self, blob_key):
+        return None
+
+
+def register_blob_store_backend(name, factory):
+    _backends[str(name).strip().lower()] = factory
+
+
+register_blob_store_backend(LocalBlobStore.name, LocalBlobStore)
+register_blob_store_backend(LocalObjectStore.name, LocalObjectStore)
+
+
+def document_storage_root():
+    if DOCUMENT_STORAGE_ROOT:
+        return os.path.abspath(DOCUMENT_STORAGE_ROOT)
+    storage_root = str(os.getenv("STORAGE_ROOT") or "").strip() or DEFAULT_STORAGE_ROOT
+    return os.path.join(os.path.abspath(storage_root), "blobs")
+
+
+def get_document_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                factory = _backends.get(DOCUMENT_STORAGE_BACKEND)
+                if factory is None:
+                    raise RuntimeError(
+                        f"DOCUMENT_STORAGE_BACKEND desconhecido: {DOCUMENT_STORAGE_BACKEND}"
+                    )
+                _store = factory(document_storage_root())
+    return _store
+
+
+def collect_unreferenced_blobs(store, referenced_keys, grace_seconds=3600, still_referenced=None):
+    # Blobs are written before the row that points at them is committed, so
+    # anything younger than grace_seconds is left alone even if unreferenced.
+    # referenced_keys and the listing are snapshots: an upload that deduped
+    # onto an old blob since then refreshed its mtime and then inserted its
+    # row. So right before each delete the row is checked again
+    # (still_referenced) and then the mtime; that order means an upload either
+    # committed its row before the check or refreshed the mtime before the stat.
+    grace_seconds = max(0, grace_seconds)
+    cutoff = time.time() - grace_seconds
+    removed = 0
+    kept = 0
+    for blob_key, modified_at in list(store.iter_blobs()):
+        if blob_key in referenced_keys or modified_at > cutoff:
+            kept += 1
+            continue
+        if still_referenced is not None and still_referenced(blob_key):
+            kept += 1
+            continue
+        modified_at = store.modified_at(blob_key)
+        if modified_at is None:
+            continue
+        if modified_at > time.time() - grace_seconds:
+            kept += 1
+            continue
+        if store.delete(blob_key):
+            removed += 1
+    return {"removed": removed, "kept": kept}
+
@@ -1,9 +1,62 @@
 import os
 import uuid
+from flask import Request, request
 from werkzeug.utils import secure_filename
 
+from app.config.settings import DOCUMENT_UPLOAD_MAX_FILE_MB, DOCUMENT_UPLOAD_MAX_REQUEST_MB
+
 ALLOWED_EXTENSIONS = {"pdf", "png", "jpg", "jpeg"}
-MAX_FILE_SIZE_MB = 5
+MAX_FILE_SIZE_MB = DOCUMENT_UPLOAD_MAX_FILE_MB
+MAX_REQUEST_SIZE_MB = DOCUMENT_UPLOAD_MAX_REQUEST_MB
+
+# Accepted uploads are identified by their first bytes, not by the name or the
+# Content-Type the browser sent: (extension, mimetype).
+PDF_SIGNATURE = b"%PDF-"
+FILE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", ("png", "image/png")),
+    (b"\xff\xd8\xff", ("jpg", "image/jpeg")),
+)
+
+
+class UploadRequest(Request):
+    # Request class of the app. Routes that set upload_stream_factory get each
+    # multipart file written straight into the stream it returns instead of
+    # werkzeug's in-memory/temporary spool.
+    upload_stream_factory = None
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.upload_stream_factory is not None:
+            return self.upload_stream_factory()
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+
+def stream_uploads_to(store):
+    """
+    Makes the current request parse its files into store uploads, enforcing
+    MAX_FILE_SIZE_MB per file and MAX_REQUEST_SIZE_MB per request while the
+    body is read. Returns the list that collects the uploads.
+    """
+    uploads = []
+
+    def factory():
+        upload = store.open_upload(max_size=int(MAX_FILE_SIZE_MB * 1024 * 1024))
+        uploads.append(upload)
+        return upload
+
+    request.upload_stream_factory = factory
+    request.max_content_length = int(MAX_REQUEST_SIZE_MB * 1024 * 1024)
+    return uploads
+
+
+def sniff_file_type(head):
+    head = bytes(head or b"")
+    # PDF readers accept a few junk bytes before the header.
+    if PDF_SIGNATURE in head[:1024]:
+        return "pdf", "application/pdf"
+    for signature, file_type in FILE_SIGNATURES:
+        if head.startswith(signature):
+            return file_type
+    return None, None
 
 
 def allowed_file(filename):
@@ -1,10 +1,27 @@
 from flask_jwt_extended import get_jwt, get_jwt_identity
 from app.database import get_db
+from app.utils.auth_cache import load_user_auth_context
 from app.utils.company import current_user_company_id, ensure_company_scope_columns
 
 ROLE_ADMIN = "ADMIN"
 ROLE_GLOBAL = "GLOBAL"
 
+DIGITADOR_CLIENT_PRODUCTS = {
+    "DIGITADOR_PORT_REFIN": (
+        "PORTABILIDADE",
+        "REFINANCIAMENTO",
+        "PORTABILIDADE_REFIN",
+    ),
+    "DIGITADOR_NOVO_CARTAO": (
+        "NOVO",
+        "FGTS",
+        "CARTAO",
+        "SAQUE_COMPLEMENTAR",
+    ),
+}
+
+ACCESS_BATCH_SIZE = 1000
+
 
 def normalize_role(role):
     return str(role or "").strip().upper()
@@ -37,112 +54,117 @@ def current_user_digitador_full_scope():
     except (TypeError, ValueError, RuntimeError):
         return bool(jwt_data.get("digitador_full_scope"))
 
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
     try:
-        cursor.execute(
-            """
-            SELECT COALESCE(digitador_full_scope, 0) AS digitador_full_scope
-            FROM usuarios
-            WHERE id = %s
-            LIMIT 1
-            """,
-            (user_id,),
-        )
-        row = cursor.fetchone() or {}
-        return bool(row.get("digitador_full_scope"))
+        return load_user_auth_context(user_id)["digitador_full_scope"]
     except Exception:
         if "digitador_full_scope" in jwt_data:
             return bool(jwt_data.get("digitador_full_scope"))
         return role == "DIGITADOR_NOVO_CARTAO"
-    finally:
-        cursor.close()
-        db.close()
 
 
 def has_full_company_client_scope():
     return current_user_role().startswith("DIGITADOR") and current_user_digitador_full_scope()
 
 
-def can_access_client(client_id):
+def normalize_id_list(ids):
+    normalized = []
+    seen = set()
+    for value in ids or ():
+        try:
+            item = int(value)
+        except (TypeError, ValueError):
+            continue
+        if item <= 0 or item in seen:
+            continue
+        seen.add(item)
+        normalized.append(item)
+    return normalized
+
+
+def filter_accessible_clients(client_ids):
     """
+    Batch form of can_access_client: returns the set of ids from client_ids
+    the current user may access, with one query per chunk of ids.
+
     GLOBAL: acesso total
     ADMIN: somente clientes da propria empresa
     VENDEDOR: somente clientes vinculados a ele
     DIGITADOR: clientes com operacoes do escopo de produto dele
     """
+    ids = normalize_id_list(client_ids)
+    if not ids:
+        return set()
+
     if is_global():
-        return True
+        return set(ids)
 
     try:
         user_id = current_user_id()
     except (TypeError, ValueError, RuntimeError):
-        return False
+        return set()
 
     if not user_id:
-        return False
+        return set()
 
     company_id = current_user_company_id()
     if company_id <= 0:
-        return False
-
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
-    ensure_company_scope_columns(cursor, db)
+        return set()
 
     role = current_user_role()
-
+    allowed_products = ()
     if is_admin() or has_full_company_client_scope():
-        cursor.execute(
-            "SELECT 1 FROM clientes WHERE id=%s AND empresa_id=%s",
-            (client_id, company_id)
-        )
+        scope_sql = """
+            SELECT id
+            FROM clientes
+            WHERE empresa_id=%s
+              AND id IN ({placeholders})
+        """
+        scope_params = (company_id,)
     elif role.startswith("DIGITADOR"):
-        if role == "DIGITADOR_PORT_REFIN":
-            allowed_products = (
-                "PORTABILIDADE",
-                "REFINANCIAMENTO",
-                "PORTABILIDADE_REFIN",
-            )
-        elif role == "DIGITADOR_NOVO_CARTAO":
-            allowed_products = (
-                "NOVO",
-                "FGTS",
-                "CARTAO",
-                "SAQUE_COMPLEMENTAR",
-            )
-        else:
-            allowed_products = ()
-
+        allowed_products = DIGITADOR_CLIENT_PRODUCTS.get(role, ())
         if not allowed_products:
-            cursor.close()
-            db.close()
-            return False
-
-        placeholders = ", ".join(["%s"] * len(allowed_products))
-        cursor.execute(
-            f"""
-            SELECT 1
+            return set()
+
+        product_placeholders = ", ".join(["%s"] * len(allowed_products))
+        scope_sql = f"""
+            SELECT DISTINCT c.id
             FROM clientes c
             JOIN operacoes o ON o.cliente_id = c.id
-            WHERE c.id=%s
-              AND c.empresa_id=%s
+            WHERE c.empresa_id=%s
               AND o.empresa_id=%s
-              AND UPPER(o.produto) IN ({placeholders})
-            LIMIT 1
-            """,
-            (client_id, company_id, company_id, *allowed_products),
-        )
+              AND o.produto IN ({product_placeholders})
+              AND c.id IN ({{placeholders}})
+        """
+        scope_params = (company_id, company_id, *allowed_products)
     else:
-        cursor.execute(
-            "SELECT 1 FROM clientes WHERE id=%s AND vendedor_id=%s AND empresa_id=%s",
-            (client_id, user_id, company_id)
-        )
+        scope_sql = """
+            SELECT id
+            FROM clientes
+            WHERE vendedor_id=%s
+              AND empresa_id=%s
+              AND id IN ({placeholders})
+        """
+        scope_params = (user_id, company_id)
 
-    allowed = cursor.fetchone() is not None
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    ensure_company_scope_columns(cursor, db)
 
-    cursor.close()
-    db.close()
+    allowed = set()
+    try:
+        for start in range(0, len(ids), ACCESS_BATCH_SIZE):
+            chunk = ids[start : start + ACCESS_BATCH_SIZE]
+            cursor.execute(
+                scope_sql.format(placeholders=", ".join(["%s"] * len(chunk))),
+                (*scope_params, *chunk),
+            )
+            allowed.update(int(row["id"]) for row in cursor.fetchall())
+    finally:
+        cursor.close()
+        db.close()
 
     return allowed
 
+
+def can_access_client(client_id):
+    return int(client_id) in filter_accessible_clients([client_id])
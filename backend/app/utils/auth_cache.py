@@ -0,0 +1,68 @@
+import threading
+import time
+
+from app.config.settings import AUTH_CONTEXT_CACHE_MAX_USERS, AUTH_CONTEXT_CACHE_TTL_SECONDS
+from app.database import get_db
+
+# Role, company and digitador scope of each user, cached per worker so the
+# scope checks in utils/auth.py and current_user_company_id() stop reading
+# usuarios on every call. routes/users.py and the trash paths in
+# routes/system.py invalidate an entry whenever they change it; other workers
+# pick the change up when the TTL runs out.
+
+_auth_context_cache = {}
+_auth_context_lock = threading.Lock()
+
+
+def load_user_auth_context(user_id):
+    user_id = int(user_id)
+    now = time.monotonic()
+    with _auth_context_lock:
+        cached = _auth_context_cache.get(user_id)
+        if cached is not None and now < cached[0]:
+            return dict(cached[1])
+
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            """
+            SELECT
+                role,
+                empresa_id,
+                COALESCE(digitador_full_scope, 0) AS digitador_full_scope
+            FROM usuarios
+            WHERE id = %s
+            LIMIT 1
+            """,
+            (user_id,),
+        )
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+        db.close()
+
+    context = {
+        "exists": row is not None,
+        "role": str((row or {}).get("role") or "").strip().upper(),
+        "empresa_id": int((row or {}).get("empresa_id") or 0),
+        "digitador_full_scope": bool((row or {}).get("digitador_full_scope")),
+    }
+
+    with _auth_context_lock:
+        if len(_auth_context_cache) >= AUTH_CONTEXT_CACHE_MAX_USERS:
+            expired = [key for key, entry in _auth_context_cache.items() if entry[0] <= now]
+            for key in expired:
+                del _auth_context_cache[key]
+            if len(_auth_context_cache) >= AUTH_CONTEXT_CACHE_MAX_USERS:
+                _auth_context_cache.clear()
+        _auth_context_cache[user_id] = (now + AUTH_CONTEXT_CACHE_TTL_SECONDS, context)
+    return dict(context)
+
+
+def invalidate_user_auth_context(user_id=None):
+    with _auth_context_lock:
+        if user_id is None:
+            _auth_context_cache.clear()
+        else:
+            _auth_context_cache.pop(int(user_id), None)
@@ -5,27 +5,39 @@ from functools import wraps
 from flask import g
 from flask_jwt_extended import get_jwt, get_jwt_identity
 
-from app.database import get_db
+from app.migrations import (
+    migration_in_progress,
+    migration_step_done,
+    run_migrations,
+    schema_is_current,
+)
+from app.utils.auth_cache import load_user_auth_context
 
 DEFAULT_COMPANY_NAME = "JRCRED"
 DEFAULT_COMPANY_SLUG = "jrcred"
 
-_ENSURE_ONCE_DONE = set()
+_TABLE_COLUMNS_CACHE = {}
 
 
 def ensure_once(fn):
-    # These functions re-check/migrate table schema via INFORMATION_SCHEMA
-    # and full-table UPDATEs on every call. They're idempotent, so once a
-    # worker process confirms the schema they no longer need to repeat the
-    # checks on every request (this was previously running on every API call
-    # and dominating request latency).
+    # Schema changes live in versioned files under app/migrations and are
+    # applied once per deploy (python -m app.migrations, see Procfile). On
+    # request paths these functions are only guards: once the worker has seen
+    # the schema at the latest version they return without touching MySQL.
+    # A worker that finds the schema behind applies the pending migrations
+    # itself, under a MySQL named lock, instead of racing on ad-hoc DDL.
     @wraps(fn)
-    def wrapper(*args, **kwargs):
-        if fn in _ENSURE_ONCE_DONE:
-            return
-        result = fn(*args, **kwargs)
-        _ENSURE_ONCE_DONE.add(fn)
-        return result
+    def wrapper(cursor, db, *args, **kwargs):
+        if migration_in_progress():
+            if migration_step_done(fn):
+                return None
+            return fn(cursor, db, *args, **kwargs)
+
+        if schema_is_current(cursor):
+            return None
+
+        run_migrations()
+        return None
 
     return wrapper
 
@@ -315,10 +327,12 @@ def ensure_company_scope_columns(cursor, db):
         db.rollback()
         print(f"[company] dashboard_goals indexes skipped: {exc}")
 
+    # operacoes is left out: its composite indexes already lead with
+    # empresa_id (see migration 0019), so a single-column one would only be
+    # one more index to rewrite on every insert.
     index_targets = (
         ("usuarios", "idx_usuarios_empresa"),
         ("clientes", "idx_clientes_empresa"),
-        ("operacoes", "idx_operacoes_empresa"),
         ("documentos", "idx_documentos_empresa"),
         ("dashboard_goals", "idx_dashboard_goals_empresa"),
         ("operation_comments", "idx_operation_comments_empresa"),
@@ -391,25 +405,10 @@ def current_user_company_id():
         g._current_user_company_id = 0
         return 0
 
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
     try:
-        cursor.execute(
-            """
-            SELECT empresa_id
-            FROM usuarios
-            WHERE id = %s
-            LIMIT 1
-            """,
-            (user_id,),
-        )
-        row = cursor.fetchone() or {}
-        company_id = int(row.get("empresa_id") or 0)
+        company_id = load_user_auth_context(user_id)["empresa_id"]
     except Exception:
         company_id = 0
-    finally:
-        cursor.close()
-        db.close()
 
     g._current_user_company_id = company_id
     return company_id
@@ -525,30 +524,40 @@ def set_company_operations_lock(cursor, db, company_id, enabled, message, update
     return get_company_operations_lock(cursor, company_id)
 
 
-def table_exists(cursor, table_name):
+def table_columns(cursor, table_name):
+    # Column name -> CHARACTER_MAXIMUM_LENGTH, cached per worker. The schema
+    # only changes through migrations, which clear this cache when they run.
+    cached = _TABLE_COLUMNS_CACHE.get(table_name)
+    if cached is not None:
+        return cached
+
     cursor.execute(
         """
-        SELECT 1
-        FROM INFORMATION_SCHEMA.TABLES
+        SELECT
+            COLUMN_NAME,
+            CHARACTER_MAXIMUM_LENGTH
+        FROM INFORMATION_SCHEMA.COLUMNS
         WHERE TABLE_SCHEMA = DATABASE()
           AND TABLE_NAME = %s
-        LIMIT 1
         """,
         (table_name,),
     )
-    return cursor.fetchone() is not None
+    columns = {
+        row.get("COLUMN_NAME"): row.get("CHARACTER_MAXIMUM_LENGTH")
+        for row in cursor.fetchall()
+    }
+    if columns:
+        _TABLE_COLUMNS_CACHE[table_name] = columns
+    return columns
+
+
+def clear_table_columns_cache():
+    _TABLE_COLUMNS_CACHE.clear()
+
+
+def table_exists(cursor, table_name):
+    return bool(table_columns(cursor, table_name))
 
 
 def column_exists(cursor, table_name, column_name):
-    cursor.execute(
-        """
-        SELECT 1
-        FROM INFORMATION_SCHEMA.COLUMNS
-        WHERE TABLE_SCHEMA = DATABASE()
-          AND TABLE_NAME = %s
-          AND COLUMN_NAME = %s
-        LIMIT 1
-        """,
-        (table_name, column_name),
-    )
-    return cursor.fetchone() is not None
+    return column_name in table_columns(cursor, table_name)
@@ -0,0 +1,189 @@
+import threading
+import time
+
+from flask import g, has_request_context
+
+from app.config.settings import (
+    NOTIFICATIONS_SIGNAL_POLL_SECONDS,
+    NOTIFICATIONS_STREAM_HEARTBEAT_SECONDS,
+    NOTIFICATIONS_STREAM_MAX_PER_WORKER,
+    NOTIFICATIONS_STREAM_MAX_SECONDS,
+    NOTIFICATIONS_STREAM_RECHECK_SECONDS,
+)
+from app.database import get_db
+
+# Fan-out for /notifications/stream. Publishers only signal "user X has new
+# notifications"; each stream then reads the rows itself, so a signal that
+# arrives before the writer committed is harmless.
+#
+# The bus itself is in-process. Notifications written elsewhere (the outbox
+# worker, another gunicorn worker) are picked up by NotificationSignalPoller:
+# every path that adds, reads or drops notifications moves
+# notification_unread_counters.updated_at in the same transaction, so while
+# this worker has open streams one thread re-reads that column for their
+# users every NOTIFICATIONS_SIGNAL_POLL_SECONDS and publishes the ones that
+# changed. Streams still re-read MySQL every NOTIFICATIONS_STREAM_RECHECK_SECONDS
+# in case the poller is failing.
+
+
+class LocalNotificationBus:
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._versions = {}
+
+    def publish(self, user_ids):
+        with self._condition:
+            for user_id in user_ids:
+                self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self._condition.notify_all()
+
+    def version(self, user_id):
+        with self._condition:
+            return self._versions.get(user_id, 0)
+
+    def wait(self, user_id, seen_version, timeout):
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._versions.get(user_id, 0) != seen_version,
+                timeout,
+            )
+            return self._versions.get(user_id, 0)
+
+
+class NotificationSignalPoller:
+    def __init__(self, bus, interval):
+        self._bus = bus
+        self._interval = max(0.1, float(interval or 0))
+        self._condition = threading.Condition()
+        self._subscribers = {}
+        self._seen = {}
+        self._thread = None
+
+    def subscribe(self, user_id):
+        with self._condition:
+            self._subscribers[user_id] = self._subscribers.get(user_id, 0) + 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="notification-signal-poller",
+                    daemon=True,
+                )
+                self._thread.start()
+            self._condition.notify_all()
+
+    def unsubscribe(self, user_id):
+        with self._condition:
+            remaining = self._subscribers.get(user_id, 0) - 1
+            if remaining > 0:
+                self._subscribers[user_id] = remaining
+            else:
+                self._subscribers.pop(user_id, None)
+                self._seen.pop(user_id, None)
+
+    def poll_once(self):
+        """Publishes the subscribed users whose counter row moved since the
+        last poll (or that were never seen) and returns them."""
+        with self._condition:
+            user_ids = sorted(self._subscribers)
+        if not user_ids:
+            return set()
+
+        db = get_db(dedicated=True)
+        cursor = db.cursor(dictionary=True)
+        try:
+            placeholders = ", ".join(["%s"] * len(user_ids))
+            cursor.execute(
+                f"""
+                SELECT user_id, updated_at
+                FROM notification_unread_counters
+                WHERE user_id IN ({placeholders})
+                """,
+                tuple(user_ids),
+            )
+            rows = cursor.fetchall()
+            # Ends the snapshot so the next poll sees newer commits.
+            db.commit()
+        finally:
+            cursor.close()
+            db.close()
+
+        stamps = {int(row["user_id"]): row.get("updated_at") for row in rows}
+        changed = set()
+        with self._condition:
+            for user_id in user_ids:
+                if user_id not in self._subscribers:
+                    continue
+                stamp = stamps.get(user_id)
+                if user_id not in self._seen or self._seen[user_id] != stamp:
+                    changed.add(user_id)
+                self._seen[user_id] = stamp
+        if changed:
+            self._bus.publish(changed)
+        return changed
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._subscribers)
+            try:
+                self.poll_once()
+            except Exception:
+                # MySQL or the pool is struggling; the streams' own recheck
+                # keeps them going until the next poll works.
+                time.sleep(max(self._interval, 5))
+                continue
+            time.sleep(self._interval)
+
+
+notification_bus = LocalNotificationBus()
+notification_signal_poller = NotificationSignalPoller(notification_bus, NOTIFICATIONS_SIGNAL_POLL_SECONDS)
+
+_stream_slots = threading.BoundedSemaphore(max(1, NOTIFICATIONS_STREAM_MAX_PER_WORKER))
+
+
+def acquire_notification_stream_slot(user_id):
+    if not _stream_slots.acquire(blocking=False):
+        return False
+    notification_signal_poller.subscribe(user_id)
+    return True
+
+
+def release_notification_stream_slot(user_id):
+    notification_signal_poller.unsubscribe(user_id)
+    _stream_slots.release()
+
+
+def queue_notification_event(user_ids):
+    # Inside a request the signal waits for after_request, when the route has
+    # already committed; elsewhere (scripts, workers) it goes out right away.
+    # Either way only this process's streams hear it directly; the others
+    # notice the counter row through NotificationSignalPoller.
+    normalized = set()
+    for user_id in user_ids or ():
+        try:
+            value = int(user_id)
+        except (TypeError, ValueError):
+            continue
+        if value > 0:
+            normalized.add(value)
+
+    if not normalized:
+        return
+
+    if has_request_context():
+        pending = g.get("_pending_notification_users")
+        if pending is None:
+            pending = set()
+            g._pending_notification_users = pending
+        pending.update(normalized)
+        return
+
+    notification_bus.publish(normalized)
+
+
+def publish_pending_notification_events():
+    if not has_request_context():
+        return
+    pending = g.pop("_pending_notification_users", None)
+    if pending:
+        notification_bus.publish(pending)
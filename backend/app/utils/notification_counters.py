@@ -0,0 +1,142 @@
+# Per-user unread counter kept next to operation_notifications so the badge
+# is a primary-key read instead of COUNT(*) over the user's whole history.
+# Every path that inserts, reads or deletes notifications adjusts it in the
+# same transaction; reconcile_unread_notification_counters() fixes drift from
+# anything that slipped past (manual SQL, old restores, crashed requests).
+
+
+def adjust_unread_notification_counters(cursor, deltas):
+    merged = {}
+    for user_id, delta in (deltas or {}).items():
+        try:
+            user_id = int(user_id)
+            delta = int(delta)
+        except (TypeError, ValueError):
+            continue
+        if user_id > 0:
+            merged[user_id] = merged.get(user_id, 0) + delta
+
+    # Counter rows are locked in user_id order, whatever order the caller
+    # built the deltas in: two fan-outs with overlapping recipients then
+    # wait on each other instead of deadlocking.
+    rows = [
+        (user_id, max(delta, 0), delta)
+        for user_id, delta in sorted(merged.items())
+        if delta
+    ]
+    if not rows:
+        return
+
+    cursor.executemany(
+        """
+        INSERT INTO notification_unread_counters (user_id, unread_count)
+        VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE
+            unread_count = GREATEST(CAST(unread_count AS SIGNED) + %s, 0)
+        """,
+        rows,
+    )
+
+
+def count_unread_notifications_by_user(cursor, where_clause, params):
+    """Unread rows per user matching where_clause, as negative deltas ready
+    for adjust_unread_notification_counters() before those rows go away."""
+    cursor.execute(
+        f"""
+        SELECT user_id, COUNT(*) AS total
+        FROM operation_notifications
+        WHERE ({where_clause})
+          AND read_at IS NULL
+        GROUP BY user_id
+        """,
+        tuple(params),
+    )
+    deltas = {}
+    for row in cursor.fetchall():
+        if isinstance(row, dict):
+            user_id, total = row.get("user_id"), row.get("total")
+        else:
+            user_id, total = row[0], row[1]
+        deltas[int(user_id)] = -int(total or 0)
+    return deltas
+
+
+def release_unread_notifications(cursor, where_clause, params):
+    adjust_unread_notification_counters(
+        cursor,
+        count_unread_notifications_by_user(cursor, where_clause, params),
+    )
+
+
+def read_unread_notification_count(cursor, user_id):
+    cursor.execute(
+        "SELECT unread_count FROM notification_unread_counters WHERE user_id = %s",
+        (user_id,),
+    )
+    row = cursor.fetchone()
+    if not row:
+        return 0
+    value = row.get("unread_count") if isinstance(row, dict) else row[0]
+    return int(value or 0)
+
+
+def reconcile_unread_notification_counters(db, user_ids=None):
+    """
+    Recounts unread notifications per user and rewrites counters that
+    drifted. Each user is fixed in its own short transaction holding the
+    counter row lock, so concurrent increments are never overwritten.
+    Returns {"checked": n, "corrected": n}.
+    """
+    cursor = db.cursor(dictionary=True)
+    try:
+        if user_ids is None:
+            cursor.execute(
+                """
+                SELECT user_id FROM notification_unread_counters
+                UNION
+                SELECT DISTINCT user_id FROM operation_notifications WHERE read_at IS NULL
+                """
+            )
+            user_ids = [int(row["user_id"]) for row in cursor.fetchall()]
+            db.commit()
+
+        checked = 0
+        corrected = 0
+        for user_id in user_ids:
+            cursor.execute(
+                "INSERT IGNORE INTO notification_unread_counters (user_id, unread_count) VALUES (%s, 0)",
+                (user_id,),
+            )
+            cursor.execute(
+                "SELECT unread_count FROM notification_unread_counters WHERE user_id = %s FOR UPDATE",
+                (user_id,),
+            )
+            stored = int((cursor.fetchone() or {}).get("unread_count") or 0)
+            # Writers touch operation_notifications before the counter, so
+            # with the counter row locked this count already includes every
+            # committed change and none that is still in flight.
+            cursor.execute(
+                """
+                SELECT COUNT(*) AS total
+                FROM operation_notifications
+                WHERE user_id = %s
+                  AND read_at IS NULL
+                """,
+                (user_id,),
+            )
+            actual = int((cursor.fetchone() or {}).get("total") or 0)
+            if actual != stored:
+                cursor.execute(
+                    "UPDATE notification_unread_counters SET unread_count = %s WHERE user_id = %s",
+                    (actual, user_id),
+                )
+                corrected += 1
+            db.commit()
+            checked += 1
+
+        return {"checked": checked, "corrected": corrected}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
@@ -0,0 +1,206 @@
+from app.config.settings import (
+    NOTIFICATION_OUTBOX_BATCH_SIZE,
+    NOTIFICATION_OUTBOX_ENABLED,
+    NOTIFICATION_OUTBOX_MAX_ATTEMPTS,
+    NOTIFICATION_OUTBOX_RETENTION_HOURS,
+)
+from app.utils.security import json_dumps, json_loads
+
+# Request handlers call enqueue_notification_event() inside their own
+# transaction: one small INSERT instead of recipient discovery plus a bulk
+# insert on the hot write path. The worker (app.workers.notification_outbox)
+# claims pending rows with SKIP LOCKED and runs the registered handler, and
+# marks the row DONE, all in one transaction. A crash before the commit
+# leaves no notifications behind and the row is picked up again, so each
+# event is delivered exactly once. Failures are retried with exponential
+# backoff up to NOTIFICATION_OUTBOX_MAX_ATTEMPTS, then parked as FAILED.
+
+OUTBOX_STATUS_PENDING = "PENDING"
+OUTBOX_STATUS_DONE = "DONE"
+OUTBOX_STATUS_FAILED = "FAILED"
+
+OUTBOX_RETRY_BASE_SECONDS = 2
+OUTBOX_RETRY_MAX_SECONDS = 600
+OUTBOX_CLEANUP_BATCH_SIZE = 1000
+
+_handlers = {}
+
+
+def register_notification_handler(kind, handler):
+    _handlers[kind] = handler
+
+
+def notification_outbox_enabled():
+    return NOTIFICATION_OUTBOX_ENABLED
+
+
+def enqueue_notification_event(cursor, kind, payload, company_id=None):
+    if kind not in _handlers:
+        raise ValueError(f"Evento de notificacao desconhecido: {kind}")
+
+    if not notification_outbox_enabled():
+        _handlers[kind](cursor, **payload)
+        return
+
+    cursor.execute(
+        """
+        INSERT INTO notification_outbox (kind, payload, empresa_id)
+        VALUES (%s, %s, %s)
+        """,
+        (kind, json_dumps(payload), company_id or None),
+    )
+
+
+def retry_delay_seconds(attempts):
+    return min(OUTBOX_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)), OUTBOX_RETRY_MAX_SECONDS)
+
+
+def process_notification_outbox_batch(db, batch_size=NOTIFICATION_OUTBOX_BATCH_SIZE, log=None):
+    """
+    Delivers up to batch_size pending events in one transaction. Returns
+    {"claimed", "delivered", "retried", "failed", "max_lag_seconds"}.
+    """
+    cursor = db.cursor(dictionary=True)
+    result = {"claimed": 0, "delivered": 0, "retried": 0, "failed": 0, "max_lag_seconds": 0.0}
+    try:
+        cursor.execute(
+            """
+            SELECT
+                id,
+                kind,
+                payload,
+                attempts,
+                TIMESTAMPDIFF(MICROSECOND, created_at, NOW(6)) / 1000000 AS lag_seconds
+            FROM notification_outbox
+            WHERE status = %s
+              AND available_at <= NOW(6)
+            ORDER BY available_at ASC, id ASC
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+            """,
+            (OUTBOX_STATUS_PENDING, max(1, int(batch_size))),
+        )
+        events = cursor.fetchall()
+        result["claimed"] = len(events)
+
+        for event in events:
+            attempts = int(event.get("attempts") or 0) + 1
+            result["max_lag_seconds"] = max(
+                result["max_lag_seconds"], float(event.get("lag_seconds") or 0)
+            )
+
+            cursor.execute("SAVEPOINT outbox_event")
+            try:
+                handler = _handlers.get(event["kind"])
+                if handler is None:
+                    raise ValueError(f"Evento de notificacao desconhecido: {event['kind']}")
+                handler(cursor, **(json_loads(event.get("payload")) or {}))
+            except Exception as exc:
+                cursor.execute("ROLLBACK TO SAVEPOINT outbox_event")
+                error_text = f"{type(exc).__name__}: {exc}"[:500]
+                if attempts >= NOTIFICATION_OUTBOX_MAX_ATTEMPTS:
+                    cursor.execute(
+                        """
+                        UPDATE notification_outbox
+                        SET status = %s, attempts = %s, last_error = %s, processed_at = NOW(6)
+                        WHERE id = %s
+                        """,
+                        (OUTBOX_STATUS_FAILED, attempts, error_text, event["id"]),
+                    )
+                    result["failed"] += 1
+                else:
+                    cursor.execute(
+                        """
+                        UPDATE notification_outbox
+                        SET attempts = %s,
+                            last_error = %s,
+                            available_at = NOW(6) + INTERVAL %s SECOND
+                        WHERE id = %s
+                        """,
+                        (attempts, error_text, retry_delay_seconds(attempts), event["id"]),
+                    )
+                    result["retried"] += 1
+                if log:
+                    log(f"[notification-outbox] evento {event['id']} falhou (tentativa {attempts}): {error_text}")
+                continue
+
+            cursor.execute(
+                """
+                UPDATE notification_outbox
+                SET status = %s, attempts = %s, last_error = NULL, processed_at = NOW(6)
+                WHERE id = %s
+                """,
+                (OUTBOX_STATUS_DONE, attempts, event["id"]),
+            )
+            cursor.execute("RELEASE SAVEPOINT outbox_event")
+            result["delivered"] += 1
+
+        db.commit()
+        return result
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def purge_delivered_notification_events(db, retention_hours=NOTIFICATION_OUTBOX_RETENTION_HOURS):
+    cursor = db.cursor()
+    try:
+        cursor.execute(
+            """
+            DELETE FROM notification_outbox
+            WHERE status = %s
+              AND created_at < NOW(6) - INTERVAL %s HOUR
+            ORDER BY created_at
+            LIMIT %s
+            """,
+            (OUTBOX_STATUS_DONE, max(1, int(retention_hours)), OUTBOX_CLEANUP_BATCH_SIZE),
+        )
+        deleted = max(cursor.rowcount, 0)
+        db.commit()
+        return deleted
+    finally:
+        cursor.close()
+
+
+def notification_outbox_stats(cursor):
+    cursor.execute(
+        """
+        SELECT
+            status,
+            COUNT(*) AS total,
+            MIN(created_at) AS oldest_created_at,
+            TIMESTAMPDIFF(MICROSECOND, MIN(created_at), NOW(6)) / 1000000 AS oldest_age_seconds
+        FROM notification_outbox
+        WHERE status IN (%s, %s)
+        GROUP BY status
+        """,
+        (OUTBOX_STATUS_PENDING, OUTBOX_STATUS_FAILED),
+    )
+    by_status = {row["status"]: row for row in cursor.fetchall()}
+    pending = by_status.get(OUTBOX_STATUS_PENDING) or {}
+    failed = by_status.get(OUTBOX_STATUS_FAILED) or {}
+
+    cursor.execute(
+        """
+        SELECT
+            MAX(processed_at) AS last_processed_at,
+            AVG(TIMESTAMPDIFF(MICROSECOND, created_at, processed_at)) / 1000000 AS avg_lag_seconds
+        FROM notification_outbox
+        WHERE status = %s
+          AND created_at >= NOW(6) - INTERVAL 15 MINUTE
+        """,
+        (OUTBOX_STATUS_DONE,),
+    )
+    recent = cursor.fetchone() or {}
+
+    return {
+        "enabled": notification_outbox_enabled(),
+        "pending": int(pending.get("total") or 0),
+        "oldest_pending_age_seconds": round(float(pending.get("oldest_age_seconds") or 0), 3),
+        "failed": int(failed.get("total") or 0),
+        "last_processed_at": recent.get("last_processed_at"),
+        "avg_lag_seconds_15m": round(float(recent.get("avg_lag_seconds") or 0), 3),
+    }
+
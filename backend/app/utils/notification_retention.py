@@ -0,0 +1,135 @@
+import time
+
+import mysql.connector
+
+from app.config.settings import (
+    NOTIFICATION_ARCHIVE_BATCH_SIZE,
+    NOTIFICATION_ARCHIVE_MAX_SECONDS,
+    NOTIFICATION_ARCHIVE_PAUSE_SECONDS,
+    NOTIFICATION_RETENTION_DAYS,
+)
+
+# Moves read notifications older than the retention window from
+# operation_notifications to operation_notifications_archive. Each batch is
+# its own short transaction (copy + delete by primary key), so the hot table
+# only ever has a few hundred rows locked, and a run that stops halfway just
+# continues from the oldest remaining row next time: archived rows are gone
+# from the source, so no progress marker is needed.
+
+NOTIFICATION_ARCHIVE_COLUMNS = (
+    "id",
+    "user_id",
+    "empresa_id",
+    "operation_id",
+    "previous_status",
+    "next_status",
+    "title",
+    "message",
+    "read_at",
+    "created_at",
+)
+
+# A batch that has to wait on a row lock is skipped for this round instead of
+# queueing behind user traffic.
+NOTIFICATION_ARCHIVE_LOCK_WAIT_SECONDS = 2
+LOCK_WAIT_TIMEOUT_ERRNO = 1205
+DEADLOCK_ERRNO = 1213
+
+
+def archive_read_notifications(
+    db,
+    retention_days=NOTIFICATION_RETENTION_DAYS,
+    batch_size=NOTIFICATION_ARCHIVE_BATCH_SIZE,
+    pause_seconds=NOTIFICATION_ARCHIVE_PAUSE_SECONDS,
+    max_seconds=NOTIFICATION_ARCHIVE_MAX_SECONDS,
+    log=None,
+):
+    """
+    Archives read notifications in batches until none are left or the time
+    budget runs out. Returns {"archived": n, "batches": n, "finished": bool}.
+    """
+    retention_days = max(1, int(retention_days))
+    batch_size = max(1, int(batch_size))
+    columns_sql = ", ".join(NOTIFICATION_ARCHIVE_COLUMNS)
+
+    cursor = db.cursor(dictionary=True)
+    started = time.monotonic()
+    archived = 0
+    batches = 0
+    finished = False
+
+    try:
+        cursor.execute(
+            "SET SESSION innodb_lock_wait_timeout = %s",
+            (NOTIFICATION_ARCHIVE_LOCK_WAIT_SECONDS,),
+        )
+        cursor.execute(
+            "SELECT NOW() - INTERVAL %s DAY AS cutoff",
+            (retention_days,),
+        )
+        cutoff = (cursor.fetchone() or {}).get("cutoff")
+        db.commit()
+
+        while time.monotonic() - started < max_seconds:
+            cursor.execute(
+                """
+                SELECT id
+                FROM operation_notifications
+                WHERE read_at IS NOT NULL
+                  AND read_at < %s
+                ORDER BY read_at ASC, id ASC
+                LIMIT %s
+                """,
+                (cutoff, batch_size),
+            )
+            ids = [int(row["id"]) for row in cursor.fetchall()]
+            db.commit()
+            if not ids:
+                finished = True
+                break
+
+            placeholders = ", ".join(["%s"] * len(ids))
+            try:
+                cursor.execute(
+                    f"""
+                    INSERT IGNORE INTO operation_notifications_archive ({columns_sql})
+                    SELECT {columns_sql}
+                    FROM operation_notifications
+                    WHERE id IN ({placeholders})
+                      AND read_at IS NOT NULL
+                    """,
+                    tuple(ids),
+                )
+                cursor.execute(
+                    f"""
+                    DELETE FROM operation_notifications
+                    WHERE id IN ({placeholders})
+                      AND read_at IS NOT NULL
+                    """,
+                    tuple(ids),
+                )
+                moved = max(cursor.rowcount, 0)
+                db.commit()
+            except mysql.connector.Error as exc:
+                db.rollback()
+                if exc.errno not in {LOCK_WAIT_TIMEOUT_ERRNO, DEADLOCK_ERRNO}:
+                    raise
+                if log:
+                    log(f"[notification-archive] lote adiado por lock: {exc}")
+                time.sleep(max(pause_seconds, 1.0))
+                continue
+
+            archived += moved
+            batches += 1
+            if log:
+                log(f"[notification-archive] lote {batches}: {moved} notificacoes arquivadas")
+
+            if len(ids) < batch_size:
+                finished = True
+                break
+            if pause_seconds > 0:
+                time.sleep(pause_seconds)
+
+        return {"archived": archived, "batches": batches, "finished": finished}
+    finally:
+        cursor.close()
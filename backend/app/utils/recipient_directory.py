@@ -0,0 +1,105 @@
+import threading
+import time
+
+from app.config.settings import RECIPIENT_DIRECTORY_CHECK_SECONDS
+
+# Who receives operation notifications by (empresa_id, role), built from a
+# single read of usuarios and shared by every notify/deliver helper, so a
+# status change costs no user-table scan. User writes in routes/users.py and
+# the trash paths of routes/system.py call bump_recipient_directory_version()
+# in their own transaction; each process (web workers and the outbox worker)
+# compares that version at most every RECIPIENT_DIRECTORY_CHECK_SECONDS and
+# rebuilds when it moved.
+
+RECIPIENT_DIRECTORY_VERSION_KEY = "recipient_directory_version"
+
+_directory = {"data": None, "version": None, "checked_at": 0.0}
+_directory_lock = threading.Lock()
+
+
+class RecipientDirectory:
+    def __init__(self, rows):
+        self.by_company_role = {}
+        self.by_role = {}
+        for row in rows:
+            user_id = int(row.get("id") or 0)
+            if user_id <= 0:
+                continue
+            role = str(row.get("role") or "").strip().upper()
+            company_id = int(row.get("empresa_id") or 0)
+            self.by_company_role.setdefault((company_id, role), set()).add(user_id)
+            self.by_role.setdefault(role, set()).add(user_id)
+
+    def users(self, company_id, roles):
+        """Users with any of roles in company_id; company 0 means every company."""
+        company_id = int(company_id or 0)
+        result = set()
+        for role in roles:
+            role = str(role or "").strip().upper()
+            if company_id == 0:
+                result |= self.by_role.get(role, set())
+            else:
+                result |= self.by_company_role.get((company_id, role), set())
+        return result
+
+    def users_any_company(self, roles):
+        return self.users(0, roles)
+
+
+def get_recipient_directory_version(cursor):
+    cursor.execute(
+        """
+        SELECT setting_value
+        FROM system_settings
+        WHERE setting_key = %s
+        LIMIT 1
+        """,
+        (RECIPIENT_DIRECTORY_VERSION_KEY,),
+    )
+    row = cursor.fetchone()
+    value = row.get("setting_value") if isinstance(row, dict) else (row[0] if row else None)
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def get_recipient_directory(cursor):
+    now = time.monotonic()
+    with _directory_lock:
+        if _directory["data"] is not None and now - _directory["checked_at"] < RECIPIENT_DIRECTORY_CHECK_SECONDS:
+            return _directory["data"]
+
+        version = get_recipient_directory_version(cursor)
+        if _directory["data"] is None or _directory["version"] != version:
+            cursor.execute("SELECT id, role, empresa_id FROM usuarios")
+            _directory["data"] = RecipientDirectory(cursor.fetchall())
+            _directory["version"] = version
+        _directory["checked_at"] = now
+        return _directory["data"]
+
+
+def bump_recipient_directory_version(cursor, updated_by=None):
+    cursor.execute(
+        """
+        INSERT INTO system_settings (
+            setting_key,
+            setting_value,
+            updated_by
+        )
+        VALUES (%s, '1', %s)
+        ON DUPLICATE KEY UPDATE
+            setting_value = CAST(COALESCE(setting_value, '0') AS UNSIGNED) + 1,
+            updated_by = VALUES(updated_by),
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        (RECIPIENT_DIRECTORY_VERSION_KEY, updated_by),
+    )
+    invalidate_recipient_directory()
+
+
+def invalidate_recipient_directory():
+    with _directory_lock:
+        _directory["data"] = None
+        _directory["version"] = None
+        _directory["checked_at"] = 0.0
@@ -0,0 +1,389 @@
+import bisect
+import re
+import threading
+import time
+import unicodedata
+import zlib
+
+from app.config.settings import (
+    CLIENT_SEARCH_INDEX_ENABLED,
+    CLIENT_SEARCH_INDEX_RECONCILE_SECONDS,
+)
+
+# Optional per-worker search index for /search/global. Each company gets its
+# own partition with trigram postings over the folded client name, 2-letter
+# word prefixes, and a sorted list of CPF/benefit digits for prefix ranges.
+# Partitions are loaded on the first search that needs them, patched by the
+# client write paths of this worker, and reconciled against clientes with a
+# CRC32 checksum so writes made by other workers are picked up. Queries and
+# partition builds run outside the index lock; it is only held to swap a
+# partition in, patch it, or match against it.
+
+CLIENT_SEARCH_RESULT_FIELDS = (
+    "id",
+    "nome",
+    "cpf",
+    "numero_beneficio",
+    "vendedor_id",
+    "vendedor_nome",
+)
+
+CLIENT_SEARCH_SELECT_SQL = """
+    SELECT
+        c.id,
+        c.empresa_id,
+        c.nome,
+        c.cpf,
+        c.numero_beneficio,
+        c.vendedor_id,
+        COALESCE(v.nome, '-') AS vendedor_nome
+    FROM clientes c
+    LEFT JOIN usuarios v ON v.id = c.vendedor_id
+"""
+
+CLIENT_SEARCH_CHECKSUM_SQL = """
+    SELECT
+        COUNT(*) AS total,
+        COALESCE(BIT_XOR(CRC32(CONCAT_WS(
+            '|',
+            c.id,
+            COALESCE(c.nome, ''),
+            COALESCE(c.cpf, ''),
+            COALESCE(c.numero_beneficio, ''),
+            COALESCE(c.vendedor_id, 0),
+            COALESCE(v.nome, '-')
+        ))), 0) AS checksum
+    FROM clientes c
+    LEFT JOIN usuarios v ON v.id = c.vendedor_id
+"""
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def normalize_search_name(value):
+    text = unicodedata.normalize("NFKD", str(value or ""))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def _digits(value):
+    return "".join(char for char in str(value or "") if char.isdigit())
+
+
+def _trigrams(text):
+    return {text[index : index + 3] for index in range(len(text) - 2)}
+
+
+def _row_checksum(row):
+    text = "|".join(
+        [
+            str(int(row.get("id") or 0)),
+            str(row.get("nome") or ""),
+            str(row.get("cpf") or ""),
+            str(row.get("numero_beneficio") or ""),
+            str(int(row.get("vendedor_id") or 0)),
+            str(row.get("vendedor_nome") or "-"),
+        ]
+    )
+    return zlib.crc32(text.encode("utf-8"))
+
+
+def _partition_key(company_id):
+    try:
+        return int(company_id or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _partition_where(company_id):
+    if company_id <= 0:
+        return "WHERE c.empresa_id IS NULL", ()
+    return "WHERE c.empresa_id = %s", (company_id,)
+
+
+class ClientSearchPartition:
+    def __init__(self):
+        self.docs = {}
+        self.trigrams = {}
+        self.word_prefixes = {}
+        self.digits = []
+        self.checksum = 0
+        self.loaded_at = 0.0
+
+    @classmethod
+    def build(cls, rows):
+        partition = cls()
+        for row in rows:
+            partition.add(row, keep_sorted=False)
+        partition.digits.sort()
+        return partition
+
+    def add(self, row, keep_sorted=True):
+        # keep_sorted=False appends to digits; build() sorts them once at the
+        # end instead of paying an insort per row.
+        client_id = int(row["id"])
+        self.remove(client_id)
+
+        name = normalize_search_name(row.get("nome"))
+        digit_values = {
+            value
+            for value in (_digits(row.get("cpf")), _digits(row.get("numero_beneficio")))
+            if value
+        }
+        doc = {field: row.get(field) for field in CLIENT_SEARCH_RESULT_FIELDS}
+        doc["_name"] = name
+        doc["_digits"] = digit_values
+        doc["_checksum"] = _row_checksum(row)
+        self.docs[client_id] = doc
+
+        for trigram in _trigrams(name):
+            self.trigrams.setdefault(trigram, set()).add(client_id)
+        for word in name.split(" "):
+            if len(word) >= 2:
+                self.word_prefixes.setdefault(word[:2], set()).add(client_id)
+        for value in digit_values:
+            if keep_sorted:
+                bisect.insort(self.digits, (value, client_id))
+            else:
+                self.digits.append((value, client_id))
+        self.checksum ^= doc["_checksum"]
+
+    def remove(self, client_id):
+        doc = self.docs.pop(client_id, None)
+        if doc is None:
+            return
+
+        name = doc["_name"]
+        for trigram in _trigrams(name):
+            self._discard(self.trigrams, trigram, client_id)
+        for word in name.split(" "):
+            if len(word) >= 2:
+                self._discard(self.word_prefixes, word[:2], client_id)
+        for value in doc["_digits"]:
+            position = bisect.bisect_left(self.digits, (value, client_id))
+            if position < len(self.digits) and self.digits[position] == (value, client_id):
+                del self.digits[position]
+        self.checksum ^= doc["_checksum"]
+
+    @staticmethod
+    def _discard(postings, key, client_id):
+        ids = postings.get(key)
+        if ids is None:
+            return
+        ids.discard(client_id)
+        if not ids:
+            del postings[key]
+
+    def match_digits(self, digits):
+        matches = set()
+        position = bisect.bisect_left(self.digits, (digits,))
+        while position < len(self.digits) and self.digits[position][0].startswith(digits):
+            matches.add(self.digits[position][1])
+            position += 1
+        return matches
+
+    def match_name(self, words):
+        candidates = None
+        for word in words:
+            if len(word) >= 3:
+                word_ids = None
+                for trigram in _trigrams(word):
+                    postings = self.trigrams.get(trigram, set())
+                    word_ids = set(postings) if word_ids is None else word_ids & postings
+                    if not word_ids:
+                        return set()
+            else:
+                word_ids = set(self.word_prefixes.get(word, set()))
+            candidates = word_ids if candidates is None else candidates & word_ids
+            if not candidates:
+                return set()
+
+        # Trigram postings only say every trigram is somewhere in the name;
+        # confirm each word really is a substring (or a word prefix for the
+        # 2-letter case) before returning the client.
+        matches = set()
+        for client_id in candidates or ():
+            name = self.docs[client_id]["_name"]
+            name_words = name.split(" ")
+            if all(
+                word in name if len(word) >= 3 else any(item.startswith(word) for item in name_words)
+                for word in words
+            ):
+                matches.add(client_id)
+        return matches
+
+
+class ClientSearchIndex:
+    def __init__(self, reconcile_seconds):
+        self.reconcile_seconds = max(0.0, float(reconcile_seconds or 0))
+        self._lock = threading.RLock()
+        self._partitions = {}
+        self._client_partition = {}
+        self._all_loaded = False
+        # Bumped by every upsert/remove, so a load can tell that its snapshot
+        # may have missed a patch.
+        self._writes = 0
+
+    def _load(self, cursor, company_id=None):
+        with self._lock:
+            writes = self._writes
+
+        if company_id is None:
+            cursor.execute(CLIENT_SEARCH_SELECT_SQL)
+        else:
+            where_clause, params = _partition_where(company_id)
+            cursor.execute(f"{CLIENT_SEARCH_SELECT_SQL} {where_clause}", params)
+        rows_by_key = {}
+        if company_id is not None:
+            rows_by_key[company_id] = []
+        for row in cursor.fetchall():
+            rows_by_key.setdefault(_partition_key(row.get("empresa_id")), []).append(row)
+        partitions = {key: ClientSearchPartition.build(rows) for key, rows in rows_by_key.items()}
+
+        with self._lock:
+            # A write patched the old partitions while these were built; check
+            # them against clientes on the next search instead of trusting them.
+            loaded_at = time.monotonic() if writes == self._writes else 0.0
+            for key, partition in partitions.items():
+                partition.loaded_at = loaded_at
+                previous = self._partitions.get(key)
+                if previous is not None:
+                    for client_id in previous.docs:
+                        self._client_partition.pop(client_id, None)
+                self._partitions[key] = partition
+                for client_id in partition.docs:
+                    self._client_partition[client_id] = key
+
+    def _reconcile(self, cursor, company_id):
+        with self._lock:
+            partition = self._partitions[company_id]
+            if time.monotonic() - partition.loaded_at < self.reconcile_seconds:
+                return
+            expected = (len(partition.docs), partition.checksum)
+
+        where_clause, params = _partition_where(company_id)
+        cursor.execute(f"{CLIENT_SEARCH_CHECKSUM_SQL} {where_clause}", params)
+        row = cursor.fetchone() or {}
+        total = int(row.get("total") or 0)
+        checksum = int(row.get("checksum") or 0)
+        if (total, checksum) == expected:
+            with self._lock:
+                partition.loaded_at = time.monotonic()
+            return
+        self._load(cursor, company_id)
+
+    def _partitions_for(self, cursor, company_id):
+        if company_id is None:
+            with self._lock:
+                all_loaded = self._all_loaded
+            if not all_loaded:
+                self._load(cursor)
+                with self._lock:
+                    self._all_loaded = True
+            with self._lock:
+                keys = list(self._partitions)
+            for key in keys:
+                self._reconcile(cursor, key)
+            with self._lock:
+                return list(self._partitions.values())
+
+        key = _partition_key(company_id)
+        with self._lock:
+            loaded = key in self._partitions
+        if not loaded:
+            self._load(cursor, key)
+        else:
+            self._reconcile(cursor, key)
+        with self._lock:
+            return [self._partitions[key]]
+
+    def search(self, cursor, company_id, query, digits_query):
+        """
+        Returns the indexed clients matching query inside company_id (None
+        searches every company), ordered by folded name then id.
+        """
+        words = [word for word in normalize_search_name(query).split(" ") if len(word) >= 2]
+        digits = _digits(query)
+
+        partitions = self._partitions_for(cursor, company_id)
+        with self._lock:
+            docs = []
+            for partition in partitions:
+                if digits_query:
+                    matches = partition.match_digits(digits)
+                elif words:
+                    matches = partition.match_name(words)
+                else:
+                    matches = set()
+                docs.extend(partition.docs[client_id] for client_id in matches)
+
+        docs.sort(key=lambda doc: (doc["_name"], int(doc["id"])))
+        return [{field: doc.get(field) for field in CLIENT_SEARCH_RESULT_FIELDS} for doc in docs]
+
+    def upsert(self, cursor, client_id):
+        with self._lock:
+            if not self._partitions:
+                return
+
+        cursor.execute(f"{CLIENT_SEARCH_SELECT_SQL} WHERE c.id = %s", (client_id,))
+        row = cursor.fetchone()
+        with self._lock:
+            self._writes += 1
+            self._remove_locked(client_id)
+            if not row:
+                return
+
+            key = _partition_key(row.get("empresa_id"))
+            partition = self._partitions.get(key)
+            if partition is None:
+                # Partition not loaded yet; it will be read in full on demand.
+                return
+            partition.add(row)
+            self._client_partition[client_id] = key
+
+    def remove(self, client_id):
+        with self._lock:
+            self._writes += 1
+            self._remove_locked(client_id)
+
+    def _remove_locked(self, client_id):
+        key = self._client_partition.pop(client_id, None)
+        if key is None:
+            return
+        partition = self._partitions.get(key)
+        if partition is not None:
+            partition.remove(client_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "partitions": len(self._partitions),
+                "clients": len(self._client_partition),
+                "reconcile_seconds": self.reconcile_seconds,
+            }
+
+
+def client_search_index_enabled():
+    return CLIENT_SEARCH_INDEX_ENABLED
+
+
+def get_client_search_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = ClientSearchIndex(CLIENT_SEARCH_INDEX_RECONCILE_SECONDS)
+    return _index
+
+
+def index_client(cursor, client_id):
+    if not client_search_index_enabled() or _index is None:
+        return
+    _index.upsert(cursor, int(client_id))
+
+
+def unindex_client(client_id):
+    if not client_search_index_enabled() or _index is None:
+        return
+    _index.remove(int(client_id))
@@ -3,6 +3,7 @@ import hmac
 import json
 import secrets
 import struct
+import threading
 import time
 from datetime import date, datetime
 from decimal import Decimal
@@ -11,6 +12,8 @@ from urllib.parse import quote
 
 from flask import request
 
+from app.config.settings import MAINTENANCE_CACHE_TTL_SECONDS
+from app.database import get_db
 from app.utils.company import ensure_once
 
 ROLE_ADMIN = "ADMIN"
@@ -20,6 +23,15 @@ TOTP_PERIOD_SECONDS = 30
 TOTP_DIGITS = 6
 TOTP_WINDOW_STEPS = 1
 
+# Per-worker copy of the maintenance flag. Once the TTL runs out the worker
+# only reads the version row; the full state is reloaded when some worker
+# bumped it through set_maintenance_state. The caller of set_maintenance_state
+# invalidates this worker's copy once its transaction has committed; the
+# generation keeps a reload that started before that from storing the old
+# state afterwards.
+_maintenance_cache = {"state": None, "version": None, "expires_at": 0.0, "generation": 0}
+_maintenance_cache_lock = threading.Lock()
+
 
 def normalize_role(role):
     return str(role or "").strip().upper()
@@ -239,6 +251,60 @@ def get_maintenance_state(cursor):
     return {"enabled": enabled, "message": message}
 
 
+def get_maintenance_version(cursor):
+    cursor.execute(
+        """
+        SELECT setting_value
+        FROM system_settings
+        WHERE setting_key = 'maintenance_mode_version'
+        LIMIT 1
+        """
+    )
+    row = cursor.fetchone()
+    try:
+        return int((row or {}).get("setting_value") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def get_cached_maintenance_state():
+    with _maintenance_cache_lock:
+        if (
+            _maintenance_cache["state"] is not None
+            and time.monotonic() < _maintenance_cache["expires_at"]
+        ):
+            return dict(_maintenance_cache["state"])
+        cached_state = _maintenance_cache["state"]
+        cached_version = _maintenance_cache["version"]
+        generation = _maintenance_cache["generation"]
+
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    try:
+        ensure_system_settings_table(cursor, db)
+        version = get_maintenance_version(cursor)
+        if cached_state is None or cached_version != version:
+            cached_state = get_maintenance_state(cursor)
+    finally:
+        cursor.close()
+        db.close()
+
+    with _maintenance_cache_lock:
+        if _maintenance_cache["generation"] == generation:
+            _maintenance_cache["state"] = cached_state
+            _maintenance_cache["version"] = version
+            _maintenance_cache["expires_at"] = time.monotonic() + MAINTENANCE_CACHE_TTL_SECONDS
+    return dict(cached_state)
+
+
+def invalidate_maintenance_cache():
+    with _maintenance_cache_lock:
+        _maintenance_cache["state"] = None
+        _maintenance_cache["version"] = None
+        _maintenance_cache["expires_at"] = 0.0
+        _maintenance_cache["generation"] += 1
+
+
 def set_maintenance_state(cursor, enabled, message, updated_by):
     payload = json_dumps(
         {
@@ -261,6 +327,21 @@ def set_maintenance_state(cursor, enabled, message, updated_by):
         """,
         (payload, updated_by),
     )
+    cursor.execute(
+        """
+        INSERT INTO system_settings (
+            setting_key,
+            setting_value,
+            updated_by
+        )
+        VALUES ('maintenance_mode_version', '1', %s)
+        ON DUPLICATE KEY UPDATE
+            setting_value = CAST(COALESCE(setting_value, '0') AS UNSIGNED) + 1,
+            updated_by = VALUES(updated_by),
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        (updated_by,),
+    )
 
 
 def generate_totp_secret(length=32):
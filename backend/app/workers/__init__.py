@@ -0,0 +1 @@
+# Background processes, each run with python -m app.workers.<name>.
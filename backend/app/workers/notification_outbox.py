@@ -0,0 +1,86 @@
+import signal
+import sys
+import time
+
+import mysql.connector
+
+from app.config.settings import (
+    NOTIFICATION_OUTBOX_BATCH_SIZE,
+    NOTIFICATION_OUTBOX_POLL_SECONDS,
+)
+from app.database import get_db
+
+# Importing the routes registers the notification handlers the outbox calls.
+import app.routes.clients  # noqa: F401
+from app.utils.notification_outbox import (
+    process_notification_outbox_batch,
+    purge_delivered_notification_events,
+)
+
+# Background process that drains notification_outbox:
+#   python -m app.workers.notification_outbox          # runs until SIGTERM
+#   python -m app.workers.notification_outbox --once   # drains and exits
+# Several copies can run side by side; SKIP LOCKED keeps their batches apart.
+
+PURGE_INTERVAL_SECONDS = 600
+
+_stopping = False
+
+
+def _request_stop(signum, frame):
+    global _stopping
+    _stopping = True
+
+
+def run(once=False, log=print):
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+
+    next_purge = 0.0
+    totals = {"delivered": 0, "retried": 0, "failed": 0}
+    log(f"[notification-outbox] worker iniciado (lote {NOTIFICATION_OUTBOX_BATCH_SIZE})")
+
+    while not _stopping:
+        started = time.monotonic()
+        try:
+            db = get_db()
+            try:
+                result = process_notification_outbox_batch(
+                    db,
+                    batch_size=NOTIFICATION_OUTBOX_BATCH_SIZE,
+                    log=log,
+                )
+                if started >= next_purge:
+                    purged = purge_delivered_notification_events(db)
+                    next_purge = started + PURGE_INTERVAL_SECONDS
+                    if purged:
+                        log(f"[notification-outbox] {purged} eventos entregues removidos")
+            finally:
+                db.close()
+        except mysql.connector.Error as exc:
+            log(f"[notification-outbox] falha de banco, tentando de novo: {exc}")
+            time.sleep(max(NOTIFICATION_OUTBOX_POLL_SECONDS, 5))
+            continue
+
+        for key in totals:
+            totals[key] += result[key]
+        if result["claimed"]:
+            log(
+                "[notification-outbox] lote: {claimed} eventos, {delivered} entregues, "
+                "{retried} reagendados, {failed} descartados, lag max {max_lag_seconds:.3f}s".format(**result)
+            )
+
+        if result["claimed"] >= NOTIFICATION_OUTBOX_BATCH_SIZE:
+            continue
+        if once:
+            break
+        remaining = NOTIFICATION_OUTBOX_POLL_SECONDS - (time.monotonic() - started)
+        if remaining > 0:
+            time.sleep(remaining)
+
+    log(f"[notification-outbox] worker encerrado: {totals}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(once="--once" in sys.argv[1:]))
@@ -0,0 +1,30 @@
+class SqliteCursor:
+    # Just enough of a mysql-connector dictionary cursor for these queries.
+    def __init__(self, connection):
+        self._cursor = connection.cursor()
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(sql.replace("%s", "?"), tuple(params))
+
+    def fetchall(self):
+        columns = [column[0] for column in self._cursor.description]
+        return [dict(zip(columns, row)) for row in self._cursor.fetchall()]
+
+    def fetchone(self):
+        rows = self.fetchall()
+        return rows[0] if rows else None
+
+    def close(self):
+        self._cursor.close()
+
+
+class SqliteDb:
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, dictionary=False):
+        return SqliteCursor(self._connection)
+
+    def close(self):
+        # Same as the request-shared connection: close() is a no-op.
+        pass
@@ -0,0 +1,111 @@
+import itertools
+import sqlite3
+
+import pytest
+
+from app.utils import auth
+from sqlite_db import SqliteDb
+
+ROLES = (
+    "GLOBAL",
+    "ADMIN",
+    "VENDEDOR",
+    "DIGITADOR_PORT_REFIN",
+    "DIGITADOR_NOVO_CARTAO",
+    "DIGITADOR_OUTRO",
+    "SUPORTE",
+)
+COMPANY_IDS = (None, 1, 2)
+SELLER_IDS = (None, 1, 2)
+# Each client gets one operation set: none, one product, or two products
+# (one of them in the other company).
+OPERATION_SETS = (
+    (),
+    ((None, "PORTABILIDADE"),),
+    (("same", "REFINANCIAMENTO"),),
+    (("same", "CARTAO"),),
+    (("same", "CONSIGNADO"),),
+    ((2, "NOVO"), ("same", "CONSIGNADO")),
+    ((1, "FGTS"), (2, "PORTABILIDADE_REFIN")),
+)
+
+
+def build_database():
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE clientes (id INTEGER PRIMARY KEY, empresa_id INTEGER, vendedor_id INTEGER)")
+    connection.execute("CREATE TABLE operacoes (id INTEGER PRIMARY KEY, cliente_id INTEGER, empresa_id INTEGER, produto TEXT)")
+    cases = itertools.product(COMPANY_IDS, SELLER_IDS, OPERATION_SETS)
+    for client_id, (company_id, seller_id, operations) in enumerate(cases, start=1):
+        connection.execute(
+            "INSERT INTO clientes (id, empresa_id, vendedor_id) VALUES (?, ?, ?)",
+            (client_id, company_id, seller_id),
+        )
+        for operation_company_id, product in operations:
+            connection.execute(
+                "INSERT INTO operacoes (cliente_id, empresa_id, produto) VALUES (?, ?, ?)",
+                (client_id, company_id if operation_company_id == "same" else operation_company_id, product),
+            )
+    return connection
+
+
+def original_can_access_client(connection, role, user_id, company_id, full_scope, client_id):
+    # The per-id check as it stood before filter_accessible_clients existed.
+    if role == "GLOBAL":
+        return True
+    if not user_id or company_id <= 0:
+        return False
+
+    if role in {"ADMIN", "GLOBAL"} or (role.startswith("DIGITADOR") and full_scope):
+        row = connection.execute(
+            "SELECT 1 FROM clientes WHERE id=? AND empresa_id=?", (client_id, company_id)
+        ).fetchone()
+    elif role.startswith("DIGITADOR"):
+        allowed_products = {
+            "DIGITADOR_PORT_REFIN": ("PORTABILIDADE", "REFINANCIAMENTO", "PORTABILIDADE_REFIN"),
+            "DIGITADOR_NOVO_CARTAO": ("NOVO", "FGTS", "CARTAO", "SAQUE_COMPLEMENTAR"),
+        }.get(role, ())
+        if not allowed_products:
+            return False
+        placeholders = ", ".join(["?"] * len(allowed_products))
+        row = connection.execute(
+            f"""
+            SELECT 1
+            FROM clientes c
+            JOIN operacoes o ON o.cliente_id = c.id
+            WHERE c.id=? AND c.empresa_id=? AND o.empresa_id=? AND UPPER(o.produto) IN ({placeholders})
+            LIMIT 1
+            """,
+            (client_id, company_id, company_id, *allowed_products),
+        ).fetchone()
+    else:
+        row = connection.execute(
+            "SELECT 1 FROM clientes WHERE id=? AND vendedor_id=? AND empresa_id=?",
+            (client_id, user_id, company_id),
+        ).fetchone()
+    return row is not None
+
+
+@pytest.mark.parametrize("role", ROLES)
+@pytest.mark.parametrize("actor_company_id", (0, 1, 2))
+@pytest.mark.parametrize("full_scope", (False, True))
+def test_filter_accessible_clients_matches_original_single_id_check(
+    monkeypatch, role, actor_company_id, full_scope
+):
+    connection = build_database()
+    total = connection.execute("SELECT COUNT(*) FROM clientes").fetchone()[0]
+    monkeypatch.setattr(auth, "get_db", lambda: SqliteDb(connection))
+    monkeypatch.setattr(auth, "ensure_company_scope_columns", lambda cursor, db: None)
+    monkeypatch.setattr(auth, "current_user_role", lambda: role)
+    monkeypatch.setattr(auth, "current_user_company_id", lambda: actor_company_id)
+    monkeypatch.setattr(auth, "current_user_digitador_full_scope", lambda: full_scope)
+    monkeypatch.setattr(auth, "ACCESS_BATCH_SIZE", 5)
+
+    client_ids = [*range(1, total + 4), 0, None, "x"]
+    for user_id in (1, 2):
+        monkeypatch.setattr(auth, "current_user_id", lambda: user_id)
+        expected = {
+            client_id
+            for client_id in range(1, total + 4)
+            if original_can_access_client(connection, role, user_id, actor_company_id, full_scope, client_id)
+        }
+        assert auth.filter_accessible_clients(client_ids) == expected
@@ -0,0 +1,42 @@
+from app.routes import clients
+
+CLIENT_COLUMNS = ("id", "nome", "cpf", "criado_em", "numero_beneficio", "beneficios_json", "vendedor_id")
+
+
+def test_without_fields_selects_every_column_and_the_summary():
+    select_list, needs_summary = clients.build_client_list_select([])
+
+    assert "c.*" in select_list
+    assert needs_summary
+
+
+def test_fields_select_only_the_requested_columns_and_the_cursor_keys():
+    fields = clients.parse_client_list_fields("nome,cpf", CLIENT_COLUMNS)
+    select_list, needs_summary = clients.build_client_list_select(fields)
+
+    assert select_list == "c.`id`, c.`criado_em`, c.`nome`, c.`cpf`"
+    assert not needs_summary
+
+
+def test_summary_fields_join_client_operation_summary():
+    fields = clients.parse_client_list_fields("operation_count", CLIENT_COLUMNS)
+    select_list, needs_summary = clients.build_client_list_select(fields)
+
+    assert select_list == "c.`id`, c.`criado_em`, COALESCE(s.operation_count, 0) AS operation_count"
+    assert needs_summary
+
+
+def test_benefit_fields_read_the_columns_they_are_derived_from():
+    fields = clients.parse_client_list_fields("beneficios", CLIENT_COLUMNS)
+    select_list, _ = clients.build_client_list_select(fields)
+
+    assert select_list == "c.`id`, c.`criado_em`, c.`beneficios_json`, c.`numero_beneficio`"
+
+    row = clients.serialize_client_record(
+        {"id": 1, "criado_em": None, "beneficios_json": '["111", "222"]', "numero_beneficio": "111"}
+    )
+    assert {key: row.get(key) for key in fields} == {"id": 1, "criado_em": None, "beneficios": ["111", "222"]}
+
+
+def test_unknown_fields_are_rejected():
+    assert clients.parse_client_list_fields("nome,senha_hash", CLIENT_COLUMNS) is None
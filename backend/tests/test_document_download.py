@@ -0,0 +1,62 @@
+import pytest
+
+from app.main import create_app
+from app.routes import clients
+
+
+class FakeDb:
+    def cursor(self, dictionary=False):
+        return self
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def download(monkeypatch):
+    monkeypatch.setattr(clients, "can_access_client_documents", lambda client_id: True)
+    monkeypatch.setattr(clients, "get_db", FakeDb)
+    monkeypatch.setattr(clients, "ensure_documents_table", lambda cursor, db: None)
+    monkeypatch.setattr(clients, "sync_legacy_documents_once", lambda cursor, client_id: False)
+    monkeypatch.setattr(
+        clients,
+        "get_client_document_record",
+        lambda cursor, client_id, filename: (None, filename),
+    )
+    app = create_app()
+
+    def run(client_id, filename):
+        with app.test_request_context(f"/api/clients/{client_id}/documents/{filename}"):
+            response = clients.download_document.__wrapped__(client_id, filename)
+            return response if isinstance(response, tuple) else (response, response.status_code)
+
+    return run
+
+
+def test_migrated_client_miss_does_not_scan_the_legacy_folder(monkeypatch, download):
+    monkeypatch.setattr(clients, "legacy_documents_synced", lambda cursor, client_id: True)
+
+    def fail(client_id, filename):
+        raise AssertionError("a pasta legada nao deveria ser lida")
+
+    monkeypatch.setattr(clients, "find_client_document_file", fail)
+
+    _, status = download(5, "rg.pdf")
+    assert status == 404
+
+
+def test_unmigrated_client_still_falls_back_to_the_folder(monkeypatch, download):
+    monkeypatch.setattr(clients, "legacy_documents_synced", lambda cursor, client_id: False)
+    scanned = []
+    monkeypatch.setattr(
+        clients,
+        "find_client_document_file",
+        lambda client_id, filename: scanned.append(client_id) or (None, filename),
+    )
+
+    _, status = download(5, "rg.pdf")
+    assert status == 404
+    assert scanned == [5]
@@ -0,0 +1,189 @@
+import sqlite3
+
+from app.routes import clients
+from app.services import document_migration
+from sqlite_db import SqliteDb
+
+CLAIM_SQL = "INSERT IGNORE INTO document_legacy_sync"
+RELEASE_SQL = "DELETE FROM document_legacy_sync"
+FINISH_SQL = "UPDATE document_legacy_sync SET job_id = NULL"
+
+
+class FakeCursor:
+    # Records every statement and keeps document_legacy_sync as
+    # {client_id: job_id}; clients in `synced` already have a finished row.
+    def __init__(self, synced, in_progress=None):
+        self.markers = {client_id: None for client_id in synced}
+        self.markers.update(in_progress or {})
+        self.log = []
+        self.rowcount = 0
+        self._row = None
+
+    @property
+    def synced(self):
+        return {client_id for client_id, job_id in self.markers.items() if job_id is None}
+
+    def execute(self, sql, params=()):
+        sql = " ".join(sql.split())
+        self.log.append((sql, tuple(params)))
+        if sql.startswith(CLAIM_SQL):
+            client_id, job_id = params
+            self.rowcount = 0 if client_id in self.markers else 1
+            self.markers.setdefault(client_id, job_id)
+        elif sql.startswith("SELECT job_id FROM document_legacy_sync"):
+            client_id = params[0]
+            self._row = {"job_id": self.markers[client_id]} if client_id in self.markers else None
+        elif sql.startswith("UPDATE document_legacy_sync SET job_id = %s"):
+            self.markers[params[1]] = params[0]
+        elif sql.startswith(FINISH_SQL):
+            job_id, *client_ids = params
+            for client_id in client_ids:
+                if self.markers.get(client_id) == job_id:
+                    self.markers[client_id] = None
+        elif sql.startswith(RELEASE_SQL):
+            client_id, job_id = params
+            if self.markers.get(client_id) == job_id:
+                del self.markers[client_id]
+
+    def fetchone(self):
+        return self._row
+
+    def executemany(self, sql, rows):
+        self.log.append(("executemany", tuple(row[0] for row in rows)))
+
+
+class FakeDb:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def commit(self):
+        self.cursor.log.append(("commit", ()))
+
+
+class FakeStore:
+    def put_file(self, file_path):
+        if file_path.endswith("broken.pdf"):
+            raise OSError("falha de leitura")
+        return f"blob/{file_path}", 10
+
+
+def run_copy(monkeypatch, synced, client_files, in_progress=None):
+    cursor = FakeCursor(synced, in_progress)
+    listed = []
+
+    def list_files(_cursor, client_id):
+        listed.append(client_id)
+        return [(name, f"{client_id}/{name}") for name in client_files[client_id]]
+
+    monkeypatch.setattr(document_migration, "iter_storage_client_ids", lambda: iter(client_files))
+    monkeypatch.setattr(document_migration, "resolve_client_seller_id", lambda _cursor, client_id: 1)
+    monkeypatch.setattr(document_migration, "list_new_legacy_document_files", list_files)
+    monkeypatch.setattr(document_migration, "get_document_store", FakeStore)
+    monkeypatch.setattr(
+        document_migration,
+        "legacy_document_insert_params",
+        lambda client_id, *_args: (client_id,),
+    )
+
+    progress = document_migration.copy_legacy_documents(
+        cursor, FakeDb(cursor), job_id=1, threads=1, commit_every=1
+    )
+    return cursor, listed, progress
+
+
+def test_copy_skips_clients_claimed_elsewhere(monkeypatch):
+    cursor, listed, progress = run_copy(
+        monkeypatch,
+        synced={2},
+        client_files={1: ["a.pdf"], 2: ["b.pdf"], 3: ["c.pdf", "d.pdf"]},
+    )
+
+    assert listed == [1, 3]
+    assert progress["migrated_clients"] == 2
+    assert progress["migrated_files"] == 3
+    assert ("executemany", (2,)) not in cursor.log
+
+
+def test_copy_commits_only_between_clients(monkeypatch):
+    cursor, _, _ = run_copy(
+        monkeypatch,
+        synced=(),
+        client_files={1: ["a.pdf", "b.pdf", "c.pdf"], 2: ["d.pdf"]},
+    )
+
+    # commit_every=1 still keeps every row of client 1 in a single batch.
+    batches = [entry[1] for entry in cursor.log if entry[0] == "executemany"]
+    assert batches == [(1, 1, 1), (2,)]
+
+
+def test_copy_releases_the_claim_of_a_failed_client(monkeypatch):
+    cursor, _, progress = run_copy(
+        monkeypatch,
+        synced=(),
+        client_files={1: ["a.pdf", "broken.pdf"], 2: ["c.pdf"]},
+    )
+
+    assert (RELEASE_SQL + " WHERE client_id = %s AND job_id = %s", (1, 1)) in cursor.log
+    assert cursor.markers == {2: None}
+    assert progress["failed_files"] == 1
+    assert progress["migrated_clients"] == 1
+
+
+def test_claim_is_committed_before_the_folder_is_copied(monkeypatch):
+    cursor, _, _ = run_copy(
+        monkeypatch,
+        synced=(),
+        client_files={1: ["a.pdf", "b.pdf"], 2: ["c.pdf"]},
+    )
+
+    claim_1 = next(i for i, (sql, _) in enumerate(cursor.log) if sql.startswith(CLAIM_SQL))
+    assert cursor.log[claim_1 + 1] == ("commit", ())
+
+    # The rows and the end of the claim go in one commit.
+    rows_1 = cursor.log.index(("executemany", (1, 1)))
+    assert cursor.log[rows_1 + 1][0].startswith(FINISH_SQL)
+    assert cursor.log[rows_1 + 1][1] == (1, 1)
+    assert cursor.markers == {1: None, 2: None}
+
+
+def test_resumed_job_takes_over_its_unfinished_clients(monkeypatch):
+    cursor, listed, progress = run_copy(
+        monkeypatch,
+        synced={3},
+        in_progress={1: 1, 2: 7},
+        client_files={1: ["a.pdf"], 2: ["b.pdf"], 3: ["c.pdf"]},
+    )
+
+    assert listed == [1, 2]
+    assert progress["migrated_files"] == 2
+    assert cursor.markers == {1: None, 2: None, 3: None}
+
+
+def legacy_sync_db(monkeypatch, markers):
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE document_legacy_sync (client_id INTEGER PRIMARY KEY, job_id INTEGER)")
+    connection.executemany("INSERT INTO document_legacy_sync VALUES (?, ?)", markers.items())
+    monkeypatch.setattr(clients, "legacy_documents_migrated", lambda cursor: False)
+    monkeypatch.setitem(clients._legacy_documents_state, "clients", set())
+
+    def copy_folder(cursor, client_id, seller_id=None):
+        raise AssertionError("a read path copied a claimed folder")
+
+    monkeypatch.setattr(clients, "sync_storage_documents_to_db", copy_folder)
+    return SqliteDb(connection).cursor(dictionary=True)
+
+
+def test_read_path_skips_a_client_the_job_is_copying(monkeypatch):
+    cursor = legacy_sync_db(monkeypatch, {5: 1})
+
+    assert clients.sync_legacy_documents_once(cursor, 5) is False
+    assert clients.legacy_documents_synced(cursor, 5) is False
+    assert 5 not in clients._legacy_documents_state["clients"]
+
+
+def test_read_path_caches_a_client_the_job_finished(monkeypatch):
+    cursor = legacy_sync_db(monkeypatch, {5: None})
+
+    assert clients.sync_legacy_documents_once(cursor, 5) is False
+    assert clients.legacy_documents_synced(cursor, 5) is True
+    assert 5 in clients._legacy_documents_state["clients"]
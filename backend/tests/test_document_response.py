@@ -0,0 +1,202 @@
+import io
+
+import pytest
+from flask import request
+
+import app.main as main_module
+from app.main import create_app
+from app.routes import clients
+from app.services import file_service
+from app.services.document_storage import LocalBlobStore, LocalObjectStore
+
+CONTENT = b"%PDF-1.4\n" + bytes(range(256)) * 8
+PNG_HEAD = b"\x89PNG\r\n\x1a\n"
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(main_module, "get_cached_maintenance_state", lambda: {"enabled": False})
+    monkeypatch.setattr(clients, "DOCUMENT_ACCEL_REDIRECT_PREFIX", "")
+    return create_app()
+
+
+def stored_document(monkeypatch, store):
+    monkeypatch.setattr(clients, "get_document_store", lambda: store)
+    blob_key, size = store.put_bytes(CONTENT)
+    return {
+        "id": 1,
+        "original_name": "contrato.pdf",
+        "content_type": "application/pdf",
+        "file_size": size,
+        "blob_key": blob_key,
+        "has_file_data": False,
+    }
+
+
+def send(app, document, headers=None):
+    with app.test_request_context("/api/clients/1/documents/contrato.pdf", headers=headers or {}):
+        response = clients.send_document_response(None, document, "contrato.pdf")
+        # What the WSGI server would write: no body on a 304.
+        app_iter, _, _ = response.get_wsgi_response(request.environ)
+        body = b"".join(app_iter)
+        response.close()
+        return response, body
+
+
+@pytest.mark.parametrize("store_class", (LocalObjectStore, LocalBlobStore))
+def test_full_response_has_a_length(app, monkeypatch, tmp_path, store_class):
+    document = stored_document(monkeypatch, store_class(str(tmp_path)))
+
+    response, body = send(app, document)
+
+    assert response.status_code == 200
+    assert response.headers["Content-Length"] == str(len(CONTENT))
+    assert body == CONTENT
+
+
+@pytest.mark.parametrize("store_class", (LocalObjectStore, LocalBlobStore))
+def test_range_is_answered_with_206(app, monkeypatch, tmp_path, store_class):
+    document = stored_document(monkeypatch, store_class(str(tmp_path)))
+
+    response, body = send(app, document, {"Range": "bytes=100-199"})
+
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes 100-199/{len(CONTENT)}"
+    assert response.headers["Content-Length"] == "100"
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert body == CONTENT[100:200]
+
+
+@pytest.mark.parametrize("store_class", (LocalObjectStore, LocalBlobStore))
+def test_matching_etag_is_a_304(app, monkeypatch, tmp_path, store_class):
+    document = stored_document(monkeypatch, store_class(str(tmp_path)))
+
+    response, body = send(app, document, {"If-None-Match": f'"{document["blob_key"]}"'})
+
+    assert response.status_code == 304
+    assert body == b""
+
+
+def test_inline_file_data_row_has_a_length(app, monkeypatch, tmp_path):
+    monkeypatch.setattr(clients, "get_document_store", lambda: LocalObjectStore(str(tmp_path)))
+
+    class Cursor:
+        def execute(self, sql, params=()):
+            pass
+
+        def fetchone(self):
+            return {"blob_key": None, "file_data": CONTENT}
+
+    document = {"id": 1, "original_name": "contrato.pdf", "blob_key": None, "has_file_data": True}
+    with app.test_request_context("/", headers={"Range": "bytes=0-9"}):
+        response = clients.send_document_response(Cursor(), document, "contrato.pdf")
+        response.direct_passthrough = False
+
+        assert response.status_code == 206
+        assert response.get_data() == CONTENT[:10]
+        response.close()
+
+
+def test_accel_redirect_hands_the_bytes_to_nginx(app, monkeypatch, tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    document = stored_document(monkeypatch, store)
+    monkeypatch.setattr(clients, "DOCUMENT_ACCEL_REDIRECT_PREFIX", "/protected-blobs/")
+    key = document["blob_key"]
+
+    response, body = send(app, document)
+    assert response.headers["X-Accel-Redirect"] == f"/protected-blobs/{key[:2]}/{key[2:4]}/{key}"
+    assert response.headers["Content-Disposition"] == 'attachment; filename="contrato.pdf"'
+    assert body == b""
+
+    response, _ = send(app, document, {"If-None-Match": f'"{key}"'})
+    assert response.status_code == 304
+    assert "X-Accel-Redirect" not in response.headers
+
+
+@pytest.mark.parametrize(
+    "head, expected",
+    (
+        (b"%PDF-1.7\n", ("pdf", "application/pdf")),
+        (b"\r\n\r\n%PDF-1.4", ("pdf", "application/pdf")),
+        (PNG_HEAD + b"\x00\x00", ("png", "image/png")),
+        (b"\xff\xd8\xff\xe0JFIF", ("jpg", "image/jpeg")),
+        (b"<html><body>", (None, None)),
+        (b"", (None, None)),
+    ),
+)
+def test_sniff_file_type(head, expected):
+    assert file_service.sniff_file_type(head) == expected
+
+
+@pytest.fixture
+def upload(app, monkeypatch, tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    inserted = []
+
+    class FakeDb:
+        def cursor(self, dictionary=False):
+            return self
+
+        def execute(self, sql, params=()):
+            if "INSERT INTO documentos" in sql:
+                inserted.append(params)
+
+        def commit(self):
+            pass
+
+        def rollback(self):
+            inserted.clear()
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(clients, "get_document_store", lambda: store)
+    monkeypatch.setattr(clients, "can_access_client", lambda client_id: True)
+    monkeypatch.setattr(clients, "get_db", FakeDb)
+    monkeypatch.setattr(clients, "ensure_documents_table", lambda cursor, db: None)
+    monkeypatch.setattr(clients, "resolve_client_seller_id", lambda cursor, client_id: 3)
+    client = app.test_client()
+
+    def post(files):
+        data = {"client_id": "5"}
+        for field_name, (content, filename) in files.items():
+            data[field_name] = (io.BytesIO(content), filename)
+        response = client.post("/api/clients/upload", data=data, content_type="multipart/form-data")
+        return response, inserted, store
+
+    return post
+
+
+def test_upload_is_typed_by_content_not_by_name(upload):
+    response, inserted, store = upload(
+        {
+            "rg": (PNG_HEAD + b"\x00" * 64, "rg.pdf"),
+            "cpf": (b"<script>alert(1)</script>", "cpf.pdf"),
+        }
+    )
+
+    assert response.status_code == 201
+    assert response.get_json()["rejected"] == ["cpf"]
+    assert [(row[2], row[5]) for row in inserted] == [("RG", "image/png")]
+    assert inserted[0][3].endswith(".png")
+    assert store.exists(inserted[0][7])
+
+
+def test_upload_over_the_file_limit_is_a_413(upload, monkeypatch):
+    monkeypatch.setattr(file_service, "MAX_FILE_SIZE_MB", 0.001)
+
+    response, inserted, _ = upload({"rg": (CONTENT, "rg.pdf")})
+
+    assert response.status_code == 413
+    assert "Cada arquivo" in response.get_json()["error"]
+    assert inserted == []
+
+
+def test_upload_over_the_request_limit_is_a_413(upload, monkeypatch):
+    monkeypatch.setattr(file_service, "MAX_REQUEST_SIZE_MB", 0.001)
+
+    response, inserted, _ = upload({"rg": (CONTENT, "rg.pdf")})
+
+    assert response.status_code == 413
+    assert "O envio" in response.get_json()["error"]
+    assert inserted == []
@@ -0,0 +1,60 @@
+import os
+import time
+
+import pytest
+
+from app.services.document_storage import LocalBlobStore, collect_unreferenced_blobs
+
+OLD = time.time() - 7200
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalBlobStore(str(tmp_path / "blobs"))
+
+
+def put_old_blob(store, data):
+    blob_key, _ = store.put_bytes(data)
+    os.utime(store.local_path(blob_key), (OLD, OLD))
+    return blob_key
+
+
+def test_collect_removes_old_unreferenced_blobs(store):
+    referenced = put_old_blob(store, b"referenced")
+    orphan = put_old_blob(store, b"orphan")
+    fresh, _ = store.put_bytes(b"fresh")
+
+    result = collect_unreferenced_blobs(store, {referenced}, grace_seconds=3600)
+
+    assert result == {"removed": 1, "kept": 2}
+    assert not store.exists(orphan)
+    assert store.exists(referenced) and store.exists(fresh)
+
+
+def test_collect_keeps_a_blob_whose_row_committed_after_the_snapshot(store):
+    blob_key = put_old_blob(store, b"late row")
+    checked = []
+
+    def still_referenced(key):
+        checked.append(key)
+        return True
+
+    result = collect_unreferenced_blobs(store, set(), grace_seconds=3600, still_referenced=still_referenced)
+
+    assert checked == [blob_key]
+    assert result == {"removed": 0, "kept": 1}
+    assert store.exists(blob_key)
+
+
+def test_collect_keeps_a_blob_an_upload_deduped_onto_after_the_listing(store):
+    blob_key = put_old_blob(store, b"deduped")
+
+    def upload_in_flight(key):
+        # The upload refreshed the mtime; its row is not committed yet.
+        store.put_bytes(b"deduped")
+        return False
+
+    result = collect_unreferenced_blobs(store, set(), grace_seconds=3600, still_referenced=upload_in_flight)
+
+    assert result == {"removed": 0, "kept": 1}
+    assert store.exists(blob_key)
@@ -0,0 +1,123 @@
+import importlib
+import os
+from datetime import date, datetime
+
+import pytest
+
+from app.main import create_app
+from app.migrations import __main__ as migrations_cli
+from app.migrations import explain
+from app.routes import clients
+
+COMPANY_ID = 7
+
+
+@pytest.fixture
+def hot_queries(monkeypatch):
+    # The digitador full-scope flag is read from usuarios; these paths are the
+    # product-scoped ones.
+    monkeypatch.setattr(clients, "current_user_digitador_full_scope", lambda: False)
+    queries = explain.build_hot_queries(COMPANY_ID, datetime(2026, 3, 15), app=create_app())
+    return {query["name"]: query for query in queries}
+
+
+def test_hot_queries_cover_every_route(hot_queries):
+    prefixes = ("pipeline_", "dashboard_", "stats_", "sales_board_", "search_")
+    for prefix in prefixes:
+        assert any(name.startswith(prefix) for name in hot_queries), prefix
+
+
+def test_hot_query_params_match_placeholders(hot_queries):
+    for query in hot_queries.values():
+        assert query["sql"].count("%s") == len(query["params"]), query["name"]
+
+
+def test_hot_queries_carry_the_role_scope(hot_queries):
+    assert COMPANY_ID in hot_queries["pipeline_admin"]["params"]
+    assert COMPANY_ID not in hot_queries["pipeline_global"]["params"]
+    assert "c.vendedor_id = %s" in hot_queries["pipeline_vendedor"]["sql"]
+    assert "c.vendedor_id = %s" in hot_queries["pipeline_delta_vendedor"]["sql"]
+    assert COMPANY_ID not in hot_queries["pipeline_delta_global"]["params"]
+    assert "o.digitador_id = %s" in hot_queries["pipeline_digitador_port_refin"]["sql"]
+    assert "PORTABILIDADE" in hot_queries["dashboard_approved_digitador_port_refin"]["params"]
+    assert "o.empresa_id" not in hot_queries["sales_board_approved_todas"]["sql"]
+    assert "c.empresa_id = %s" in hot_queries["search_digits"]["sql"]
+
+
+def test_hot_queries_only_expect_indexes_that_are_kept(hot_queries):
+    consolidation = importlib.import_module("app.migrations.0019_operacoes_index_consolidation")
+    expected = {key for query in hot_queries.values() for key in query["keys"].get("o", ())}
+
+    assert "idx_operacoes_updated" in expected
+    assert not expected & {*consolidation.REDUNDANT_OPERACOES_INDEXES, "cliente_id"}
+
+
+def test_stats_period_is_a_created_at_range():
+    assert clients.build_operations_stats_period("day", date(2026, 12, 31)) == (
+        datetime(2026, 12, 31),
+        datetime(2027, 1, 1),
+    )
+    assert clients.build_operations_stats_period("week", date(2026, 10, 17)) == (
+        datetime(2026, 10, 12),
+        datetime(2026, 10, 19),
+    )
+    assert clients.build_operations_stats_period("month", date(2026, 12, 5)) == (
+        datetime(2026, 12, 1),
+        datetime(2027, 1, 1),
+    )
+    assert clients.build_operations_stats_period("year", date(2026, 12, 5)) is None
+
+
+@pytest.mark.parametrize(
+    "plan, expected",
+    (
+        ([{"table": "o", "type": "ref", "key": "idx_a"}, {"table": "c", "type": "eq_ref", "key": "PRIMARY"}], []),
+        ([{"table": "o", "type": "ALL", "key": None}, {"table": "c", "type": "eq_ref", "key": "PRIMARY"}], ["o: leitura completa (ALL)"]),
+        ([{"table": "o", "type": "index", "key": "idx_a"}, {"table": "c", "type": "eq_ref", "key": "PRIMARY"}], ["o: leitura completa (INDEX)"]),
+        ([{"table": "o", "type": "range", "key": "idx_b"}, {"table": "c", "type": "eq_ref", "key": "PRIMARY"}], ["o: indice inesperado idx_b"]),
+        ([{"table": "o", "type": "index_merge", "key": "idx_a,idx_b"}, {"table": "c", "type": "eq_ref", "key": "PRIMARY"}], ["o: indice inesperado idx_b"]),
+        ([{"table": None, "type": None, "key": None}], ["o: fora do plano (banco sem dados?)", "c: fora do plano (banco sem dados?)"]),
+    ),
+)
+def test_plan_problems(plan, expected):
+    assert explain.plan_problems(plan, {"o": ("idx_a",), "c": ("PRIMARY",)}) == expected
+
+
+def test_explain_command_fails_when_a_query_loses_its_index(monkeypatch, capsys):
+    class FakeDb:
+        def cursor(self, dictionary=False):
+            return self
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(migrations_cli, "get_db", FakeDb)
+    monkeypatch.setattr(
+        explain,
+        "explain_hot_queries",
+        lambda cursor: [
+            {"name": "pipeline_admin", "problems": [], "access": []},
+            {"name": "stats_global", "problems": ["o: leitura completa (ALL)"], "access": []},
+        ],
+    )
+
+    assert migrations_cli.check_explain() == 1
+    assert "stats_global: o: leitura completa (ALL)" in capsys.readouterr().out
+
+
+@pytest.mark.skipif(
+    os.getenv("EXPLAIN_HOT_QUERIES") != "1",
+    reason="EXPLAIN_HOT_QUERIES=1 roda os planos contra o MySQL do DB_CONFIG (com dados)",
+)
+def test_hot_queries_use_their_indexes():
+    from app.database import get_db
+
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    try:
+        results = explain.explain_hot_queries(cursor)
+    finally:
+        cursor.close()
+        db.close()
+
+    assert {result["name"]: result["problems"] for result in results if result["problems"]} == {}
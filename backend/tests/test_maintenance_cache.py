@@ -0,0 +1,56 @@
+import pytest
+
+from app.utils import security
+
+
+class FakeDb:
+    def cursor(self, dictionary=False):
+        return self
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    stored = {"version": 1, "state": {"enabled": False, "message": "Sistema em manutencao"}, "reads": 0}
+
+    def read_state(cursor):
+        stored["reads"] += 1
+        hook = stored.pop("during_read", None)
+        state = dict(stored["state"])
+        if hook:
+            hook()
+        return state
+
+    monkeypatch.setattr(security, "get_db", FakeDb)
+    monkeypatch.setattr(security, "ensure_system_settings_table", lambda cursor, db: None)
+    monkeypatch.setattr(security, "get_maintenance_version", lambda cursor: stored["version"])
+    monkeypatch.setattr(security, "get_maintenance_state", read_state)
+    security.invalidate_maintenance_cache()
+    yield stored
+    security.invalidate_maintenance_cache()
+
+
+def test_reload_racing_a_commit_does_not_cache_the_old_state(settings):
+    def commit_new_state():
+        # Another request commits maintenance on and invalidates while this
+        # reload still holds the state it read before the commit.
+        settings["state"] = {"enabled": True, "message": "Volta logo"}
+        security.invalidate_maintenance_cache()
+
+    settings["during_read"] = commit_new_state
+
+    assert security.get_cached_maintenance_state()["enabled"] is False
+    assert security.get_cached_maintenance_state()["enabled"] is True
+    assert settings["reads"] == 2
+
+
+def test_state_is_cached_until_invalidated(settings):
+    security.get_cached_maintenance_state()
+    security.get_cached_maintenance_state()
+    assert settings["reads"] == 1
+
+    security.invalidate_maintenance_cache()
+    security.get_cached_maintenance_state()
+    assert settings["reads"] == 2
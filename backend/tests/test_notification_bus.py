@@ -0,0 +1,84 @@
+from datetime import datetime
+
+from app.utils import notification_bus as bus_module
+from app.utils.notification_bus import LocalNotificationBus, NotificationSignalPoller
+
+
+class CounterDb:
+    # notification_unread_counters as {user_id: updated_at}, shared with
+    # "another process" that moves the stamps.
+    def __init__(self, stamps):
+        self.stamps = stamps
+        self.queries = []
+        self._rows = []
+
+    def cursor(self, dictionary=False):
+        return self
+
+    def execute(self, sql, params=()):
+        self.queries.append(tuple(params))
+        self._rows = [
+            {"user_id": user_id, "updated_at": self.stamps[user_id]}
+            for user_id in params
+            if user_id in self.stamps
+        ]
+
+    def fetchall(self):
+        return self._rows
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def build_poller(monkeypatch, stamps):
+    db = CounterDb(stamps)
+    monkeypatch.setattr(bus_module, "get_db", lambda dedicated=False: db)
+    bus = LocalNotificationBus()
+    poller = NotificationSignalPoller(bus, interval=1)
+    # Drive poll_once by hand instead of the background thread.
+    monkeypatch.setattr(poller, "_thread", object())
+    return db, bus, poller
+
+
+def test_counter_written_by_another_process_wakes_the_stream(monkeypatch):
+    stamps = {7: datetime(2026, 3, 15, 12, 0, 0)}
+    _, bus, poller = build_poller(monkeypatch, stamps)
+    poller.subscribe(7)
+    poller.poll_once()
+    seen = bus.version(7)
+
+    assert poller.poll_once() == set()
+    assert bus.wait(7, seen, 0) == seen
+
+    # The outbox worker inserted a notification for user 7.
+    stamps[7] = datetime(2026, 3, 15, 12, 0, 1)
+    assert poller.poll_once() == {7}
+    assert bus.wait(7, seen, 0) != seen
+
+
+def test_only_users_with_open_streams_are_read(monkeypatch):
+    stamps = {7: datetime(2026, 3, 15), 8: datetime(2026, 3, 15)}
+    db, _, poller = build_poller(monkeypatch, stamps)
+
+    assert poller.poll_once() == set()
+    assert db.queries == []
+
+    poller.subscribe(8)
+    poller.subscribe(7)
+    poller.unsubscribe(7)
+    poller.poll_once()
+    assert db.queries == [(8,)]
+
+
+def test_first_poll_publishes_users_without_a_counter_row(monkeypatch):
+    _, bus, poller = build_poller(monkeypatch, {})
+    poller.subscribe(9)
+
+    # Never seen: published once so a write racing the stream's first read
+    # is not left to the recheck.
+    assert poller.poll_once() == {9}
+    assert poller.poll_once() == set()
+    assert bus.version(9) == 1
@@ -0,0 +1,25 @@
+from app.utils.notification_counters import adjust_unread_notification_counters
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.rows = None
+
+    def executemany(self, sql, rows):
+        self.rows = list(rows)
+
+
+def test_counter_rows_are_locked_in_user_id_order():
+    cursor = RecordingCursor()
+
+    adjust_unread_notification_counters(cursor, {9: 1, "3": 2, 5: -1, 3: 1, 7: 0, 0: 4, "x": 1})
+
+    assert cursor.rows == [(3, 3, 3), (5, 0, -1), (9, 1, 1)]
+
+
+def test_nothing_to_adjust_runs_no_statement():
+    cursor = RecordingCursor()
+
+    adjust_unread_notification_counters(cursor, {4: 1, "4": -1})
+
+    assert cursor.rows is None
@@ -0,0 +1,71 @@
+import pytest
+from flask import g
+from flask_jwt_extended import create_access_token, verify_jwt_in_request
+
+from app.main import create_app
+from app.routes import clients
+from app.utils import notification_bus as bus_module
+
+USER_ID = 11
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def stream_request(monkeypatch):
+    monkeypatch.setattr(bus_module.notification_signal_poller, "_thread", object())
+    monkeypatch.setattr(clients, "read_latest_notification_id", lambda user_id: 40)
+    app = create_app()
+    with app.app_context():
+        token = create_access_token(
+            identity=str(USER_ID),
+            additional_claims={"role": clients.ROLE_VENDOR, "empresa_id": 1},
+        )
+    with app.test_request_context(
+        "/api/notifications/stream",
+        headers={"Authorization": f"Bearer {token}"},
+    ):
+        verify_jwt_in_request()
+        yield
+
+
+def test_stream_hands_back_the_request_connection(stream_request, monkeypatch):
+    connection = FakeConnection()
+    g._request_db = connection
+
+    response = clients.stream_user_notifications.__wrapped__()
+    try:
+        assert connection.closed
+        assert "_request_db" not in g
+    finally:
+        response.close()
+
+
+def test_signal_without_new_rows_sends_the_new_unread_count(stream_request, monkeypatch):
+    counts = iter([3, 2])
+    monkeypatch.setattr(
+        clients,
+        "read_notification_stream_updates",
+        lambda user_id, after_id, include_count=False: ([], next(counts) if include_count else None),
+    )
+
+    response = clients.stream_user_notifications.__wrapped__()
+    try:
+        chunks = iter(response.response)
+        assert next(chunks) == "retry: 5000\n\n"
+        assert '"unread_count": 3' in next(chunks)
+
+        # Another tab marked one as read.
+        bus_module.notification_bus.publish([USER_ID])
+        assert '"unread_count": 2' in next(chunks)
+    finally:
+        response.close()
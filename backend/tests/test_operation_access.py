@@ -0,0 +1,130 @@
+import itertools
+import sqlite3
+
+import pytest
+
+from app.routes import clients
+from sqlite_db import SqliteDb
+
+ROLES = (
+    clients.ROLE_GLOBAL,
+    clients.ROLE_ADMIN,
+    clients.ROLE_VENDOR,
+    clients.ROLE_DIGITADOR_PORT_REFIN,
+    clients.ROLE_DIGITADOR_NOVO_CARTAO,
+    "SUPORTE",
+)
+# produto is stored canonical since migration 0012.
+PRODUCTS = (
+    "PORTABILIDADE",
+    "REFINANCIAMENTO",
+    "PORTABILIDADE_REFIN",
+    "NOVO",
+    "FGTS",
+    "CARTAO",
+    "SAQUE_COMPLEMENTAR",
+    "CONSIGNADO",
+    "",
+    None,
+)
+COMPANY_IDS = (None, 0, 1, 2)
+SELLER_IDS = (None, 1, 2, 3)
+
+
+def build_database():
+    # One operation per (company, seller, product, client row present?)
+    # combination; operations without a client row point at client ids that
+    # do not exist.
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE clientes (id INTEGER PRIMARY KEY, vendedor_id INTEGER)")
+    connection.execute(
+        """
+        CREATE TABLE operacoes (
+            id INTEGER PRIMARY KEY,
+            cliente_id INTEGER,
+            empresa_id INTEGER,
+            produto TEXT
+        )
+        """
+    )
+    cases = itertools.product(COMPANY_IDS, SELLER_IDS, PRODUCTS, (True, False))
+    for operation_id, (company_id, seller_id, product, has_client) in enumerate(cases, start=1):
+        client_id = operation_id if has_client else operation_id + 10000
+        if has_client:
+            connection.execute(
+                "INSERT INTO clientes (id, vendedor_id) VALUES (?, ?)",
+                (client_id, seller_id),
+            )
+        connection.execute(
+            "INSERT INTO operacoes (id, cliente_id, empresa_id, produto) VALUES (?, ?, ?, ?)",
+            (operation_id, client_id, company_id, product),
+        )
+    return connection
+
+
+def single_id_access(connection, role, user_id, operation_id):
+    row = connection.execute(
+        """
+        SELECT o.empresa_id, o.produto, c.vendedor_id
+        FROM operacoes o
+        LEFT JOIN clientes c ON c.id = o.cliente_id
+        WHERE o.id = ?
+        """,
+        (operation_id,),
+    ).fetchone()
+    if row is None:
+        return False
+    operation = {"empresa_id": row[0], "produto": row[1], "vendedor_id": row[2]}
+    return clients.role_can_access_operation(role, user_id, operation)
+
+
+@pytest.mark.parametrize("role", ROLES)
+@pytest.mark.parametrize("actor_company_id", (0, 1, 2))
+@pytest.mark.parametrize("full_scope", (False, True))
+def test_filter_accessible_operations_matches_single_id_check(
+    monkeypatch, role, actor_company_id, full_scope
+):
+    connection = build_database()
+    total = connection.execute("SELECT COUNT(*) FROM operacoes").fetchone()[0]
+    monkeypatch.setattr(clients, "get_db", lambda: SqliteDb(connection))
+    monkeypatch.setattr(clients, "current_user_company_id", lambda: actor_company_id)
+    monkeypatch.setattr(clients, "current_user_digitador_full_scope", lambda: full_scope)
+    # Small chunks so the ids span several queries.
+    monkeypatch.setattr(clients, "ACCESS_BATCH_SIZE", 7)
+
+    # Ids past the table do not exist; 0, negatives and junk are dropped up front.
+    operation_ids = [*range(1, total + 6), 0, -4, "x", None, 5, 5]
+
+    for user_id in (1, 2, 3):
+        expected = {
+            operation_id
+            for operation_id in range(1, total + 6)
+            if single_id_access(connection, role, user_id, operation_id)
+        }
+        assert clients.filter_accessible_operations(operation_ids, role=role, user_id=user_id) == expected
+
+
+def test_filter_accessible_operations_without_ids_skips_the_query(monkeypatch):
+    def fail():
+        raise AssertionError("get_db nao deveria ser chamado")
+
+    monkeypatch.setattr(clients, "get_db", fail)
+    assert clients.filter_accessible_operations([], role=clients.ROLE_ADMIN, user_id=1) == set()
+    assert clients.filter_accessible_operations([None, 0], role=clients.ROLE_ADMIN, user_id=1) == set()
+
+
+def test_drop_inaccessible_notification_links(monkeypatch):
+    monkeypatch.setattr(clients, "filter_accessible_operations", lambda ids: {10})
+    notifications = [
+        {"id": 1, "operation_id": 10, "cliente_id": 3},
+        {"id": 2, "operation_id": 11, "cliente_id": 4},
+        {"id": 3, "operation_id": None, "cliente_id": None},
+    ]
+
+    clients.drop_inaccessible_notification_links(notifications)
+
+    assert [(item["operation_id"], item["cliente_id"]) for item in notifications] == [
+        (10, 3),
+        (None, None),
+        (None, None),
+    ]
@@ -0,0 +1,99 @@
+from datetime import datetime
+
+import pytest
+from flask_jwt_extended import create_access_token, verify_jwt_in_request
+
+from app.main import create_app
+from app.migrations.explain import hot_query_identity
+from app.routes import clients
+
+COMPANY_ID = 7
+SELLER_ID = 3
+
+
+class RecordingCursor:
+    # Answers every query with `rows` and keeps the statements it ran.
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.statements = []
+
+    def execute(self, sql, params=()):
+        self.statements.append((" ".join(sql.split()), tuple(params)))
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def fetchone(self):
+        return {"db_now": datetime(2026, 3, 15, 12), "total": 1, "ids_xor": 5}
+
+    def close(self):
+        pass
+
+
+def test_vendor_delta_reads_only_its_own_changed_rows():
+    app = create_app()
+    cursor = RecordingCursor()
+    with hot_query_identity(app, clients.ROLE_VENDOR, COMPANY_ID, user_id=SELLER_ID):
+        conditions, params = clients.build_pipeline_scope(clients.ROLE_VENDOR, SELLER_ID)
+        clients.fetch_pipeline_delta(
+            cursor,
+            clients.ROLE_VENDOR,
+            SELLER_ID,
+            " AND ".join(conditions),
+            params,
+            datetime(2026, 3, 15, 11),
+        )
+
+    changed_sql, changed_params = next(
+        statement for statement in cursor.statements if "in_pipeline" in statement[0]
+    )
+    where = changed_sql.split("WHERE o.updated_at > %s", 1)[1]
+    assert "o.empresa_id = %s" in where
+    assert "c.vendedor_id = %s" in where
+    assert changed_params[-3:] == (COMPANY_ID, SELLER_ID, clients.PIPELINE_DELTA_MAX_CHANGES + 1)
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    cursor = RecordingCursor()
+
+    class FakeDb:
+        def cursor(self, dictionary=False):
+            return cursor
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(clients, "get_db", FakeDb)
+    monkeypatch.setattr(clients, "ensure_operations_extra_columns", lambda cursor, db: None)
+    app = create_app()
+    with app.app_context():
+        token = create_access_token(
+            identity=str(SELLER_ID),
+            additional_claims={"role": clients.ROLE_VENDOR, "empresa_id": COMPANY_ID},
+        )
+
+    def run(query, headers=None):
+        cursor.statements.clear()
+        with app.test_request_context(
+            f"/api/operations/pipeline?{query}",
+            headers={"Authorization": f"Bearer {token}", **(headers or {})},
+        ):
+            verify_jwt_in_request()
+            return cursor.statements, clients.get_pipeline.__wrapped__()
+
+    return run
+
+
+def test_unchanged_delta_poll_is_a_bodyless_304(pipeline):
+    since = clients.encode_pipeline_cursor(datetime(2026, 3, 15, 11))
+    _, first = pipeline(f"since={since}")
+    assert first.status_code == 200
+
+    statements, response = pipeline(f"since={since}", {"If-None-Match": first.headers["ETag"]})
+
+    assert response.status_code == 304
+    assert response.get_data() == b""
+    # Only the ETag aggregate ran: no NOW(6), changed-rows or tombstone query.
+    assert len(statements) == 1
+    assert statements[0][0].startswith("SELECT COUNT(*) AS total")
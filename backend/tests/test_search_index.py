@@ -0,0 +1,63 @@
+from app.utils.search_index import ClientSearchIndex, ClientSearchPartition
+
+ROWS = [
+    {"id": 3, "empresa_id": 1, "nome": "Maria Souza", "cpf": "123.456.789-00", "numero_beneficio": "987", "vendedor_id": 1, "vendedor_nome": "Ana"},
+    {"id": 1, "empresa_id": 1, "nome": "Joao Silva", "cpf": "12399", "numero_beneficio": None, "vendedor_id": 2, "vendedor_nome": "Bia"},
+    {"id": 2, "empresa_id": 1, "nome": "Márcia Lima", "cpf": "555", "numero_beneficio": "1234", "vendedor_id": None, "vendedor_nome": "-"},
+]
+
+
+class FakeCursor:
+    # Answers the partition load with `rows`; on_load runs inside the load
+    # query, i.e. between the snapshot and the swap.
+    def __init__(self, rows, on_load=None):
+        self.rows = rows
+        self.on_load = on_load
+        self._result = []
+
+    def execute(self, sql, params=()):
+        if "COUNT(*)" in sql:
+            self._result = [{"total": 0, "checksum": 0}]
+            return
+        if self.on_load:
+            on_load, self.on_load = self.on_load, None
+            on_load()
+        self._result = list(self.rows)
+
+    def fetchall(self):
+        return self._result
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+
+def test_build_matches_incremental_adds():
+    built = ClientSearchPartition.build(ROWS)
+    incremental = ClientSearchPartition()
+    for row in ROWS:
+        incremental.add(row)
+
+    assert built.digits == incremental.digits == sorted(built.digits)
+    assert built.checksum == incremental.checksum
+    assert built.match_digits("123") == {1, 2, 3}
+    assert built.match_name(["marc"]) == {2}
+
+
+def test_search_loads_the_partition():
+    index = ClientSearchIndex(reconcile_seconds=60)
+    results = index.search(FakeCursor(ROWS), 1, "123", digits_query=True)
+
+    assert [row["id"] for row in results] == [1, 2, 3]
+    assert index.stats()["clients"] == 3
+
+
+def test_write_during_load_forces_a_reconcile():
+    index = ClientSearchIndex(reconcile_seconds=60)
+    index.search(FakeCursor(ROWS), 1, "maria", digits_query=False)
+    partition = index._partitions[1]
+    assert partition.loaded_at > 0
+
+    index._load(FakeCursor(ROWS, on_load=lambda: index.remove(3)), 1)
+
+    assert index._partitions[1] is not partition
+    assert index._partitions[1].loaded_at == 0.0
@@ -6,6 +6,7 @@ import {
   getUserNotifications,
   markAllNotificationsAsRead,
   markNotificationAsRead,
+  streamUserNotifications,
 } from "../services/api";
 import "../pages/Dashboard.css";
 import { formatDateTimeDisplayValue } from "../utils/date";
@@ -301,7 +302,62 @@ export default function DashboardLayout() {
 
     loadNotifications();
 
-    const interval = setInterval(loadNotifications, 20000);
+    // Com o stream aberto o servidor avisa quando chega notificacao nova e o
+    // polling de 20s fica parado; ele so volta enquanto o stream esta fora.
+    const streamController = new AbortController();
+    let streamActive = false;
+    let reconnectTimer = null;
+    let refreshTimer = null;
+
+    // Um stream retomado reenvia ate 50 notificacoes seguidas; todas viram
+    // uma unica busca em /notifications.
+    function scheduleNotificationsRefresh() {
+      if (refreshTimer) return;
+      refreshTimer = setTimeout(() => {
+        refreshTimer = null;
+        loadNotifications();
+      }, 300);
+    }
+
+    async function connectNotificationStream(lastEventId) {
+      let nextEventId = lastEventId;
+      let retryDelay = 5000;
+
+      try {
+        nextEventId = await streamUserNotifications({
+          lastEventId,
+          signal: streamController.signal,
+          onOpen: () => {
+            streamActive = true;
+          },
+          onEvent: (event) => {
+            if (event.id) nextEventId = event.id;
+            if (!mounted) return;
+            if (event.type === "notification") {
+              scheduleNotificationsRefresh();
+            } else if (event.type === "unread") {
+              setPipelineCount(Number(event.data?.unread_count || 0));
+            }
+          },
+        });
+      } catch (error) {
+        if (error?.fallback === "poll") retryDelay = 30000;
+      }
+
+      streamActive = false;
+      if (mounted && !streamController.signal.aborted) {
+        reconnectTimer = setTimeout(
+          () => connectNotificationStream(nextEventId),
+          retryDelay
+        );
+      }
+    }
+
+    connectNotificationStream("");
+
+    const interval = setInterval(() => {
+      if (!streamActive) loadNotifications();
+    }, 20000);
 
     function refreshNotifications() {
       loadNotifications();
@@ -312,6 +368,9 @@ export default function DashboardLayout() {
 
     return () => {
       mounted = false;
+      streamController.abort();
+      clearTimeout(reconnectTimer);
+      clearTimeout(refreshTimer);
       clearInterval(interval);
       window.removeEventListener("pipeline:changed", refreshNotifications);
       window.removeEventListener("notifications:refresh", refreshNotifications);
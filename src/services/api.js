@@ -112,13 +112,32 @@ export async function createClient(clientData) {
    LISTAR CLIENTES
 ======================= */
 export async function listClients() {
-  const response = await fetch(`${API_URL}/clients`, {
+  const response = await fetch(`${API_URL}/clients?legacy=1`, {
     headers: getAuthHeaders(),
   });
 
   return parseApiJson(response, "Erro ao enviar documentos");
 }
 
+export async function listClientsPage(filters = {}) {
+  const params = new URLSearchParams();
+
+  Object.entries(filters).forEach(([key, value]) => {
+    if (value !== undefined && value !== null && value !== "") {
+      params.set(key, value);
+    }
+  });
+
+  const query = params.toString();
+  const url = query ? `${API_URL}/clients?${query}` : `${API_URL}/clients`;
+
+  const response = await fetch(url, {
+    headers: getAuthHeaders(),
+  });
+
+  return parseApiJson(response, "Erro ao listar clientes");
+}
+
 export async function searchGlobal(query, limit = 8) {
   const search = String(query || "").trim();
   if (search.length < 2) {
@@ -453,13 +472,52 @@ export async function getOperationStats(period) {
   return parseApiJson(response, "Erro ao enviar documentos");
 }
 
+// Pipeline state kept between polls: after the first snapshot only the
+// operations changed since the cursor (plus removed ids) are downloaded.
+let pipelineCache = null;
+
+function sortPipelineOperations(operations) {
+  return [...operations].sort((left, right) => {
+    const diff = (Date.parse(right.criado_em) || 0) - (Date.parse(left.criado_em) || 0);
+    return diff || Number(right.id) - Number(left.id);
+  });
+}
+
 export async function getPipeline() {
-  const response = await fetch(`${API_URL}/operations/pipeline`, {
-    headers: getAuthHeaders(),
+  const token = localStorage.getItem("token") || "";
+  const cached = pipelineCache && pipelineCache.token === token ? pipelineCache : null;
+  const params = new URLSearchParams(cached ? { since: cached.cursor } : { delta: "1" });
+
+  const response = await fetch(`${API_URL}/operations/pipeline?${params.toString()}`, {
+    headers: {
+      ...getAuthHeaders(),
+      ...(cached?.etag && { "If-None-Match": cached.etag }),
+    },
   });
 
+  // Nothing changed since the cached snapshot: keep it and its cursor.
+  if (response.status === 304 && cached) {
+    return sortPipelineOperations(cached.operations.values());
+  }
+
   const data = await parseApiJson(response, "Erro ao buscar pipeline");
-  return Array.isArray(data) ? data : Array.isArray(data?.operations) ? data.operations : [];
+  if (Array.isArray(data)) {
+    return data;
+  }
+
+  if (!data?.cursor) {
+    if (cached) {
+      return sortPipelineOperations(cached.operations.values());
+    }
+    return Array.isArray(data?.operations) ? data.operations : [];
+  }
+
+  const operations = data.mode === "delta" && cached ? new Map(cached.operations) : new Map();
+  (data.removed || []).forEach((id) => operations.delete(String(id)));
+  (data.operations || []).forEach((operation) => operations.set(String(operation.id), operation));
+
+  pipelineCache = { token, cursor: data.cursor, etag: response.headers.get("ETag"), operations };
+  return sortPipelineOperations(operations.values());
 }
 
 export async function getOperationsReport(filters = {}) {
@@ -734,6 +792,76 @@ export async function getUserNotifications(filters = {}) {
   return data;
 }
 
+// EventSource nao envia o header Authorization, entao o stream SSE e lido
+// com fetch. Resolve quando o servidor encerra a conexao (limite de tempo) e
+// devolve o ultimo id recebido para a proxima reconexao. Lanca erro com
+// fallback = "poll" quando o worker nao aceita mais streams.
+export async function streamUserNotifications({
+  lastEventId = "",
+  signal,
+  onOpen,
+  onEvent,
+} = {}) {
+  const headers = {
+    ...getAuthHeaders(false),
+    Accept: "text/event-stream",
+  };
+  if (lastEventId) {
+    headers["Last-Event-ID"] = String(lastEventId);
+  }
+
+  const response = await fetch(`${API_URL}/notifications/stream`, {
+    headers,
+    signal,
+  });
+
+  if (!response.ok || !response.body) {
+    const data = await response.json().catch(() => ({}));
+    const error = new Error(data?.error || "Erro ao abrir stream de notificacoes");
+    error.fallback = data?.fallback || "poll";
+    throw error;
+  }
+
+  onOpen?.();
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let currentId = lastEventId;
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+    let separator = buffer.indexOf("\n\n");
+
+    while (separator >= 0) {
+      const block = buffer.slice(0, separator);
+      buffer = buffer.slice(separator + 2);
+      separator = buffer.indexOf("\n\n");
+
+      let type = "message";
+      let data = "";
+      block.split("\n").forEach((line) => {
+        if (line.startsWith("id:")) currentId = line.slice(3).trim();
+        else if (line.startsWith("event:")) type = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      });
+
+      if (!data) continue;
+
+      try {
+        onEvent?.({ type, id: currentId, data: JSON.parse(data) });
+      } catch {
+        // evento malformado: ignora e segue lendo o stream
+      }
+    }
+  }
+
+  return currentId;
+}
+
 export async function markNotificationAsRead(notificationId) {
   const response = await fetch(`${API_URL}/notifications/${notificationId}/read`, {
     method: "PUT",